@@ -0,0 +1,121 @@
+"""
+Throughput comparison of ApiView and AsyncApiView under concurrent load,
+in-process.
+
+Each request's processor makes three calls to a simulated internal
+service (10 ms of waiting each): sequentially with time.sleep in the
+sync view, and concurrently with asyncio.gather in the async view.  A
+second pair of views does no I/O at all, to show the overhead of running
+each request on an event loop.  Requests are sent from a pool of worker
+threads, as a threaded WSGI server would.
+
+Run from the repository root:
+
+    python benchmarks/bench_async_view.py
+"""
+import os
+import sys
+
+from asyncio import gather, sleep as async_sleep
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import RequestFactory  # noqa: E402
+
+from pronym_api.views import ApiView, AsyncApiView  # noqa: E402
+from pronym_api.views.processor import Processor  # noqa: E402
+from pronym_api.views.serializer import Serializer  # noqa: E402
+
+SERVICE_CALLS = 3
+SERVICE_LATENCY = 0.01
+
+
+class SyncServiceProcessor(Processor):
+    def process(self):
+        results = []
+        for index in range(SERVICE_CALLS):
+            sleep(SERVICE_LATENCY)
+            results.append(index)
+        return results
+
+
+class AsyncServiceProcessor(Processor):
+    async def process(self):
+        return await gather(*[
+            self.call_service(index) for index in range(SERVICE_CALLS)])
+
+    async def call_service(self, index):
+        await async_sleep(SERVICE_LATENCY)
+        return index
+
+
+class NoIoProcessor(Processor):
+    def process(self):
+        return list(range(SERVICE_CALLS))
+
+
+class ResultsSerializer(Serializer):
+    def serialize(self):
+        return {'results': self.processing_artifact}
+
+
+def make_view(base_cls, processor_cls):
+    return type(base_cls.__name__, (base_cls,), {
+        'endpoint_name': 'bench',
+        'require_authentication': False,
+        'log_requests': False,
+        'methods': {
+            'GET': {
+                'processor': processor_cls,
+                'serializer': ResultsSerializer
+            }
+        }
+    }).as_view()
+
+
+def measure(view, requests, concurrency):
+    request_factory = RequestFactory()
+
+    def send(_):
+        response = view(request_factory.get('/'))
+        assert response.status_code == 200, response.status_code
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(send, range(concurrency)))  # warm up
+        started = monotonic()
+        list(executor.map(send, range(requests)))
+        return requests / (monotonic() - started)
+
+
+def bench(name, sync_view, async_view, requests, concurrency):
+    sync_rate = measure(sync_view, requests, concurrency)
+    async_rate = measure(async_view, requests, concurrency)
+    print(
+        '{0:<10} {1:>3} threads  sync {2:8.0f} req/s  async {3:8.0f} req/s '
+        ' ({4:.2f}x)'.format(
+            name, concurrency, sync_rate, async_rate,
+            async_rate / sync_rate))
+
+
+if __name__ == '__main__':
+    for concurrency in (1, 8, 32):
+        bench(
+            'service',
+            make_view(ApiView, SyncServiceProcessor),
+            make_view(AsyncApiView, AsyncServiceProcessor),
+            requests=20 * concurrency,
+            concurrency=concurrency)
+    for concurrency in (1, 8):
+        bench(
+            'no I/O',
+            make_view(ApiView, NoIoProcessor),
+            make_view(AsyncApiView, NoIoProcessor),
+            requests=5000,
+            concurrency=concurrency)
@@ -0,0 +1,101 @@
+"""
+Micro-benchmark for the JSON codecs used by ApiView.
+
+Compares StdlibJsonCodec against OrjsonJsonCodec (if orjson is installed)
+at decoding and encoding a small request body, a list of records like a
+typical collection response (with dates and decimals that go through
+DjangoJSONEncoder) and a large, deeply nested document.
+
+Run from the repository root:
+
+    python benchmarks/bench_json_codec.py
+"""
+import os
+import sys
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from timeit import repeat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils.timezone import utc  # noqa: E402
+
+from pronym_api.views import codec  # noqa: E402
+
+
+def make_small_payload():
+    return {'name': 'Gregg', 'email': 'gregg@mail.com', 'color': 'red'}
+
+
+def make_records_payload(count):
+    started = datetime(2020, 1, 1, tzinfo=utc)
+    return {
+        'results': [
+            {
+                'id': index,
+                'name': 'Record {0}'.format(index),
+                'email': 'user{0}@example.com'.format(index),
+                'datetime_added': started + timedelta(minutes=index),
+                'balance': Decimal('{0}.{1:02d}'.format(index, index % 100)),
+                'is_active': index % 3 != 0,
+                'tags': ['alpha', 'beta', 'gamma'][:index % 4]
+            }
+            for index in range(count)
+        ],
+        'next': None
+    }
+
+
+def make_nested_payload(depth, width):
+    payload = {'value': 'leaf', 'numbers': list(range(width))}
+    for level in range(depth):
+        payload = {
+            'level': level,
+            'children': [payload] + [
+                {'index': index, 'label': 'sibling {0}'.format(index)}
+                for index in range(width)
+            ]
+        }
+    return payload
+
+
+def time_per_call(func, number):
+    return min(repeat(func, number=number, repeat=5)) / number * 1000000
+
+
+def bench(name, payload, codecs, number):
+    encoded = codecs[0].encode(payload)
+    print('{0} ({1} bytes)'.format(name, len(encoded)))
+    baseline = None
+    for json_codec in codecs:
+        decoded = json_codec.decode(encoded)
+        assert json_codec.decode(json_codec.encode(payload)) == decoded
+        encode_time = time_per_call(
+            lambda: json_codec.encode(payload), number)
+        decode_time = time_per_call(
+            lambda: json_codec.decode(encoded), number)
+        if baseline is None:
+            baseline = (encode_time, decode_time)
+        print(
+            '  {0:<16} encode {1:9.1f} us ({2:4.1f}x)  '
+            'decode {3:9.1f} us ({4:4.1f}x)'.format(
+                type(json_codec).__name__,
+                encode_time, baseline[0] / encode_time,
+                decode_time, baseline[1] / decode_time))
+
+
+if __name__ == '__main__':
+    codecs = [codec.StdlibJsonCodec()]
+    if codec.orjson is not None:
+        codecs.append(codec.OrjsonJsonCodec())
+    else:
+        print('orjson is not installed; only timing the stdlib codec.')
+    bench('small', make_small_payload(), codecs, number=20000)
+    bench('records', make_records_payload(2000), codecs, number=50)
+    bench('nested', make_nested_payload(100, 50), codecs, number=50)
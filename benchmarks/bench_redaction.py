@@ -0,0 +1,100 @@
+"""
+Micro-benchmark for nested payload redaction.
+
+Compares the compiled RedactionPlan against the naive approach of
+deep-copying the payload and walking every path, on a wide payload (many
+list items, each with a redacted field) and a deep payload (a long chain
+of nested objects with one redacted leaf and many untouched siblings).
+
+Run from the repository root:
+
+    python benchmarks/bench_redaction.py
+"""
+import os
+import sys
+
+from copy import deepcopy
+from timeit import repeat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from pronym_api.views.redaction import get_redaction_plan  # noqa: E402
+
+
+def naive_redact(payload, paths, replacement):
+    payload = deepcopy(payload)
+
+    def walk(value, components):
+        if not components:
+            return
+        head, rest = components[0], components[1:]
+        if isinstance(value, dict):
+            keys = list(value) if head == '*' else [head]
+        elif isinstance(value, list):
+            keys = range(len(value)) if head == '*' else [int(head)]
+        else:
+            return
+        for key in keys:
+            try:
+                child = value[key]
+            except (KeyError, IndexError):
+                continue
+            if rest:
+                walk(child, rest)
+            else:
+                value[key] = replacement
+
+    for path in paths:
+        walk(payload, path.split('.'))
+    return payload
+
+
+def make_wide_payload(width):
+    return {
+        'items': [
+            {
+                'id': index,
+                'card': {'number': '4111111111111111', 'brand': 'visa'},
+                'tags': ['a', 'b', 'c']
+            }
+            for index in range(width)
+        ]
+    }
+
+
+def make_deep_payload(depth, siblings):
+    payload = {'secret': 'hunter2'}
+    for level in range(depth):
+        payload = {
+            'child': payload,
+            'siblings': [{'value': index} for index in range(siblings)]
+        }
+    return payload
+
+
+def bench(name, payload, paths, number=200):
+    plan = get_redaction_plan(tuple(paths), '******')
+    assert plan.redact(payload) == naive_redact(payload, paths, '******')
+    naive = min(repeat(
+        lambda: naive_redact(payload, paths, '******'),
+        number=number, repeat=5))
+    compiled = min(repeat(
+        lambda: plan.redact(payload), number=number, repeat=5))
+    print('{0:<8} naive {1:8.2f} ms  compiled {2:8.2f} ms  ({3:.1f}x)'.format(
+        name,
+        naive / number * 1000,
+        compiled / number * 1000,
+        naive / compiled))
+
+
+if __name__ == '__main__':
+    bench('wide', make_wide_payload(2000), ['items.*.card.number'])
+    bench(
+        'deep',
+        make_deep_payload(50, 50),
+        ['.'.join(['child'] * 50 + ['secret'])])
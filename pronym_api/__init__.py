@@ -0,0 +1 @@
+default_app_config = 'pronym_api.apps.PronymApiConfig'
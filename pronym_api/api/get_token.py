@@ -30,7 +30,7 @@ class GetTokenProcessor(Processor):
     def process(self):
         # Generate the token
         member = self.validator.found_api_account_member
-        return member.create_whitelist_entry()
+        return member.issue_whitelist_entry()
 
 
 class GetTokenSerializer(Serializer):
@@ -0,0 +1,38 @@
+from pronym_api.models import TokenWhitelistEntry
+from pronym_api.views.api_view import ApiView
+from pronym_api.views.processor import Processor
+
+from .get_token import GetTokenSerializer
+
+
+class RefreshTokenProcessor(Processor):
+    def process(self):
+        # The token was already checked against the whitelist during
+        # authentication, so there's no password to check here.
+        # Tokens are issued under the same policy as get-token, so a
+        # refresh may hand back a recent entry, and counts towards (and
+        # may evict entries beyond) the member's cap.
+        previous_entry = self.view.authenticated_whitelist_entry
+        entry = TokenWhitelistEntry.objects.issue_for_account_member(
+            self.view.authenticated_account_member)
+        if self.view.delete_previous_token and entry.id != previous_entry.id:
+            # The previous entry may already have been evicted.
+            TokenWhitelistEntry.objects.filter(id=previous_entry.id).delete()
+        return entry
+
+
+class RefreshTokenApiView(ApiView):
+    endpoint_name = 'refresh-token'
+    methods = {
+        'POST': {
+            'processor': RefreshTokenProcessor,
+            'serializer': GetTokenSerializer
+        }
+    }
+    # The previous token has to be checked against the whitelist.
+    stateless_authentication = False
+    # Should the token used to make the request be revoked once its
+    # replacement has been issued?
+    delete_previous_token = False
+
+    redacted_response_payload_fields = ['token']
@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+from django.core import checks
+
+from pronym_api.log_writer import get_log_writer_errors
+
+
+def check_log_writers(app_configs, **kwargs):
+    return [
+        checks.Error(message, id='pronym_api.E001')
+        for message in get_log_writer_errors()
+    ]
+
+
+class PronymApiConfig(AppConfig):
+    name = 'pronym_api'
+
+    def ready(self):
+        checks.register(check_log_writers)
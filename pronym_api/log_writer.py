@@ -0,0 +1,442 @@
+import atexit
+import logging
+import os
+
+from datetime import datetime
+from json import dumps
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from time import monotonic
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_log_record(entry):
+    """The structured form of a LogEntry, as written by the writers that
+    don't save to the database: a dictionary of its column values."""
+    return {
+        field.attname: getattr(entry, field.attname)
+        for field in entry._meta.concrete_fields
+        if field.attname != 'id'
+    }
+
+
+class SyncLogWriter:
+    """Saves each log entry to the database as soon as it is written."""
+
+    def get_stats(self):
+        return {}
+
+    def write(self, entry):
+        entry.save()
+
+
+class BatchedLogWriter:
+    """Queues log entries in memory and saves them from a background
+    thread with bulk_create, once batch_size entries are waiting or
+    flush_interval seconds have passed since the first of them arrived.
+
+    When the queue is full, overflow decides what happens to a new entry:
+    'block' waits for room, 'drop' discards it and 'sync' saves it
+    immediately in the calling thread."""
+
+    OVERFLOW_BLOCK = 'block'
+    OVERFLOW_DROP = 'drop'
+    OVERFLOW_SYNC = 'sync'
+
+    def __init__(
+            self, max_queue_size=10000, batch_size=100, flush_interval=0.5,
+            overflow=OVERFLOW_SYNC):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._queue = Queue(max_queue_size)
+        self._lock = Lock()
+        self._stopping = Event()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        """Save everything currently queued, in the calling thread."""
+        while True:
+            batch = self._take_batch(block=False)
+            if not batch:
+                break
+            self._save_batch(batch)
+
+    def get_stats(self):
+        return {
+            'queue_depth': self.queue_depth,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed
+        }
+
+    def start(self):
+        # A writer created before a fork has no thread in the child.
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._stopping.clear()
+        self._thread = Thread(
+            target=self._run, name='pronym-api-log-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self.flush()
+
+    def write(self, entry):
+        if self.overflow == self.OVERFLOW_BLOCK:
+            self._queue.put(entry)
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except Full:
+            if self.overflow == self.OVERFLOW_DROP:
+                with self._lock:
+                    self.dropped += 1
+            else:
+                entry.save()
+                with self._lock:
+                    self.written += 1
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._take_batch(block=True)
+            if batch:
+                # This thread never sees request_started/request_finished,
+                # so drop connections past CONN_MAX_AGE or left unusable
+                # ourselves, before each batch and after any that failed.
+                close_old_connections()
+                if not self._save_batch(batch):
+                    close_old_connections()
+        close_old_connections()
+
+    def _save_batch(self, batch):
+        model = type(batch[0])
+        try:
+            model.objects.bulk_create(batch)
+        except Exception:
+            logger.exception(
+                'Could not save a batch of %d log entries.', len(batch))
+            with self._lock:
+                self.failed += len(batch)
+            return False
+        with self._lock:
+            self.written += len(batch)
+        return True
+
+    def _take_batch(self, block):
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            if not block:
+                timeout = None
+            elif deadline is None:
+                timeout = self.flush_interval
+            else:
+                timeout = deadline - monotonic()
+                if timeout <= 0:
+                    break
+            try:
+                batch.append(self._queue.get(block, timeout))
+            except Empty:
+                break
+            if deadline is None:
+                deadline = monotonic() + self.flush_interval
+        return batch
+
+
+class JsonLinesLogWriter:
+    """Appends log records to a file as JSON lines, for a log shipper to
+    pick up.
+
+    Records are buffered in memory and written once buffer_size of them
+    are waiting, or by a background thread every flush_interval seconds.
+    fsync controls durability: 'never' leaves it to the OS, 'flush' syncs
+    each time the buffer is written and 'always' writes and syncs every
+    record as it arrives.
+
+    '{pid}' in path is replaced with the process id.  The file is rotated
+    (renamed with a timestamp suffix, and a new one started) once it
+    reaches max_bytes or has been open for max_age seconds; since another
+    process could be writing to or rotating a shared file, rotation is
+    only allowed for per-process paths.  Processes sharing a path can
+    leave rotation to an external tool such as logrotate: like
+    logging.handlers.WatchedFileHandler, the writer reopens the path
+    whenever the file it has open is moved or deleted."""
+
+    FSYNC_NEVER = 'never'
+    FSYNC_FLUSH = 'flush'
+    FSYNC_ALWAYS = 'always'
+
+    # The background thread waits at least this many seconds between
+    # flushes, even if flush_interval is shorter.
+    MIN_FLUSH_INTERVAL = 0.01
+
+    def __init__(
+            self, path, buffer_size=100, flush_interval=1, max_bytes=None,
+            max_age=None, fsync=FSYNC_NEVER):
+        if (max_bytes is not None or max_age is not None) and \
+                '{pid}' not in path:
+            raise ImproperlyConfigured(
+                "JsonLinesLogWriter can only rotate per-process files; "
+                "include '{pid}' in the path.")
+        self.path = path
+        self.buffer_size = 1 if fsync == self.FSYNC_ALWAYS else buffer_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.fsync = fsync
+        self._buffer = []
+        self._file = None
+        self._file_path = None
+        self._opened = None
+        self._lock = Lock()
+        self._stopping = Event()
+        self._thread = None
+        self._pid = None
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def get_path(self):
+        return self.path.replace('{pid}', str(os.getpid()))
+
+    def get_stats(self):
+        return {'buffered': len(self._buffer)}
+
+    def rotate(self):
+        with self._lock:
+            self._flush()
+            self._rotate()
+
+    def start(self):
+        # A writer created before a fork has no thread in the child.
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._stopping.clear()
+        self._thread = Thread(
+            target=self._run, name='pronym-api-json-lines-writer',
+            daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        with self._lock:
+            self._flush()
+            self._close()
+
+    def write(self, entry):
+        line = dumps(get_log_record(entry), cls=DjangoJSONEncoder)
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.buffer_size:
+                self._flush()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        if self._file is None or self._file_path != self.get_path() or \
+                self._is_moved():
+            # Not yet open, forked into a process with its own path, or
+            # moved aside by another process or tool.
+            self._close()
+            self._open()
+        elif self._should_rotate():
+            self._rotate()
+        self._file.write('\n'.join(self._buffer) + '\n')
+        self._buffer = []
+        self._file.flush()
+        if self.fsync != self.FSYNC_NEVER:
+            os.fsync(self._file.fileno())
+
+    def _is_moved(self):
+        try:
+            path_stat = os.stat(self._file_path)
+        except FileNotFoundError:
+            return True
+        file_stat = os.fstat(self._file.fileno())
+        return (path_stat.st_dev, path_stat.st_ino) != \
+            (file_stat.st_dev, file_stat.st_ino)
+
+    def _open(self):
+        self._file_path = self.get_path()
+        self._file = open(self._file_path, 'a')
+        self._opened = monotonic()
+
+    def _rotate(self):
+        self._close()
+        path = self.get_path()
+        if os.path.exists(path):
+            os.rename(
+                path,
+                '{0}.{1}'.format(
+                    path, datetime.utcnow().strftime('%Y%m%d%H%M%S%f')))
+        self._open()
+
+    def _run(self):
+        while not self._stopping.wait(
+                max(self.flush_interval, self.MIN_FLUSH_INTERVAL)):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Could not write log records to %s.',
+                                 self.get_path())
+
+    def _should_rotate(self):
+        if self.max_bytes is not None and \
+                self._file.tell() >= self.max_bytes:
+            return True
+        if self.max_age is not None and \
+                monotonic() - self._opened >= self.max_age:
+            return True
+        return False
+
+
+class LoggingLogWriter:
+    """Sends each log record to a Python logger, as a JSON message with
+    the record itself attached as the api_log_record attribute."""
+
+    def __init__(self, logger_name='pronym_api.requests', level=logging.INFO):
+        self.logger = logging.getLogger(logger_name)
+        self.level = level
+
+    def get_stats(self):
+        return {}
+
+    def write(self, entry):
+        record = get_log_record(entry)
+        self.logger.log(
+            self.level,
+            dumps(record, cls=DjangoJSONEncoder),
+            extra={'api_log_record': record})
+
+
+_log_writers = {}
+
+
+def get_log_writer_configs():
+    """The configured log writers, keyed by alias, in the same form as
+    Django's CACHES setting:
+
+    API_LOG_WRITERS = {
+        'default': {
+            'BACKEND': 'pronym_api.log_writer.BatchedLogWriter',
+            'OPTIONS': {'batch_size': 500},
+        },
+        'files': {
+            'BACKEND': 'pronym_api.log_writer.JsonLinesLogWriter',
+            'OPTIONS': {'path': '/var/log/api/requests.jsonl'},
+        },
+    }
+
+    If API_LOG_WRITERS isn't set, the default writer is chosen by the
+    API_LOG_WRITER setting: 'sync' (the default) or 'batched', which is
+    configured by API_LOG_QUEUE_SIZE, API_LOG_BATCH_SIZE,
+    API_LOG_FLUSH_INTERVAL_MS and API_LOG_OVERFLOW."""
+    configs = getattr(settings, 'API_LOG_WRITERS', None)
+    if configs is not None:
+        return configs
+    if getattr(settings, 'API_LOG_WRITER', 'sync') == 'batched':
+        default_config = {
+            'BACKEND': 'pronym_api.log_writer.BatchedLogWriter',
+            'OPTIONS': {
+                'max_queue_size': getattr(
+                    settings, 'API_LOG_QUEUE_SIZE', 10000),
+                'batch_size': getattr(settings, 'API_LOG_BATCH_SIZE', 100),
+                'flush_interval': getattr(
+                    settings, 'API_LOG_FLUSH_INTERVAL_MS', 500) / 1000,
+                'overflow': getattr(
+                    settings, 'API_LOG_OVERFLOW',
+                    BatchedLogWriter.OVERFLOW_SYNC)
+            }
+        }
+    else:
+        default_config = {'BACKEND': 'pronym_api.log_writer.SyncLogWriter'}
+    return {'default': default_config}
+
+
+def get_log_writer_errors():
+    """Describe anything wrong with the log writer settings: a writer
+    without a BACKEND, or an endpoint (or the default) directed to a
+    writer that isn't configured.  Checked by Django's system checks,
+    so that mistakes show up at startup rather than on a request."""
+    configs = get_log_writer_configs()
+    errors = []
+    for alias, config in configs.items():
+        if 'BACKEND' not in config:
+            errors.append(
+                "API_LOG_WRITERS['{0}'] has no BACKEND.".format(alias))
+    if 'default' not in configs:
+        errors.append("API_LOG_WRITERS has no 'default' writer.")
+    endpoint_writers = getattr(settings, 'API_LOG_ENDPOINT_WRITERS', {})
+    for endpoint_name, alias in sorted(endpoint_writers.items()):
+        if alias not in configs:
+            errors.append(
+                "API_LOG_ENDPOINT_WRITERS['{0}'] names an unknown writer, "
+                "'{1}'.".format(endpoint_name, alias))
+    return errors
+
+
+def get_log_writer(endpoint_name=None):
+    """Return the log writer for an endpoint: the alias named for it in
+    the API_LOG_ENDPOINT_WRITERS setting, or 'default'.  Writers with a
+    stop() method are stopped (flushing anything buffered) when they are
+    replaced after a settings change, and when the process exits."""
+    endpoint_writers = getattr(settings, 'API_LOG_ENDPOINT_WRITERS', {})
+    alias = endpoint_writers.get(endpoint_name, 'default')
+    try:
+        config = get_log_writer_configs()[alias]
+    except KeyError:
+        raise ImproperlyConfigured(
+            "No log writer is configured as '{0}'.".format(alias))
+    cached = _log_writers.get(alias)
+    if cached is not None and cached[0] == config:
+        writer = cached[1]
+    else:
+        writer_cls = import_string(config['BACKEND'])
+        writer = writer_cls(**config.get('OPTIONS', {}))
+        _log_writers[alias] = (config, writer)
+        if cached is not None:
+            _stop_log_writer(cached[1])
+    if hasattr(writer, 'start'):
+        writer.start()
+    return writer
+
+
+def _stop_log_writer(writer, timeout=5):
+    if hasattr(writer, 'stop'):
+        writer.stop(timeout)
+
+
+@atexit.register
+def _stop_log_writers():
+    for config, writer in list(_log_writers.values()):
+        _stop_log_writer(writer)
@@ -0,0 +1,195 @@
+from array import array
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import is_naive, make_aware, now
+
+from pronym_api.models import LogEntry
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+class Command(BaseCommand):
+    help = (
+        'Prints latency percentiles and error rates from the API log, per '
+        'endpoint or per account, over a time window.  Sampled entries are '
+        'weighted by the number of requests each stands in for.')
+
+    GROUP_BY_ENDPOINT = 'endpoint'
+    GROUP_BY_ACCOUNT = 'account'
+    GROUP_BY_ENDPOINT_ACCOUNT = 'endpoint-account'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=float,
+            default=24,
+            help='Summarize entries from the last this many hours.')
+        parser.add_argument(
+            '--since',
+            help=(
+                'Summarize entries added at or after this ISO 8601 '
+                'datetime, instead of using --hours.'))
+        parser.add_argument(
+            '--until',
+            help='Summarize entries added before this ISO 8601 datetime.')
+        parser.add_argument(
+            '--group-by',
+            choices=[
+                self.GROUP_BY_ENDPOINT, self.GROUP_BY_ACCOUNT,
+                self.GROUP_BY_ENDPOINT_ACCOUNT],
+            default=self.GROUP_BY_ENDPOINT)
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='How many rows to fetch from the database at a time.')
+
+    def handle(self, *args, **options):
+        if numpy is None:
+            raise CommandError(
+                'api_log_stats requires numpy; install pronym_api[stats].')
+        entries = LogEntry.objects.filter(
+            datetime_added__gte=self.get_window_start(options))
+        if options['until']:
+            entries = entries.filter(
+                datetime_added__lt=self.parse_datetime_option(
+                    options['until']))
+        group_by = options['group_by']
+        group_keys, groups, columns = self.load_columns(
+            entries, group_by, options['chunk_size'])
+        if not len(group_keys):
+            self.stdout.write('No log entries in this window.')
+            return
+        self.stdout.write(
+            '{0:<40} {1:>10} {2:>9} {3:>9} {4:>9} {5:>7} {6:>7}'.format(
+                group_by, 'requests', 'p50 ms', 'p95 ms', 'p99 ms',
+                '4xx %', '5xx %'))
+        # Sort the rows by group, and by duration within each group, once;
+        # each group's rows are then a contiguous slice of every column.
+        order = numpy.lexsort((columns['durations'], groups))
+        group_starts = numpy.searchsorted(
+            groups[order], numpy.arange(1, len(group_keys)))
+        group_columns = [
+            dict(zip(columns, group_slices))
+            for group_slices in zip(*[
+                numpy.split(column[order], group_starts)
+                for column in columns.values()
+            ])
+        ]
+        for group_index in numpy.argsort(group_keys, kind='stable'):
+            self.stdout.write(self.format_group(
+                group_keys[group_index],
+                *self.summarize(group_columns[group_index])))
+
+    def format_group(
+            self, group_key, requests, percentiles, client_error_rate,
+            server_error_rate):
+        return (
+            '{0:<40} {1:>10.0f} {2:>9} {3:>9} {4:>9} {5:>7.2f} '
+            '{6:>7.2f}'.format(
+                group_key, requests,
+                *[
+                    '-' if numpy.isnan(value) else '{0:.1f}'.format(
+                        value * 1000)
+                    for value in percentiles
+                ],
+                client_error_rate * 100, server_error_rate * 100))
+
+    def get_group_key(self, group_by, endpoint_name, api_account_id):
+        if group_by == self.GROUP_BY_ENDPOINT:
+            return endpoint_name
+        account = 'anonymous' if api_account_id is None else \
+            'account {0}'.format(api_account_id)
+        if group_by == self.GROUP_BY_ACCOUNT:
+            return account
+        return '{0} / {1}'.format(endpoint_name, account)
+
+    def get_window_start(self, options):
+        if options['since']:
+            return self.parse_datetime_option(options['since'])
+        return now() - timedelta(hours=options['hours'])
+
+    def load_columns(self, entries, group_by, chunk_size):
+        """Stream the entries' columns into compact arrays, without
+        instantiating a LogEntry (or keeping a row tuple) per entry."""
+        group_indexes = {}
+        groups = array('q')
+        durations = array('d')
+        status_codes = array('q')
+        weights = array('d')
+        rows = entries.order_by().values_list(
+            'endpoint_name', 'authenticated_profile__api_account_id',
+            'duration', 'status_code', 'sample_rate'
+        ).iterator(chunk_size=chunk_size)
+        for endpoint_name, api_account_id, duration, status_code, \
+                sample_rate in rows:
+            group_key = self.get_group_key(
+                group_by, endpoint_name, api_account_id)
+            group_index = group_indexes.get(group_key)
+            if group_index is None:
+                group_index = group_indexes[group_key] = len(group_indexes)
+            groups.append(group_index)
+            durations.append(float('nan') if duration is None else duration)
+            status_codes.append(status_code)
+            # Each sampled entry stands in for 1 / sample_rate requests.
+            weights.append(1 / sample_rate if sample_rate else 1)
+        group_keys = numpy.empty(len(group_indexes), dtype=object)
+        for group_key, group_index in group_indexes.items():
+            group_keys[group_index] = group_key
+        columns = {
+            'durations': numpy.frombuffer(durations, dtype=numpy.float64),
+            'status_codes': numpy.frombuffer(
+                status_codes, dtype=numpy.int64),
+            'weights': numpy.frombuffer(weights, dtype=numpy.float64)
+        }
+        return group_keys, numpy.frombuffer(groups, dtype=numpy.int64), \
+            columns
+
+    def parse_datetime_option(self, value):
+        parsed = parse_datetime(value)
+        if parsed is None:
+            # A bare date means midnight at the start of it.
+            parsed_date = parse_date(value)
+            if parsed_date is not None:
+                parsed = datetime.combine(parsed_date, time())
+        if parsed is None:
+            raise CommandError(
+                '{0!r} is not an ISO 8601 date or datetime.'.format(value))
+        if is_naive(parsed):
+            parsed = make_aware(parsed)
+        return parsed
+
+    def summarize(self, columns):
+        """Summarize one group's columns, with durations in ascending
+        order (and missing ones last)."""
+        durations = columns['durations']
+        status_codes = columns['status_codes']
+        weights = columns['weights']
+        requests = weights.sum()
+        # Entries logged before durations were recorded have none.
+        timed = ~numpy.isnan(durations)
+        percentiles = self.weighted_percentiles(
+            durations[timed], weights[timed], [50, 95, 99])
+        client_errors = weights[(status_codes >= 400) & (status_codes < 500)]
+        server_errors = weights[status_codes >= 500]
+        return (
+            requests, percentiles, client_errors.sum() / requests,
+            server_errors.sum() / requests)
+
+    def weighted_percentiles(self, values, weights, percentiles):
+        """Percentiles of sorted values, each standing for weights of the
+        requests.  Each value is placed at the midpoint of the share of
+        the total weight it covers, and percentiles interpolated linearly
+        between them."""
+        if not len(values):
+            return [float('nan')] * len(percentiles)
+        cumulative_weights = numpy.cumsum(weights)
+        positions = (cumulative_weights - weights / 2) / \
+            cumulative_weights[-1]
+        return numpy.interp(
+            numpy.array(percentiles) / 100, positions, values)
@@ -0,0 +1,64 @@
+from datetime import timedelta
+from time import monotonic
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pronym_api.models import LogEntry, LogPayload
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes API log entries older than the retention period, in '
+        'batches, one time bucket at a time.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=float,
+            help=(
+                'Delete entries older than this many days.  Defaults to '
+                'the API_LOG_RETENTION_DAYS setting.'))
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=LogEntry.objects.DEFAULT_PRUNE_BATCH_SIZE,
+            help='How many entries to delete per statement.')
+        parser.add_argument(
+            '--bucket-hours',
+            type=float,
+            default=LogEntry.objects.DEFAULT_PRUNE_BUCKET.total_seconds()
+            / 3600,
+            help='How many hours of entries to work through at a time.')
+        parser.add_argument(
+            '--archive',
+            help='Append deleted entries to this file as JSON lines.')
+
+    def handle(self, *args, **options):
+        cutoff = LogEntry.objects.get_retention_cutoff(options['days'])
+        if cutoff is None:
+            raise CommandError(
+                'Pass --days or set API_LOG_RETENTION_DAYS.')
+        started = monotonic()
+        archive_file = None
+        if options['archive']:
+            archive_file = open(options['archive'], 'a')
+        try:
+            removed_count = LogEntry.objects.prune(
+                cutoff,
+                batch_size=options['batch_size'],
+                bucket=timedelta(hours=options['bucket_hours']),
+                archive_file=archive_file)
+        finally:
+            if archive_file is not None:
+                archive_file.close()
+        elapsed = monotonic() - started
+        throughput = removed_count / elapsed if elapsed > 0 else 0
+        self.stdout.write(
+            'Removed {0} log entries in {1:.2f}s ({2:.0f} rows/s).'.format(
+                removed_count, elapsed, throughput))
+        removed_payload_count = LogPayload.objects.prune_unreferenced(
+            cutoff, batch_size=options['batch_size'])
+        if removed_payload_count:
+            self.stdout.write(
+                'Removed {0} unreferenced payloads.'.format(
+                    removed_payload_count))
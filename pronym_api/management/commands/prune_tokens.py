@@ -0,0 +1,54 @@
+from time import monotonic, sleep
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from pronym_api.models import TokenWhitelistEntry
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired token whitelist entries in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=TokenWhitelistEntry.objects.DEFAULT_SWEEP_BATCH_SIZE,
+            help='How many entries to delete per statement.')
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between batches.')
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep sweeping forever (e.g. when run as a sidecar).')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help='Seconds to wait between sweeps in --loop mode.')
+
+    def handle(self, *args, **options):
+        while True:
+            if options['loop']:
+                # Nothing else closes connections in a long-running
+                # command, so drop any that have outlived CONN_MAX_AGE or
+                # broken since the last sweep.
+                close_old_connections()
+            self.sweep(options['batch_size'], options['pause'])
+            if not options['loop']:
+                break
+            sleep(options['interval'])
+
+    def sweep(self, batch_size, pause):
+        started = monotonic()
+        removed_count = TokenWhitelistEntry.objects.clear_expired_tokens(
+            batch_size=batch_size, pause=pause)
+        elapsed = monotonic() - started
+        throughput = removed_count / elapsed if elapsed > 0 else 0
+        self.stdout.write(
+            'Removed {0} expired tokens in {1:.2f}s ({2:.0f} rows/s).'.format(
+                removed_count, elapsed, throughput))
+        return removed_count
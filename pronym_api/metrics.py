@@ -0,0 +1,126 @@
+import atexit
+import logging
+import os
+
+from threading import Event, Lock, Thread
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.timezone import now
+
+from pronym_api.models import EndpointMetric
+
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsAccumulator:
+    """Collects per-minute request metrics in memory and adds them to the
+    EndpointMetric table every flush_interval seconds, from a background
+    thread, with one increment per endpoint, account, status class and
+    minute rather than one write per request.
+
+    If a flush fails, the counters it hadn't written yet are kept for the
+    next one."""
+
+    # The background thread waits at least this many seconds between
+    # flushes, even if flush_interval is shorter.
+    MIN_FLUSH_INTERVAL = 0.1
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self.failed_flushes = 0
+        self._counters = {}
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._stopping = Event()
+        self._thread = None
+        self._pid = None
+
+    def flush(self):
+        """Write the accumulated counters, in the calling thread.  Returns
+        whether they were all written."""
+        with self._flush_lock:
+            with self._lock:
+                counters, self._counters = self._counters, {}
+            items = list(counters.items())
+            for index, (key, values) in enumerate(items):
+                endpoint_name, api_account_id, status_class, minute = key
+                count, total_latency, total_bytes = values
+                try:
+                    EndpointMetric.objects.increment(
+                        endpoint_name, api_account_id, status_class,
+                        minute, count, total_latency, total_bytes)
+                except Exception:
+                    logger.exception(
+                        'Could not save %d endpoint metrics.',
+                        len(items) - index)
+                    self._restore(items[index:])
+                    return False
+            return True
+
+    def record(
+            self, endpoint_name, api_account_id, status_code, latency,
+            total_bytes):
+        minute = now().replace(second=0, microsecond=0)
+        key = (endpoint_name, api_account_id, status_code // 100, minute)
+        with self._lock:
+            counters = self._counters.get(key)
+            if counters is None:
+                self._counters[key] = [1, latency, total_bytes]
+            else:
+                counters[0] += 1
+                counters[1] += latency
+                counters[2] += total_bytes
+
+    def start(self):
+        # An accumulator created before a fork has no thread in the child.
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._stopping.clear()
+        self._thread = Thread(
+            target=self._run, name='pronym-api-metrics', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self.flush()
+
+    def _restore(self, pending):
+        with self._lock:
+            self.failed_flushes += 1
+            for key, (count, total_latency, total_bytes) in pending:
+                counters = self._counters.setdefault(key, [0, 0, 0])
+                counters[0] += count
+                counters[1] += total_latency
+                counters[2] += total_bytes
+
+    def _run(self):
+        while not self._stopping.wait(
+                max(self.flush_interval, self.MIN_FLUSH_INTERVAL)):
+            # As for the batched log writer, this thread never sees
+            # request_started/request_finished.
+            close_old_connections()
+            if not self.flush():
+                close_old_connections()
+        close_old_connections()
+
+
+_metrics_accumulator = None
+
+
+def get_metrics_accumulator():
+    """Return this process's metrics accumulator, which is flushed every
+    API_METRICS_FLUSH_SECONDS (60 by default) and when the process
+    exits."""
+    global _metrics_accumulator
+    flush_interval = getattr(settings, 'API_METRICS_FLUSH_SECONDS', 60)
+    if _metrics_accumulator is None:
+        _metrics_accumulator = MetricsAccumulator(flush_interval)
+        atexit.register(_metrics_accumulator.stop, 5)
+    _metrics_accumulator.flush_interval = flush_interval
+    _metrics_accumulator.start()
+    return _metrics_accumulator
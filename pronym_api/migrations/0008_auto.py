@@ -0,0 +1,18 @@
+# Generated by Django 2.2.4 on 2026-10-16 22:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pronym_api', '0007_auto'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tokenwhitelistentry',
+            name='token_entropy',
+            field=models.BigIntegerField(null=True, unique=True),
+        ),
+    ]
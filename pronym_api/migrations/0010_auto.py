@@ -0,0 +1,23 @@
+# Generated by Django 2.2.4 on 2026-10-16 22:49
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pronym_api', '0009_auto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('datetime_added', models.DateTimeField(default=django.utils.timezone.now)),
+                ('datetime_expires', models.DateTimeField(db_index=True)),
+                ('token_entropy', models.BigIntegerField()),
+            ],
+        ),
+    ]
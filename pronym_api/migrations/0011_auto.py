@@ -0,0 +1,18 @@
+# Generated by Django 2.2.4 on 2026-10-16 22:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pronym_api', '0010_auto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logentry',
+            name='sample_rate',
+            field=models.FloatField(default=1),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from json import dumps
+
+from django.db import migrations
+
+
+BATCH_SIZE = 1000
+
+
+def convert_request_headers(apps, schema_editor):
+    # Request headers used to be stored as newline-separated NAME=value
+    # pairs covering all of request.META.  Rewrite them as JSON objects,
+    # keeping only the HTTP headers as ApiView now does by default.
+    LogEntry = apps.get_model('pronym_api', 'LogEntry')
+    batch = []
+    entries = LogEntry.objects.exclude(request_headers__startswith='{')\
+        .only('id', 'request_headers')
+    for entry in entries.iterator(chunk_size=BATCH_SIZE):
+        headers = {}
+        for line in entry.request_headers.split('\n'):
+            name, separator, value = line.partition('=')
+            if not separator:
+                continue
+            if name.startswith('HTTP_') or name in (
+                    'CONTENT_TYPE', 'CONTENT_LENGTH'):
+                headers[name] = value
+        entry.request_headers = dumps(headers)
+        batch.append(entry)
+        if len(batch) == BATCH_SIZE:
+            LogEntry.objects.bulk_update(batch, ['request_headers'])
+            batch = []
+    if batch:
+        LogEntry.objects.bulk_update(batch, ['request_headers'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pronym_api', '0011_auto'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            convert_request_headers, migrations.RunPython.noop),
+    ]
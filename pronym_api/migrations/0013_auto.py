@@ -0,0 +1,28 @@
+# Generated by Django 2.2.4 on 2026-10-16 22:58
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pronym_api', '0012_auto'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logentry',
+            name='datetime_added',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='logentry',
+            name='status_code',
+            field=models.PositiveIntegerField(db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='logentry',
+            index=models.Index(fields=['endpoint_name', 'datetime_added'], name='pronym_api__endpoin_0c3087_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.4 on 2026-10-16 22:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pronym_api', '0013_auto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EndpointMetric',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint_name', models.CharField(max_length=255)),
+                ('status_class', models.PositiveSmallIntegerField()),
+                ('minute', models.DateTimeField(db_index=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_latency', models.FloatField(default=0)),
+                ('total_bytes', models.BigIntegerField(default=0)),
+                ('api_account', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='endpoint_metrics', to='pronym_api.ApiAccount')),
+            ],
+            options={
+                'unique_together': {('endpoint_name', 'api_account', 'status_class', 'minute')},
+            },
+        ),
+    ]
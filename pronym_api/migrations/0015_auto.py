@@ -0,0 +1,48 @@
+# Generated by Django 2.2.4 on 2026-10-16 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pronym_api', '0014_auto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logentry',
+            name='authentication_duration',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='logentry',
+            name='duration',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='logentry',
+            name='processing_duration',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='logentry',
+            name='request_bytes',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='logentry',
+            name='response_bytes',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='logentry',
+            name='serialization_duration',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='logentry',
+            name='validation_duration',
+            field=models.FloatField(null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.4 on 2026-10-16 23:04
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pronym_api', '0015_auto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LogPayload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('content', models.TextField()),
+                ('datetime_added', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='logentry',
+            name='request_payload_digest',
+            field=models.CharField(db_index=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='logentry',
+            name='response_payload_digest',
+            field=models.CharField(db_index=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.4 on 2026-10-16 23:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pronym_api', '0017_auto'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='endpointmetric',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='endpointmetric',
+            constraint=models.UniqueConstraint(condition=models.Q(api_account__isnull=False), fields=('endpoint_name', 'api_account', 'status_class', 'minute'), name='unique_account_endpoint_metric'),
+        ),
+        migrations.AddConstraint(
+            model_name='endpointmetric',
+            constraint=models.UniqueConstraint(condition=models.Q(api_account__isnull=True), fields=('endpoint_name', 'status_class', 'minute'), name='unique_anonymous_endpoint_metric'),
+        ),
+    ]
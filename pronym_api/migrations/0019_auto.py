@@ -0,0 +1,19 @@
+# Generated by Django 2.2.4 on 2026-10-16 23:31
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pronym_api', '0018_auto'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logpayload',
+            name='datetime_added',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,7 +1,12 @@
 from .api_account import ApiAccount
 from .api_account_member import ApiAccountMember
+from .endpoint_metric import EndpointMetric
 from .log_entry import LogEntry
+from .log_payload import LogPayload
+from .revoked_token import RevokedToken
 from .token_whitelist_entry import TokenWhitelistEntry
 
 
-__all__ = ['ApiAccount', 'ApiAccountMember', 'LogEntry', 'TokenWhitelistEntry']
+__all__ = [
+    'ApiAccount', 'ApiAccountMember', 'EndpointMetric', 'LogEntry',
+    'LogPayload', 'RevokedToken', 'TokenWhitelistEntry']
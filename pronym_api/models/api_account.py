@@ -1,7 +1,14 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from pronym_api.token_cache import get_token_cache
+from pronym_api.token_revocation import is_revocation_tracking_enabled
 
 from .api_account_member import ApiAccountMember
+from .revoked_token import RevokedToken
+from .token_whitelist_entry import TokenWhitelistEntry
 
 
 class ApiAccount(models.Model):
@@ -42,3 +49,24 @@ class ApiAccount(models.Model):
     @property
     def has_active_member(self):
         return self.get_active_member() is not None
+
+
+@receiver(post_save, sender=ApiAccount)
+def post_save_account(sender, instance, **kwargs):
+    # Tokens for an inactive account are rejected, so stop serving any
+    # that were cached while it was active, and revoke them for stateless
+    # authentication.
+    if instance.is_active:
+        return
+    token_cache = get_token_cache()
+    if token_cache is not None:
+        token_cache.invalidate_account(instance.id)
+    if is_revocation_tracking_enabled():
+        RevokedToken.objects.revoke_entries(
+            TokenWhitelistEntry.objects.filter(
+                api_account_member__api_account=instance,
+                datetime_added__gte=TokenWhitelistEntry
+                .get_expiration_cutoff()
+            ).exclude(
+                token_entropy__in=RevokedToken.objects.values(
+                    'token_entropy')))
@@ -1,4 +1,8 @@
 from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from pronym_api.token_cache import get_token_cache
 
 from .token_whitelist_entry import TokenWhitelistEntry
 
@@ -23,3 +27,13 @@ class ApiAccountMember(models.Model):
 
     def create_whitelist_entry(self):
         return TokenWhitelistEntry.objects.create_for_account_member(self)
+
+    def issue_whitelist_entry(self):
+        return TokenWhitelistEntry.objects.issue_for_account_member(self)
+
+
+@receiver(post_delete, sender=ApiAccountMember)
+def post_delete_account_member(sender, instance, **kwargs):
+    token_cache = get_token_cache()
+    if token_cache is not None:
+        token_cache.invalidate_account_member(instance)
@@ -0,0 +1,75 @@
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q, UniqueConstraint
+
+
+class EndpointMetricManager(models.Manager):
+    def increment(
+            self, endpoint_name, api_account_id, status_class, minute,
+            count, total_latency, total_bytes):
+        """Add to the counters for one endpoint, account, status class and
+        minute, creating the row if it doesn't exist yet."""
+        lookup = {
+            'endpoint_name': endpoint_name,
+            'api_account_id': api_account_id,
+            'status_class': status_class,
+            'minute': minute
+        }
+        increments = {
+            'count': F('count') + count,
+            'total_latency': F('total_latency') + total_latency,
+            'total_bytes': F('total_bytes') + total_bytes
+        }
+        if self.filter(**lookup).update(**increments):
+            return
+        try:
+            with transaction.atomic():
+                self.create(
+                    count=count,
+                    total_latency=total_latency,
+                    total_bytes=total_bytes,
+                    **lookup)
+        except IntegrityError:
+            # Another process created the row first.
+            self.filter(**lookup).update(**increments)
+
+
+class EndpointMetric(models.Model):
+    """Request counts, total latency (in seconds) and total request and
+    response bytes for one endpoint, API account and status class (e.g.
+    2 for 2xx responses) in one minute."""
+    endpoint_name = models.CharField(max_length=255)
+    api_account = models.ForeignKey(
+        'ApiAccount',
+        null=True,
+        related_name='endpoint_metrics',
+        on_delete=models.CASCADE)
+    status_class = models.PositiveSmallIntegerField()
+    minute = models.DateTimeField(db_index=True)
+    count = models.PositiveIntegerField(default=0)
+    total_latency = models.FloatField(default=0)
+    total_bytes = models.BigIntegerField(default=0)
+
+    objects = EndpointMetricManager()
+
+    class Meta:
+        # NULLs never compare equal, so a single unique constraint wouldn't
+        # stop duplicate rows for unauthenticated requests.
+        constraints = [
+            UniqueConstraint(
+                fields=[
+                    'endpoint_name', 'api_account', 'status_class', 'minute'
+                ],
+                condition=Q(api_account__isnull=False),
+                name='unique_account_endpoint_metric'),
+            UniqueConstraint(
+                fields=['endpoint_name', 'status_class', 'minute'],
+                condition=Q(api_account__isnull=True),
+                name='unique_anonymous_endpoint_metric')
+        ]
+
+    def __str__(self):  # pragma: no cover
+        return "[{0}] {1} {2}xx: {3}".format(
+            self.minute,
+            self.endpoint_name,
+            self.status_class,
+            self.count)
@@ -1,9 +1,83 @@
+from datetime import timedelta
+from json import dumps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils.timezone import now
 
 
+class LogEntryManager(models.Manager):
+    DEFAULT_PRUNE_BATCH_SIZE = 1000
+    DEFAULT_PRUNE_BUCKET = timedelta(hours=1)
+
+    @staticmethod
+    def get_retention_cutoff(retention_days=None):
+        if retention_days is None:
+            retention_days = getattr(settings, 'API_LOG_RETENTION_DAYS', None)
+        if retention_days is None:
+            return None
+        return now() - timedelta(days=retention_days)
+
+    def prune(
+            self, cutoff, batch_size=None, bucket=None, archive_file=None):
+        """Delete entries added before cutoff, oldest first, one time
+        bucket at a time and at most batch_size rows per statement.  If
+        archive_file is given, each batch is written to it as JSON lines
+        before being deleted.  Returns the number of entries removed."""
+        if batch_size is None:
+            batch_size = self.DEFAULT_PRUNE_BATCH_SIZE
+        if bucket is None:
+            bucket = self.DEFAULT_PRUNE_BUCKET
+        expired_entries = self.filter(datetime_added__lt=cutoff)
+        removed_count = 0
+        while True:
+            # Start each bucket at the oldest remaining entry, so that
+            # gaps in the log don't cost a query per empty bucket.
+            bucket_start = expired_entries.order_by('datetime_added')\
+                .values_list('datetime_added', flat=True)\
+                .first()
+            if bucket_start is None:
+                break
+            bucket_entries = expired_entries.filter(
+                datetime_added__lt=min(bucket_start + bucket, cutoff))
+            while True:
+                batch_ids = list(
+                    bucket_entries.order_by('id')
+                    .values_list('id', flat=True)[:batch_size])
+                if not batch_ids:
+                    break
+                batch = self.filter(id__in=batch_ids)
+                if archive_file is not None:
+                    self._archive(batch, archive_file)
+                batch.delete()
+                removed_count += len(batch_ids)
+        return removed_count
+
+    def _archive(self, batch, archive_file):
+        rows = list(batch.values())
+        # Archive deduplicated payloads in full, since the LogPayload rows
+        # may be pruned along with the entries.
+        digests = {
+            row[field_name] for row in rows
+            for field_name in (
+                'request_payload_digest', 'response_payload_digest')
+            if row[field_name] is not None}
+        log_payload_model = self.model._meta.apps.get_model(
+            'pronym_api', 'LogPayload')
+        payloads = dict(
+            log_payload_model.objects.filter(digest__in=digests)
+            .values_list('digest', 'content')) if digests else {}
+        for row in rows:
+            for prefix in ('request', 'response'):
+                digest = row[prefix + '_payload_digest']
+                if digest is not None:
+                    row[prefix + '_payload'] = payloads.get(digest)
+            archive_file.write(dumps(row, cls=DjangoJSONEncoder) + '\n')
+
+
 class LogEntry(models.Model):
-    datetime_added = models.DateTimeField(default=now)
+    datetime_added = models.DateTimeField(default=now, db_index=True)
     endpoint_name = models.CharField(max_length=255)
     source_ip = models.CharField(max_length=255)
     path = models.CharField(max_length=255)
@@ -16,10 +90,53 @@ class LogEntry(models.Model):
         related_name='log_entries',
         on_delete=models.CASCADE)
     request_method = models.CharField(max_length=255)
+    # A JSON object mapping request.META header names to values.
     request_headers = models.TextField()
     request_payload = models.TextField()
     response_payload = models.TextField()
-    status_code = models.PositiveIntegerField()
+    # When payloads are deduplicated, they are stored as LogPayload rows
+    # and referred to by digest, and the payload fields above are empty.
+    request_payload_digest = models.CharField(
+        max_length=64, null=True, db_index=True)
+    response_payload_digest = models.CharField(
+        max_length=64, null=True, db_index=True)
+    status_code = models.PositiveIntegerField(db_index=True)
+    # The fraction of similar requests that were logged when this one was,
+    # so that counts can be extrapolated from sampled entries.
+    sample_rate = models.FloatField(default=1)
+    # How long the request took to handle, in seconds, in total and in each
+    # phase of ApiView.dispatch.  Phases that weren't reached are null.
+    duration = models.FloatField(null=True)
+    authentication_duration = models.FloatField(null=True)
+    validation_duration = models.FloatField(null=True)
+    processing_duration = models.FloatField(null=True)
+    serialization_duration = models.FloatField(null=True)
+    request_bytes = models.PositiveIntegerField(null=True)
+    response_bytes = models.PositiveIntegerField(null=True)
+
+    objects = LogEntryManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['endpoint_name', 'datetime_added']),
+        ]
+
+    def get_request_payload(self):
+        return self._get_payload(
+            self.request_payload, self.request_payload_digest)
+
+    def get_response_payload(self):
+        return self._get_payload(
+            self.response_payload, self.response_payload_digest)
+
+    def _get_payload(self, payload, digest):
+        if digest is None:
+            return payload
+        log_payload_model = self._meta.apps.get_model(
+            'pronym_api', 'LogPayload')
+        return log_payload_model.objects.filter(digest=digest)\
+            .values_list('content', flat=True)\
+            .first()
 
     def __str__(self):  # pragma: no cover
         return "[{0}] {1} {2} -> {3}".format(
@@ -0,0 +1,75 @@
+from datetime import timedelta
+from hashlib import sha256
+
+from django.db import models
+from django.db.models import Exists, OuterRef
+from django.utils.timezone import now
+
+
+class LogPayloadManager(models.Manager):
+    DEFAULT_PRUNE_BATCH_SIZE = 1000
+    # Payloads stored (or stored again) within this long are never
+    # pruned, whatever the cutoff.  It must outlast both the time an
+    # entry can wait in a batched log writer's queue and the time a
+    # PayloadStore trusts a digest without storing its payload again.
+    PRUNE_GRACE = timedelta(hours=2)
+
+    def prune_unreferenced(self, cutoff, batch_size=None):
+        """Delete payloads last stored before cutoff that no log entry
+        refers to any more.  Payloads stored since the cutoff (or within
+        PRUNE_GRACE) are kept even when unreferenced, since the entries
+        referring to them may not have been saved yet.  Returns the
+        number of payloads removed."""
+        if batch_size is None:
+            batch_size = self.DEFAULT_PRUNE_BATCH_SIZE
+        cutoff = min(cutoff, now() - self.PRUNE_GRACE)
+        log_entry_model = self.model._meta.apps.get_model(
+            'pronym_api', 'LogEntry')
+        unreferenced = self.filter(datetime_added__lt=cutoff).annotate(
+            has_request_reference=Exists(log_entry_model.objects.filter(
+                request_payload_digest=OuterRef('digest'))),
+            has_response_reference=Exists(log_entry_model.objects.filter(
+                response_payload_digest=OuterRef('digest')))
+        ).filter(has_request_reference=False, has_response_reference=False)
+        removed_count = 0
+        while True:
+            batch_digests = list(
+                unreferenced.order_by('digest')
+                .values_list('digest', flat=True)[:batch_size])
+            if not batch_digests:
+                break
+            # Skip any that were stored again since they were selected.
+            self.filter(
+                digest__in=batch_digests, datetime_added__lt=cutoff
+            ).delete()
+            removed_count += len(batch_digests)
+        return removed_count
+
+    def store(self, content):
+        """Save content if it isn't stored already, and return its
+        digest.  If it is, its datetime_added is brought up to date, so
+        that prune_unreferenced keeps it until the entries about to refer
+        to it have been saved."""
+        digest = self.model.get_digest(content)
+        if not self.filter(digest=digest).update(datetime_added=now()):
+            self.bulk_create(
+                [self.model(digest=digest, content=content)],
+                ignore_conflicts=True)
+        return digest
+
+
+class LogPayload(models.Model):
+    """A redacted request or response payload, stored once however many
+    log entries refer to it (by its SHA-256 digest)."""
+    digest = models.CharField(max_length=64, unique=True)
+    content = models.TextField()
+    datetime_added = models.DateTimeField(default=now, db_index=True)
+
+    objects = LogPayloadManager()
+
+    @staticmethod
+    def get_digest(content):
+        return sha256(content.encode()).hexdigest()
+
+    def __str__(self):  # pragma: no cover
+        return self.digest
@@ -0,0 +1,32 @@
+from django.db import models
+from django.utils.timezone import now
+
+
+class RevokedTokenManager(models.Manager):
+    def clear_expired(self):
+        return self.filter(datetime_expires__lt=now()).delete()[0]
+
+    def revoke_entries(self, entries):
+        return self.bulk_create([
+            self.model(
+                token_entropy=entry.token_entropy,
+                datetime_expires=entry.get_expiration_date())
+            for entry in entries
+        ])
+
+
+class RevokedToken(models.Model):
+    """A record of a whitelist entry removed before its token expired.
+    Stateless authentication can't see that the entry is gone, so it
+    checks tokens against these instead (see pronym_api.token_revocation).
+    Rows are only needed until the token would have expired anyway."""
+    datetime_added = models.DateTimeField(default=now, db_index=True)
+    datetime_expires = models.DateTimeField(db_index=True)
+    token_entropy = models.BigIntegerField()
+
+    objects = RevokedTokenManager()
+
+    def __str__(self):  # pragma: no cover
+        return "{0} (expires {1})".format(
+            self.token_entropy,
+            self.datetime_expires)
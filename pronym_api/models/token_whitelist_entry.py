@@ -1,37 +1,156 @@
-import random
+import secrets
 
 from datetime import timedelta
+from time import sleep
 
 from django.conf import settings
-from django.db import models
-from django.db.models.signals import pre_save
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, models, transaction
+from django.db.models.signals import post_delete, pre_save
 from django.dispatch import receiver
 from django.utils.timezone import now
 
 import jwt
 
+from pronym_api.token_cache import get_token_cache
+from pronym_api.token_revocation import (
+    get_revocation_set, is_revocation_tracking_enabled)
+
+from .revoked_token import RevokedToken
+
 
 class TokenWhitelistEntryManager(models.Manager):
-    def clear_expired_tokens(self):
+    DEFAULT_SWEEP_BATCH_SIZE = 1000
+
+    def clear_expired_tokens(self, batch_size=None, pause=0):
+        """Delete expired entries in primary-key-ordered batches of
+        batch_size, sleeping for pause seconds between batches so that
+        no single statement holds a long lock.  Returns the number of
+        entries removed."""
+        if batch_size is None:
+            batch_size = self.DEFAULT_SWEEP_BATCH_SIZE
         expiration_cutoff = self.model.get_expiration_cutoff()
-        self.filter(datetime_added__lt=expiration_cutoff).delete()
+        removed_count = 0
+        last_id = 0
+        while True:
+            batch_ids = list(
+                self.filter(
+                    id__gt=last_id,
+                    datetime_added__lt=expiration_cutoff)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size])
+            if not batch_ids:
+                break
+            self.filter(id__in=batch_ids).delete()
+            removed_count += len(batch_ids)
+            last_id = batch_ids[-1]
+            if len(batch_ids) < batch_size:
+                break
+            if pause:
+                sleep(pause)
+        RevokedToken.objects.clear_expired()
+        token_cache = get_token_cache()
+        if token_cache is not None:
+            token_cache.invalidate_expired()
+        return removed_count
 
     def clear_tokens_for_account(self, account):
         TokenWhitelistEntry.objects.filter(
             api_account_member__api_account=account).delete()
+        token_cache = get_token_cache()
+        if token_cache is not None:
+            token_cache.invalidate_account(account.id)
 
     def clear_tokens_for_account_member(self, account_member):
         TokenWhitelistEntry.objects.filter(
             api_account_member=account_member).delete()
+        token_cache = get_token_cache()
+        if token_cache is not None:
+            token_cache.invalidate_account_member(account_member)
 
     def create_for_account_member(self, account_member):
-        entry = TokenWhitelistEntry.objects.create(
-            api_account_member=account_member)
+        # Token entropy is drawn from a 63-bit space, so a collision is
+        # vanishingly rare; rather than checking for one up front, we let
+        # the unique constraint catch it and try again with a new value.
+        for attempt in range(self.model.MAX_ENTROPY_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    return TokenWhitelistEntry.objects.create(
+                        api_account_member=account_member)
+            except IntegrityError:
+                if attempt == self.model.MAX_ENTROPY_ATTEMPTS - 1:
+                    raise
+
+    def issue_for_account_member(self, account_member):
+        """Return a whitelist entry for a member requesting a token,
+        following the configured issuance policy:
+
+        TOKEN_REUSE_MINUTES_REMAINING: if set, the member's newest entry is
+        handed out again as long as it has more than this many minutes
+        of life left, rather than inserting a new one.
+        TOKEN_MAX_ENTRIES_PER_MEMBER: if set, issuing a new entry evicts
+        the member's oldest entries beyond this many."""
+        reuse_minutes = getattr(
+            settings, 'TOKEN_REUSE_MINUTES_REMAINING', None)
+        if reuse_minutes is not None:
+            reuse_cutoff = self.model.get_expiration_cutoff() + timedelta(
+                minutes=reuse_minutes)
+            entry = self.select_related('api_account_member').filter(
+                api_account_member=account_member,
+                datetime_added__gt=reuse_cutoff
+            ).order_by('-datetime_added').first()
+            if entry is not None:
+                return entry
+        max_entries = getattr(settings, 'TOKEN_MAX_ENTRIES_PER_MEMBER', None)
+        if max_entries is not None and max_entries < 1:
+            raise ImproperlyConfigured(
+                'TOKEN_MAX_ENTRIES_PER_MEMBER must be at least 1.')
+        entry = self.create_for_account_member(account_member)
+        if max_entries is not None:
+            # The new entry always counts as one of the entries kept.
+            evicted_ids = list(
+                self.filter(api_account_member=account_member)
+                .exclude(id=entry.id)
+                .order_by('-datetime_added', '-id')
+                .values_list('id', flat=True)[max_entries - 1:])
+            if evicted_ids:
+                self.filter(id__in=evicted_ids).delete()
         return entry
 
     def get_account_member_for_token(self, token):
+        entry = self.get_entry_for_token(token)
+        if entry is None:
+            return None
+        return entry.api_account_member
+
+    def get_account_member_for_token_stateless(self, token):
+        """Resolve a token's member from its claims alone, without
+        consulting the whitelist.  The token's signature and expiry are
+        still checked, as is the in-memory set of revoked tokens.
+
+        The member is returned with only its id and account id loaded;
+        other fields are fetched from the database on first access."""
+        payload = self.decode_token(token)
+        if payload is None:
+            return None
+        member_id = payload.get('mid')
+        account_id = payload.get('aid')
+        if member_id is None or account_id is None:
+            # Tokens issued before the member and account claims were
+            # added.
+            return None
+        if payload['sub'] != settings.JWT_SUB:
+            return None
+        if get_revocation_set().is_revoked(payload['jti']):
+            return None
+        account_member_model = self.model._meta.get_field(
+            'api_account_member').related_model
+        return account_member_model.from_db(
+            self.db, ['id', 'api_account_id'], [member_id, account_id])
+
+    def decode_token(self, token):
         try:
-            payload = jwt.decode(
+            return jwt.decode(
                 token,
                 settings.API_SECRET,
                 algorithms=['HS256'],
@@ -39,19 +158,49 @@ class TokenWhitelistEntryManager(models.Manager):
                 issuer=settings.JWT_ISS)
         except jwt.exceptions.InvalidTokenError:
             return None
-        entry_id = payload['jti']
-        try:
-            entry = self.get(token_entropy=entry_id)
-        except self.model.DoesNotExist:
+
+    def get_entry_for_token(self, token):
+        payload = self.decode_token(token)
+        if payload is None:
             return None
+        entry_id = payload['jti']
+        account_id = payload.get('aid')
+        token_cache = get_token_cache()
+        entry = None
+        generation = None
+        if token_cache is not None:
+            entry = token_cache.get(entry_id)
+            if entry is None and account_id is not None:
+                # Read before the entry, so that a revocation between the
+                # two leaves what we cache already stale.
+                generation = token_cache.get_generation(account_id)
+        if entry is None:
+            try:
+                # Load the member, its user and its account alongside the
+                # entry, and reject inactive accounts, all in one query.
+                entry = self.select_related(
+                    'api_account_member__user',
+                    'api_account_member__api_account'
+                ).get(
+                    token_entropy=entry_id,
+                    api_account_member__api_account__is_active=True)
+            except self.model.DoesNotExist:
+                return None
+            if (generation is not None and not entry.is_expired() and
+                    entry.api_account_member.api_account_id == account_id):
+                token_cache.set(entry, generation)
         if not entry.validate(payload):
             return None
-        return entry.api_account_member
+        return entry
 
 
 class TokenWhitelistEntry(models.Model):
-    datetime_added = models.DateTimeField(default=now)
-    token_entropy = models.PositiveIntegerField(null=True, unique=True)
+    # Entropy values are positive and fit in a signed 64-bit column.
+    ENTROPY_BITS = 63
+    MAX_ENTROPY_ATTEMPTS = 5
+
+    datetime_added = models.DateTimeField(default=now, db_index=True)
+    token_entropy = models.BigIntegerField(null=True, unique=True)
     api_account_member = models.ForeignKey(
         'ApiAccountMember',
         related_name='token_whitelist_entries',
@@ -59,6 +208,10 @@ class TokenWhitelistEntry(models.Model):
 
     objects = TokenWhitelistEntryManager()
 
+    @classmethod
+    def generate_token_entropy(cls):
+        return secrets.randbits(cls.ENTROPY_BITS) or 1
+
     @staticmethod
     def get_expiration_cutoff():
         expiration_window = timedelta(
@@ -71,6 +224,8 @@ class TokenWhitelistEntry(models.Model):
             'exp': self.get_expiration_date().timestamp(),
             'iat': self.datetime_added.timestamp(),
             'jti': self.token_entropy,
+            'mid': self.api_account_member_id,
+            'aid': self.api_account_member.api_account_id,
             'sub': settings.JWT_SUB,
             'aud': settings.JWT_AUD,
             'nbf': self.datetime_added.timestamp(),
@@ -103,11 +258,13 @@ class TokenWhitelistEntry(models.Model):
 @receiver(pre_save, sender=TokenWhitelistEntry)
 def pre_save_token(sender, instance, **kwargs):
     if instance.token_entropy is None:
-        # Generate a unique int.
-        while True:
-            candidate = random.randint(1, 100000000)
-            try:
-                sender.objects.get(token_entropy=candidate)
-            except sender.DoesNotExist:
-                break
-        instance.token_entropy = candidate
+        instance.token_entropy = sender.generate_token_entropy()
+
+
+@receiver(post_delete, sender=TokenWhitelistEntry)
+def post_delete_token(sender, instance, **kwargs):
+    if is_revocation_tracking_enabled() and not instance.is_expired():
+        RevokedToken.objects.revoke_entries([instance])
+    token_cache = get_token_cache()
+    if token_cache is not None:
+        token_cache.invalidate_entry(instance)
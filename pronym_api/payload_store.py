@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+
+from pronym_api.models import LogPayload
+
+
+class PayloadStore:
+    """Stores logged payloads in the LogPayload table, remembering the
+    digests of the last max_size payloads it stored so that repeats of
+    them don't cost a query.  A digest is only trusted for max_age
+    seconds, which keeps the store from referring to a payload that
+    prune_api_logs has since removed."""
+
+    # Payloads no longer than a digest aren't worth deduplicating.
+    MIN_LENGTH = 64
+
+    def __init__(self, max_size, max_age=3600):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._digests = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._digests)
+
+    def clear(self):
+        with self._lock:
+            self._digests.clear()
+
+    def get_stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._digests),
+            'max_size': self.max_size
+        }
+
+    def store(self, content):
+        """Return the digest content is stored under, or None if content
+        is too short to be worth storing separately."""
+        if len(content) <= self.MIN_LENGTH:
+            return None
+        digest = LogPayload.get_digest(content)
+        current_time = monotonic()
+        with self._lock:
+            stored = self._digests.get(digest)
+            if stored is not None and current_time - stored < self.max_age:
+                self._digests.move_to_end(digest)
+                self.hits += 1
+                return digest
+            self.misses += 1
+        LogPayload.objects.store(content)
+        with self._lock:
+            self._digests[digest] = current_time
+            self._digests.move_to_end(digest)
+            while len(self._digests) > self.max_size:
+                self._digests.popitem(last=False)
+        return digest
+
+
+_payload_store = None
+
+
+def get_payload_store():
+    """Return this process's payload store, which remembers up to
+    API_LOG_PAYLOAD_CACHE_SIZE (1000 by default) recently stored
+    digests."""
+    global _payload_store
+    max_size = getattr(settings, 'API_LOG_PAYLOAD_CACHE_SIZE', 1000)
+    if _payload_store is None or _payload_store.max_size != max_size:
+        _payload_store = PayloadStore(max_size)
+    return _payload_store
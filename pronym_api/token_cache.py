@@ -0,0 +1,243 @@
+from collections import OrderedDict
+from threading import Lock
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+from django.utils.timezone import now
+
+
+class LocalTokenCache:
+    """A bounded, per-process LRU cache mapping token entropy (the JWT's
+    jti claim) to its whitelist entry, with the entry's account member
+    already loaded.  Entries are held until the token expires, or until
+    they are invalidated because the whitelist entry, the member or the
+    account's tokens were removed.
+
+    Every invalidation bumps a single generation counter, so that an
+    entry read from the database before an invalidation, but stored
+    after it, is dropped rather than cached."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, token_entropy):
+        with self._lock:
+            entry = self._entries.get(token_entropy)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.is_expired():
+                del self._entries[token_entropy]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token_entropy)
+            self.hits += 1
+            return entry
+
+    def get_generation(self, account_id):
+        return self._generation
+
+    def get_stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'max_size': self.max_size
+        }
+
+    def invalidate_account(self, account_id):
+        self._invalidate(
+            lambda entry:
+                entry.api_account_member.api_account_id == account_id)
+
+    def invalidate_account_member(self, account_member):
+        self._invalidate(
+            lambda entry: entry.api_account_member_id == account_member.id)
+
+    def invalidate_expired(self):
+        self._invalidate(lambda entry: entry.is_expired())
+
+    def invalidate_entry(self, entry):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(entry.token_entropy, None)
+
+    def set(self, entry, generation):
+        """Cache entry, as long as nothing has been invalidated since
+        generation was read (before the entry was)."""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[entry.token_entropy] = entry
+            self._entries.move_to_end(entry.token_entropy)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _invalidate(self, predicate):
+        with self._lock:
+            self._generation += 1
+            stale_keys = [
+                token_entropy
+                for token_entropy, entry in self._entries.items()
+                if predicate(entry)
+            ]
+            for token_entropy in stale_keys:
+                del self._entries[token_entropy]
+
+
+class SharedTokenCache:
+    """A token cache stored in one of Django's configured caches, so that
+    every worker and node sees the same entries and revocations.
+
+    Only the entry's own fields and its member's, user's and account's
+    ids are stored, rather than pickled model instances.  A hit returns
+    an entry whose member, user and account are built from those ids:
+    reaching them costs no queries, but their other fields are fetched
+    from the database on first access.
+
+    Each cached entry is stored alongside the generation of its account,
+    read before the entry was loaded from the database.  Revoking an
+    account's tokens (or one of its members' tokens) only has to bump
+    that generation: any entry stored under an older generation is
+    treated as a miss.  Deleting a single entry marks its token as
+    revoked until it expires, so that an entry loaded before the delete
+    but stored after it is treated as a miss too."""
+
+    ENTRY_KEY = 'pronym_api:token:{0}'
+    GENERATION_KEY = 'pronym_api:token-generation:{0}'
+    REVOKED_KEY = 'pronym_api:token-revoked:{0}'
+
+    def __init__(self, cache_alias):
+        self.cache_alias = cache_alias
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get(self, token_entropy):
+        entry_key = self.ENTRY_KEY.format(token_entropy)
+        revoked_key = self.REVOKED_KEY.format(token_entropy)
+        cached_values = self.cache.get_many([entry_key, revoked_key])
+        cached = cached_values.get(entry_key)
+        if cached is not None and revoked_key not in cached_values:
+            generation, entry_id, datetime_added, member_id, account_id, \
+                user_id = cached
+            if generation == self.get_generation(account_id):
+                self.hits += 1
+                return self._load_entry(
+                    entry_id, token_entropy, datetime_added, member_id,
+                    account_id, user_id)
+        self.misses += 1
+        return None
+
+    def get_generation(self, account_id):
+        return self.cache.get(self.GENERATION_KEY.format(account_id), 0)
+
+    def get_stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def invalidate_account(self, account_id):
+        key = self.GENERATION_KEY.format(account_id)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            # No generation stored yet (or it was evicted).
+            self.cache.set(key, self.get_generation(account_id) + 1, None)
+
+    def invalidate_account_member(self, account_member):
+        self.invalidate_account(account_member.api_account_id)
+
+    def invalidate_expired(self):
+        # Entries are stored with a timeout matching their token's
+        # expiration, so the cache backend drops them on its own.
+        pass
+
+    def invalidate_entry(self, entry):
+        timeout = (entry.get_expiration_date() - now()).total_seconds()
+        if timeout > 0:
+            self.cache.set(
+                self.REVOKED_KEY.format(entry.token_entropy), True, timeout)
+        self.cache.delete(self.ENTRY_KEY.format(entry.token_entropy))
+
+    def set(self, entry, generation):
+        """Cache entry under generation, which must have been read before
+        the entry was loaded, so that a revocation in between leaves the
+        cached entry already stale."""
+        timeout = (entry.get_expiration_date() - now()).total_seconds()
+        self.cache.set(
+            self.ENTRY_KEY.format(entry.token_entropy),
+            (
+                generation, entry.id, entry.datetime_added,
+                entry.api_account_member_id,
+                entry.api_account_member.api_account_id,
+                entry.api_account_member.user_id
+            ),
+            timeout)
+
+    def _load_entry(
+            self, entry_id, token_entropy, datetime_added, member_id,
+            account_id, user_id):
+        entry_model = apps.get_model('pronym_api', 'TokenWhitelistEntry')
+        member_model = apps.get_model('pronym_api', 'ApiAccountMember')
+        account_model = apps.get_model('pronym_api', 'ApiAccount')
+        user_model = member_model._meta.get_field('user').related_model
+        entry = entry_model.from_db(
+            router.db_for_read(entry_model),
+            [
+                'id', 'datetime_added', 'token_entropy',
+                'api_account_member_id'
+            ],
+            [entry_id, datetime_added, token_entropy, member_id])
+        member = entry.api_account_member = member_model.from_db(
+            router.db_for_read(member_model),
+            ['id', 'api_account_id', 'user_id'],
+            [member_id, account_id, user_id])
+        member.api_account = account_model.from_db(
+            router.db_for_read(account_model), ['id'], [account_id])
+        member.user = user_model.from_db(
+            router.db_for_read(user_model), ['id'], [user_id])
+        return entry
+
+
+_token_cache = None
+
+
+def get_token_cache():
+    """Return the configured token cache, or None if caching is disabled.
+
+    Setting TOKEN_CACHE_ALIAS to the name of a Django cache selects the
+    shared cache; otherwise a positive TOKEN_CACHE_SIZE selects the
+    per-process LRU cache."""
+    global _token_cache
+    cache_alias = getattr(settings, 'TOKEN_CACHE_ALIAS', None)
+    max_size = getattr(settings, 'TOKEN_CACHE_SIZE', 0)
+    if cache_alias:
+        if not (isinstance(_token_cache, SharedTokenCache) and
+                _token_cache.cache_alias == cache_alias):
+            _token_cache = SharedTokenCache(cache_alias)
+    elif max_size:
+        if not (isinstance(_token_cache, LocalTokenCache) and
+                _token_cache.max_size == max_size):
+            _token_cache = LocalTokenCache(max_size)
+    else:
+        return None
+    return _token_cache
@@ -0,0 +1,113 @@
+from array import array
+from bisect import bisect_left
+from datetime import timedelta
+from threading import Lock
+from time import monotonic
+
+from django.apps import apps
+from django.conf import settings
+from django.utils.timezone import now
+
+
+class TokenRevocationSet:
+    """An in-memory, sorted array of revoked token entropy values, used by
+    stateless authentication in place of a whitelist query.
+
+    The array is refreshed from the RevokedToken table at most every
+    refresh_interval seconds, fetching only rows added since the previous
+    refresh began, less an overlap of REFRESH_OVERLAP.  Ids and
+    timestamps are assigned before a row's transaction commits, so a
+    revocation may become visible after rows added later than it; the
+    overlap picks those up, as long as no revoking transaction stays open
+    for longer than it.  Since a revocation only matters until its token
+    expires, the array is rebuilt from scratch once per token lifetime to
+    drop revocations that no longer matter."""
+
+    REFRESH_OVERLAP = timedelta(minutes=1)
+
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._revoked = array('q')
+        self._refreshed_from = None
+        self._last_refresh = None
+        self._last_rebuild = None
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def is_revoked(self, token_entropy):
+        if not isinstance(token_entropy, int):
+            # We only ever issue integer entropy values.
+            return True
+        self.refresh_if_stale()
+        revoked = self._revoked
+        index = bisect_left(revoked, token_entropy)
+        return index < len(revoked) and revoked[index] == token_entropy
+
+    def rebuild(self):
+        started = now()
+        rows = self._get_queryset().filter(datetime_expires__gte=started)
+        with self._lock:
+            self._revoked = array('q')
+            self._merge(rows)
+            self._refreshed_from = started - self.REFRESH_OVERLAP
+            self._last_rebuild = self._last_refresh = monotonic()
+
+    def refresh(self):
+        started = now()
+        with self._lock:
+            self._merge(self._get_queryset().filter(
+                datetime_added__gte=self._refreshed_from))
+            self._refreshed_from = started - self.REFRESH_OVERLAP
+            self._last_refresh = monotonic()
+
+    def refresh_if_stale(self):
+        current_time = monotonic()
+        rebuild_interval = settings.TOKEN_EXPIRATION_MINUTES * 60
+        if (self._last_rebuild is None or
+                current_time - self._last_rebuild >= rebuild_interval):
+            self.rebuild()
+        elif current_time - self._last_refresh >= self.refresh_interval:
+            self.refresh()
+
+    def _get_queryset(self):
+        revoked_token_model = apps.get_model('pronym_api', 'RevokedToken')
+        return revoked_token_model.objects.values_list(
+            'token_entropy', flat=True)
+
+    def _merge(self, token_entropies):
+        # Rows in the overlap have usually been seen before.
+        new_values = set(token_entropies).difference(self._revoked)
+        if new_values:
+            new_values.update(self._revoked)
+            self._revoked = array('q', sorted(new_values))
+
+
+def is_revocation_tracking_enabled():
+    """Should whitelist entries removed before they expire be recorded as
+    RevokedToken rows?  Stateless authentication needs them, and is only
+    used while they are, but they cost a write per removed entry, so
+    they're only recorded if TOKEN_REVOCATION_TRACKING is set, or (if
+    that isn't set) STATELESS_TOKEN_AUTHENTICATION is."""
+    tracking = getattr(settings, 'TOKEN_REVOCATION_TRACKING', None)
+    if tracking is None:
+        return getattr(settings, 'STATELESS_TOKEN_AUTHENTICATION', False)
+    return tracking
+
+
+_revocation_set = None
+
+
+def get_revocation_set():
+    """Return this process's revocation set.  It is refreshed at most
+    every TOKEN_REVOCATION_REFRESH_SECONDS (5 by default), which bounds
+    how long a revoked token may still be accepted by stateless
+    authentication."""
+    global _revocation_set
+    refresh_interval = getattr(
+        settings, 'TOKEN_REVOCATION_REFRESH_SECONDS', 5)
+    if (_revocation_set is None or
+            _revocation_set.refresh_interval != refresh_interval):
+        _revocation_set = TokenRevocationSet(refresh_interval)
+    return _revocation_set
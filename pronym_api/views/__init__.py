@@ -1,4 +1,5 @@
 from .api_view import ApiView
+from .async_api_view import AsyncApiView
 
 
-__all__ = ['ApiView']
+__all__ = ['ApiView', 'AsyncApiView']
@@ -1,15 +1,27 @@
-from json import JSONDecodeError, dumps, loads
-
-from django.http import HttpResponse, JsonResponse
+from hashlib import sha256
+from json import JSONDecodeError
+from math import ceil
+from random import random
+from time import monotonic, time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.views import View
 
+from pronym_api.log_writer import get_log_writer
+from pronym_api.metrics import get_metrics_accumulator
 from pronym_api.models import LogEntry, TokenWhitelistEntry
+from pronym_api.payload_store import get_payload_store
+from pronym_api.token_revocation import is_revocation_tracking_enabled
 
-from .processor import NullProcessor
-from .serializer import NullSerializer
-from .validator import NullValidator
+from .codec import get_json_codec
+from .method_handler import NULL_METHOD_HANDLER, compile_method_handlers
+from .rate_limit import RateLimit
+from .redaction import get_redaction_plan
+from .streaming import StreamRecorder
 
 
 class ApiValidationError(Exception):
@@ -26,15 +38,18 @@ class ApiView(View):
 
     1) Check to see if request method is allowed.  If not, send 405.
     2) Check to see if user is authorized.  If not, send 401.
-    3) Extra raw request data:
+    3) Check to see if the caller is within its rate limits (see RateLimit).
+    If not, send 429, without logging the request or counting it against
+    any of the limits.
+    4) Extra raw request data:
     For requests with a body (e.g. POST, PUT, PATCH, etc. requests), the body
     is deserialized as JSON.  For GET requests, the query string will be
     converted into a dictionary and fed into the validator.
 
-    4) Raw request data is fed into the VALIDATOR, which will either trigger
+    5) Raw request data is fed into the VALIDATOR, which will either trigger
     validation errors and send a 400 response.  If validation is successful,
     we now have the cleaned data.
-    5) The validated validator is then passed to the PROCESSOR, which will do
+    6) The validated validator is then passed to the PROCESSOR, which will do
     something (or not) with the data and generate a PROCESSING ARTIFACT.
     Things that might be done by the processor:
 
@@ -43,10 +58,15 @@ class ApiView(View):
     - In the case of a POST query, use the validated data to create a new
     record in the database and return the new object as the processing artifact
 
-    6) The validator and processing artifact are then passed to the SERIALIZER,
+    A processor may also raise ApiValidationError, which sends a 400 like a
+    validation error.
+
+    7) The validator and processing artifact are then passed to the SERIALIZER,
     which will determine the final response sent in the request.
-    7) The serialized data is then encoded to JSON and sent back in the
-    successful response."""
+    8) The serialized data is then encoded to JSON and sent back in the
+    successful response.  Streaming serializers instead send their output
+    as it is produced, and the request is logged once the server closes
+    the response."""
 
     # This is a dictionary mapping request methods (all caps) with
     # the validators, processors, and serializers associated with them.
@@ -70,28 +90,133 @@ class ApiView(View):
     # }
     #
     # PUT or DELETE requests to this endpoint will receive a 405 error.
+    #
+    # Each subclass's methods are checked and compiled into
+    # method_handlers when the class is created, and methods passed to
+    # as_view when the view is created.  Replacing methods afterwards is
+    # noticed (and recompiled) on the next request, but changes made to
+    # the dictionary in place are not.
     methods = {}
+    method_handlers = MappingProxyType({})
+    allowed_methods_header = ''
+    # The methods dictionary that method_handlers was compiled from.
+    _compiled_methods = None
     # This string will replace fields marked as redacted in logging.
     REDACTED_STRING = "******"
+    # Streamed responses are logged as a summary, with a prefix of up to
+    # max_logged_response_bytes (or if that isn't set, this many) bytes if
+    # no response fields are redacted.
+    DEFAULT_STREAM_LOG_PREFIX_BYTES = 1024
     # Should this endpoint check authentication?
     require_authentication = True
-    # Which headers should not be logged?  By default, don't log the
-    # auth header.
+    # Should tokens be verified by their signature, expiry and the
+    # in-memory revocation set alone, without querying the whitelist?
+    # Leave as None to use the STATELESS_TOKEN_AUTHENTICATION setting.
+    # Ignored unless revoked tokens are being tracked (see
+    # TOKEN_REVOCATION_TRACKING).
+    stateless_authentication = None
+    # How often may each caller (API account, or source IP for
+    # unauthenticated requests) hit this endpoint?  For example,
+    # RateLimit(100, 60) allows 100 requests in any minute.  A limit on
+    # each account's requests across all endpoints can be set with the
+    # API_ACCOUNT_RATE_LIMIT setting, as a (requests, seconds) pair.
+    rate_limit = None
+    # Which headers should be logged?  Names are request.META keys, in
+    # lower case (e.g. 'http_user_agent').  If this is None, every HTTP
+    # header is logged (but none of the other server and WSGI variables
+    # in request.META), except those listed in unlogged_headers.
+    logged_headers = None
+    unlogged_headers = []
+    # Which headers should have their values scrubbed?  By default, don't
+    # log the auth header.
     redacted_headers = ['http_authorization']
     # Which fields should we scrub from the request data for logging?
+    # Nested fields can be given as dotted paths, with * matching every
+    # key or list item, e.g. 'items.*.card.number'.
     redacted_request_payload_fields = []
     # Which fields should we scrub from the response data for logging?
     redacted_response_payload_fields = []
+    # Should each request be written to the LogEntry table?  Endpoints that
+    # only need aggregate numbers can turn this off and use record_metrics.
+    log_requests = True
+    # Should per-minute request counts, latency and bytes be accumulated
+    # into EndpointMetric rows?  Leave as None to use the
+    # API_RECORD_METRICS setting.
+    record_metrics = None
+    # Request and response bodies larger than this many bytes are logged
+    # as a summary: their length, SHA-256 digest and (if no fields are
+    # redacted) a prefix of this many bytes.  Leave as None to use the
+    # API_LOG_MAX_PAYLOAD_BYTES setting; if that's unset too, bodies of
+    # any size are logged in full.
+    max_logged_request_bytes = None
+    max_logged_response_bytes = None
+    # What fraction of responses in each status class should be logged?
+    # For example, {'2xx': 0.1} logs one in ten successful responses.
+    # Status classes that aren't listed are always logged.
+    log_sample_rates = {}
+    # Requests with these methods are always logged, whatever the status.
+    always_log_methods = ['POST', 'PUT', 'PATCH', 'DELETE']
+    # Sample rates for particular API accounts, keyed by account id, which
+    # take precedence over log_sample_rates.  For example,
+    # {12: {'2xx': 1}} logs every successful response for account 12.
+    account_log_sample_rates = {}
+    # Should logged payloads be stored once per distinct payload, in the
+    # LogPayload table, and referred to from LogEntry by digest?  This
+    # saves space for endpoints that see many identical requests or
+    # responses.  Leave as None to use the API_LOG_DEDUPLICATE_PAYLOADS
+    # setting.
+    deduplicate_logged_payloads = None
+    # How should request and response bodies (and logged payloads) be
+    # encoded and decoded?  Either 'stdlib', 'orjson' or the dotted path of
+    # a codec class (see pronym_api.views.codec).  Leave as None to use the
+    # API_JSON_CODEC setting; if that's unset too, orjson is used when it
+    # is installed (which encodes NaN and infinite floats as null; see
+    # OrjsonJsonCodec).
+    json_codec = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, value in cls.compile_methods(cls.methods).items():
+            setattr(cls, name, value)
 
     def __init__(self, *args, **kwargs):
         View.__init__(self, *args, **kwargs)
         self.authenticated_account_member = None
+        self.authenticated_whitelist_entry = None
+        # The MethodHandler for the request's method, if it is allowed.
+        self.method_handler = None
+        self.rate_limit_retry_after = 0
+        # The data encoded into the response, kept so that logging can
+        # redact it without decoding the response again.
+        self.response_data = None
+        # How long the request took to handle, in total and per phase.
+        self.duration = None
+        self.phase_durations = {}
+        # For streamed responses, the serializer and a summary of what
+        # has been sent so far.
+        self.streaming_serializer = None
+        self.stream_recorder = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        if 'methods' in initkwargs:
+            # Compile these methods once, rather than on every request,
+            # and give the handlers to each instance along with them.
+            initkwargs.update(cls.compile_methods(initkwargs['methods']))
+        return super().as_view(**initkwargs)
 
     def check_authentication(self):
         """Checks JWT authentication of user from authorization
         header.  Also populates self.authenticated_account_member
-        if authentication succeeds."""
+        and self.authenticated_whitelist_entry if authentication
+        succeeds.
+
+        The member comes with its user and account loaded, except when
+        it comes from a shared token cache (TOKEN_CACHE_ALIAS) or from
+        stateless authentication: then only their ids are loaded, and
+        other fields are fetched from the database on first access."""
         self.authenticated_account_member = None
+        self.authenticated_whitelist_entry = None
         if not self.should_check_authentication():
             return True
         auth_header = self.request.META.get('HTTP_AUTHORIZATION')
@@ -101,27 +226,109 @@ class ApiView(View):
         if len(auth_split) != 2 or auth_split[0].lower() != 'token':
             return False  # pragma: no cover
         token = auth_split[1]
-        self.authenticated_account_member = TokenWhitelistEntry\
-            .objects.get_account_member_for_token(token)
-        return self.authenticated_account_member is not None
+        if self.should_use_stateless_authentication():
+            self.authenticated_account_member = TokenWhitelistEntry\
+                .objects.get_account_member_for_token_stateless(token)
+            return self.authenticated_account_member is not None
+        entry = TokenWhitelistEntry.objects.get_entry_for_token(token)
+        if entry is None:
+            return False
+        self.authenticated_whitelist_entry = entry
+        self.authenticated_account_member = entry.api_account_member
+        return True
 
     def check_authorization(self):
         return True
 
     def check_method_allowed(self):
-        return self.request.method in self.methods.keys()
+        return self.method_handler is not None
+
+    def check_request(self):
+        """Checks that the request may be made, and validates its data.
+        Returns the validated validator and None, or None and the
+        response to send instead."""
+        # Check if this method is allowed on this endpoint.
+        if not self.check_method_allowed():
+            return None, self.create_method_not_allowed_response()
+        # Check if the user is allowed to be here.
+        if not self.time_phase('authentication', self.check_authentication):
+            return None, HttpResponse(status=401)
+        # Check if the caller has been making too many requests.
+        if not self.check_rate_limit():
+            return None, self.create_rate_limited_response()
+        if not self.check_authorization():
+            return None, HttpResponse(status=403)
+        # Validate the request data
+        try:
+            return self.time_phase('validation', self.validate_request), None
+        except JSONDecodeError:
+            return None, self.generate_response({
+                'errors': ['Could not decode a JSON request.']
+            }, status_code=400)
+        except ApiValidationError as e:
+            return None, self.create_validation_error_response(e)
+
+    def check_rate_limit(self):
+        """Counts the request against each of the caller's rate limits.
+        If it would exceed one of them, populates
+        self.rate_limit_retry_after and returns False, without counting
+        the request against any of them."""
+        self.rate_limit_retry_after = 0
+        current_time = time()
+        rate_limits = self.get_rate_limits()
+        for counter_name, rate_limit in rate_limits:
+            retry_after = rate_limit.check(counter_name, current_time)
+            if retry_after:
+                self.rate_limit_retry_after = retry_after
+                return False
+        for index, (counter_name, rate_limit) in enumerate(rate_limits):
+            retry_after = rate_limit.consume(counter_name, current_time)
+            if retry_after:
+                # Concurrent requests used up this limit after it was
+                # checked, so take back what was counted against the
+                # others.
+                for counted_name, counted_limit in rate_limits[:index]:
+                    counted_limit.refund(counted_name, current_time)
+                self.rate_limit_retry_after = retry_after
+                return False
+        return True
+
+    @classmethod
+    def compile_methods(cls, methods):
+        """Returns the attributes compiled from a methods dictionary."""
+        method_handlers = compile_method_handlers(cls, methods)
+        return {
+            'method_handlers': method_handlers,
+            # The Allow header sent with 405 responses.
+            'allowed_methods_header': ', '.join(sorted(method_handlers)),
+            '_compiled_methods': methods
+        }
 
     def create_log_entry(self, response):
+        # Decide whether to log this request before doing any of the work.
+        sample_rate = self.get_log_sample_rate(response)
+        if sample_rate < 1 and random() >= sample_rate:
+            return None
         header_string = self.get_redacted_header_str()
         redacted_request_payload_string = \
             self.get_redacted_request_payload_str()
         redacted_response_payload_string = \
             self.get_redacted_response_payload_str(response)
-
-        return LogEntry.objects.create(
+        request_payload_digest = response_payload_digest = None
+        if self.should_deduplicate_logged_payloads():
+            payload_store = get_payload_store()
+            request_payload_digest = payload_store.store(
+                redacted_request_payload_string)
+            if request_payload_digest is not None:
+                redacted_request_payload_string = ''
+            response_payload_digest = payload_store.store(
+                redacted_response_payload_string)
+            if response_payload_digest is not None:
+                redacted_response_payload_string = ''
+
+        entry = LogEntry(
             endpoint_name=self.get_endpoint_name(),
-            source_ip=self.request.META.get(
-                'HTTP_X_FORWARDED_FOR', 'Unknown'),
+            source_ip=self.get_source_ip(),
             path=self.request.path,
             host=self.request.get_host(),
             port=self.request.get_port(),
@@ -131,64 +338,173 @@ class ApiView(View):
             request_headers=header_string,
             request_payload=redacted_request_payload_string,
             response_payload=redacted_response_payload_string,
-            status_code=response.status_code
+            request_payload_digest=request_payload_digest,
+            response_payload_digest=response_payload_digest,
+            status_code=self.get_logged_status_code(response),
+            sample_rate=sample_rate,
+            duration=self.duration,
+            authentication_duration=self.phase_durations.get(
+                'authentication'),
+            validation_duration=self.phase_durations.get('validation'),
+            processing_duration=self.phase_durations.get('processing'),
+            serialization_duration=self.phase_durations.get(
+                'serialization'),
+            request_bytes=self.get_request_bytes(),
+            response_bytes=self.get_response_bytes(response)
         )
+        get_log_writer(self.get_endpoint_name()).write(entry)
+        return entry
+
+    def create_method_not_allowed_response(self):
+        response = HttpResponse(status=405)
+        response['Allow'] = self.allowed_methods_header
+        return response
+
+    def create_rate_limited_response(self):
+        response = HttpResponse(status=429)
+        response['Retry-After'] = str(ceil(self.rate_limit_retry_after))
+        return response
 
     def create_validation_error_response(
             self, validation_exception, status=400):
         response_data = {
             'errors': validation_exception.errors
         }
-        return JsonResponse(response_data, status=status)
+        return self.generate_response(response_data, status_code=status)
 
     def dispatch(self, request, *args, **kwargs):
-        # Check if this method is allowed on this endpoint.
-        if not self.check_method_allowed():
-            response = HttpResponse(status=405)
-        # Check if the user is allowed to be here.
-        elif not self.check_authentication():
-            response = HttpResponse(status=401)
-        elif not self.check_authorization():
-            response = HttpResponse(status=403)
-        else:
-            # Validate the request data
+        started = monotonic()
+        self.start_request(request)
+        validator, response = self.check_request()
+        if response is None:
+            # This is the happy path - we've made it through authorization
+            # and validation, now generate the success response.
             try:
-                validator = self.validate_request()
-            except JSONDecodeError:
-                response = JsonResponse({
-                    'errors': ['Could not decode a JSON request.']
-                }, status=400)
+                # Process the data
+                self.processing_artifact = self.time_phase(
+                    'processing', self.process, validator)
             except ApiValidationError as e:
+                # Processors can reject a request too, for input that can
+                # only be checked while processing it.
                 response = self.create_validation_error_response(e)
             else:
-                # This is the happy path - we've made it through authorization
-                # and validation, now generate the success response.
-                # Process the data
-                self.processing_artifact = self.process(validator)
-                # Serialize the data
-                response_data = self.serialize(
+                # Serialize the data and send the response back
+                response = self.time_phase(
+                    'serialization', self.serialize_response,
                     validator, self.processing_artifact)
-                # Send response back
-                response = self.generate_response(response_data)
-        self.create_log_entry(response)
+        elif self.rate_limit_retry_after:
+            # Callers making too many requests are turned away as cheaply
+            # as possible, so they aren't logged.
+            return response
+        return self.finish_request(response, started)
+
+    def encode_log_str(self, value):
+        return self.get_json_codec().encode(value).decode('utf-8')
+
+    def finish_request(self, response, started):
+        """Records metrics and logs the request, which started at the
+        monotonic() time started, and returns its response."""
+        if response.streaming:
+            # Record the request when the server closes the response,
+            # which it does whether the stream was sent in full, abandoned
+            # part way or never started at all.
+            response.streaming_content = self.record_stream(
+                response.streaming_content)
+            close_response = response.close
+
+            def record_and_close():
+                try:
+                    self.duration = monotonic() - started
+                    self.record_request(response)
+                finally:
+                    close_response()
+
+            response.close = record_and_close
+        else:
+            self.duration = monotonic() - started
+            self.record_request(response)
         return response
 
     def generate_response(self, response_data, status_code=None):
         if status_code is None:
             status_code = self.get_status_code()
-        return JsonResponse(response_data, status=status_code)
+        self.response_data = response_data
+        return HttpResponse(
+            self.get_json_codec().encode(response_data),
+            content_type='application/json',
+            status=status_code)
+
+    def generate_streaming_response(self, serializer, status_code=None):
+        if status_code is None:
+            status_code = self.get_status_code()
+        self.streaming_serializer = serializer
+        self.stream_recorder = StreamRecorder(
+            self.get_max_logged_response_bytes() or
+            self.DEFAULT_STREAM_LOG_PREFIX_BYTES)
+        return StreamingHttpResponse(
+            serializer.stream(),
+            content_type=serializer.get_content_type(),
+            status=status_code)
 
     def get_endpoint_name(self):
         return self.endpoint_name
 
+    def get_json_codec(self):
+        return get_json_codec(self.json_codec)
+
+    def get_log_sample_rate(self, response):
+        if self.request.method in self.always_log_methods:
+            return 1
+        status_class = '{0}xx'.format(
+            self.get_logged_status_code(response) // 100)
+        if self.authenticated_account_member is not None:
+            account_rates = self.account_log_sample_rates.get(
+                self.authenticated_account_member.api_account_id, {})
+            if status_class in account_rates:
+                return account_rates[status_class]
+        return self.log_sample_rates.get(status_class, 1)
+
+    def get_logged_status_code(self, response):
+        """A streamed response that failed part way is logged as a 500,
+        although its status was sent before the failure."""
+        if self.stream_recorder is not None and \
+                self.stream_recorder.error is not None:
+            return 500
+        return response.status_code
+
+    def get_max_logged_request_bytes(self):
+        if self.max_logged_request_bytes is None:
+            return getattr(settings, 'API_LOG_MAX_PAYLOAD_BYTES', None)
+        return self.max_logged_request_bytes
+
+    def get_max_logged_response_bytes(self):
+        if self.max_logged_response_bytes is None:
+            return getattr(settings, 'API_LOG_MAX_PAYLOAD_BYTES', None)
+        return self.max_logged_response_bytes
+
+    def get_method_handler(self):
+        if self.method_handler is not None:
+            return self.method_handler
+        # check_method_allowed may have been overridden to let through a
+        # method with no handler, or we may be outside of dispatch.
+        return self.get_method_handlers().get(
+            self.request.method, NULL_METHOD_HANDLER)
+
+    def get_method_handlers(self):
+        if self._compiled_methods is not self.methods:
+            # methods was replaced after it was compiled, either on the
+            # class or on this view.
+            owner = self if 'methods' in vars(self) else type(self)
+            for name, value in self.compile_methods(self.methods).items():
+                setattr(owner, name, value)
+        return self.method_handlers
+
     def get_processor(self, validator, authenticated_account_member):
         process_cls = self.get_processor_class()
         return process_cls(self, validator)
 
     def get_processor_class(self):
-        return self.methods\
-            .get(self.request.method, {})\
-            .get('processor', NullProcessor)
+        return self.get_method_handler().processor
 
     def get_raw_request_data(self):
         if not hasattr(self, '_raw_request_data'):
@@ -208,19 +524,47 @@ class ApiView(View):
                 if len(self.request.body) == 0:
                     self._raw_request_data = {}
                 else:
-                    self._raw_request_data = loads(self.request.body)
+                    self._raw_request_data = self.get_json_codec().decode(
+                        self.request.body)
         return self._raw_request_data
 
+    def get_rate_limit_caller(self):
+        if self.authenticated_account_member is not None:
+            return 'account-{0}'.format(
+                self.authenticated_account_member.api_account_id)
+        return 'ip-{0}'.format(self.get_source_ip())
+
+    def get_rate_limits(self):
+        """Returns a list of (counter name, RateLimit) pairs that apply to
+        this request."""
+        rate_limits = []
+        if self.rate_limit is not None:
+            rate_limits.append((
+                '{0}:{1}'.format(
+                    self.get_endpoint_name(), self.get_rate_limit_caller()),
+                self.rate_limit))
+        account_rate_limit = getattr(settings, 'API_ACCOUNT_RATE_LIMIT', None)
+        if (account_rate_limit is not None and
+                self.authenticated_account_member is not None):
+            rate_limits.append((
+                self.get_rate_limit_caller(),
+                RateLimit(*account_rate_limit)))
+        return rate_limits
+
     def get_redacted_header_str(self):
-        header_components = []
+        return self.encode_log_str(self.get_redacted_headers())
+
+    def get_redacted_headers(self):
+        headers = {}
         for name, value in self.request.META.items():
-            if name.lower() in self.redacted_headers:
-                cleaned_value = self.REDACTED_STRING
+            lower_name = name.lower()
+            if not self.should_log_header(lower_name):
+                continue
+            if lower_name in self.redacted_headers:
+                headers[name] = self.REDACTED_STRING
             else:
-                cleaned_value = value
-            header_components.append(
-                "{0}={1}".format(name, cleaned_value))
-        return "\n".join(header_components)
+                headers[name] = value
+        return headers
 
     def get_redacted_request_payload_fields(self):
         return self.redacted_request_payload_fields
@@ -228,50 +572,106 @@ class ApiView(View):
     def get_redacted_request_payload_str(self):
         if self.request.method == 'GET':
             return ''
+        max_bytes = self.get_max_logged_request_bytes()
+        if max_bytes is not None and len(self.request.body) > max_bytes:
+            return self.get_truncated_payload_str(
+                self.request.body,
+                max_bytes,
+                self.get_redacted_request_payload_fields())
         try:
-            payload_copy = self.get_raw_request_data().copy()
+            payload = self.get_raw_request_data()
         except JSONDecodeError:
             return ""
-        for redacted_key in self.get_redacted_request_payload_fields():
-            if redacted_key in payload_copy:
-                payload_copy[redacted_key] = self.REDACTED_STRING
-        return dumps(payload_copy)
+        redaction_plan = get_redaction_plan(
+            tuple(self.get_redacted_request_payload_fields()),
+            self.REDACTED_STRING)
+        return self.encode_log_str(redaction_plan.redact(payload))
 
     def get_redacted_response_payload_fields(self):
         return self.redacted_response_payload_fields
 
     def get_redacted_response_payload_str(self, response):
-        if len(response.content) == 0:
+        if response.streaming:
+            return self.get_streamed_payload_str()
+        max_bytes = self.get_max_logged_response_bytes()
+        if max_bytes is not None and len(response.content) > max_bytes:
+            return self.get_truncated_payload_str(
+                response.content,
+                max_bytes,
+                self.get_redacted_response_payload_fields())
+        if self.response_data is not None:
+            payload = self.response_data
+        elif len(response.content) == 0:
             return ''
-        try:
-            payload_copy = loads(response.content)
-        except JSONDecodeError:  # pragma: no cover
-            return "Could not deserialize body."
-        for redacted_key in self.get_redacted_response_payload_fields():
-            if redacted_key in payload_copy:
-                payload_copy[redacted_key] = self.REDACTED_STRING
-        return dumps(payload_copy)
+        else:
+            # The response wasn't built by generate_response, so we have
+            # to decode it.
+            try:
+                payload = self.get_json_codec().decode(response.content)
+            except JSONDecodeError:  # pragma: no cover
+                return "Could not deserialize body."
+        redaction_plan = get_redaction_plan(
+            tuple(self.get_redacted_response_payload_fields()),
+            self.REDACTED_STRING)
+        return self.encode_log_str(redaction_plan.redact(payload))
+
+    def get_request_bytes(self):
+        return len(self.request.body)
+
+    def get_response_bytes(self, response):
+        if response.streaming:
+            return self.stream_recorder.length
+        return len(response.content)
 
     def get_serializer(self, validator, processing_artifact):
         serializer_cls = self.get_serializer_class()
         return serializer_cls(self, validator, processing_artifact)
 
     def get_serializer_class(self):
-        return self.methods\
-            .get(self.request.method, {})\
-            .get('serializer', NullSerializer)
+        return self.get_method_handler().serializer
+
+    def get_source_ip(self):
+        return self.request.META.get('HTTP_X_FORWARDED_FOR', 'Unknown')
 
     def get_status_code(self):
         return 200
 
+    def get_streamed_payload_str(self):
+        """Summarizes a streamed response body, which is never held in
+        memory as a whole."""
+        summary = {
+            'streamed': True,
+            'items': self.streaming_serializer.item_count,
+            'length': self.stream_recorder.length,
+            'sha256': self.stream_recorder.digest
+        }
+        if self.stream_recorder.error is not None:
+            summary['error'] = repr(self.stream_recorder.error)
+        if not self.get_redacted_response_payload_fields():
+            summary['prefix'] = self.stream_recorder.prefix.decode(
+                'utf-8', errors='replace')
+        return self.encode_log_str(summary)
+
+    def get_truncated_payload_str(self, body, max_bytes, redacted_fields):
+        """Summarizes a body too large to log, without decoding it."""
+        summary = {
+            'truncated': True,
+            'length': len(body),
+            'sha256': sha256(body).hexdigest()
+        }
+        # We can't redact fields without decoding the body, so only log
+        # a prefix if there's nothing to redact.
+        if not redacted_fields:
+            summary['prefix'] = body[:max_bytes].decode(
+                'utf-8', errors='replace')
+        return self.encode_log_str(summary)
+
     def get_validator(self, data, **validator_kwargs):
         validator_cls = self.get_validator_class()
         return validator_cls(data, **validator_kwargs)
 
     def get_validator_class(self):
-        return self.methods\
-            .get(self.request.method, {})\
-            .get('validator', NullValidator)
+        return self.get_method_handler().validator
 
     def get_validator_kwargs(self):
         return {}
@@ -282,13 +682,94 @@ class ApiView(View):
         artifact = processor.process()
         return artifact
 
+    def record_request(self, response):
+        if self.should_record_metrics():
+            self.record_request_metrics(response, self.duration)
+        if self.log_requests:
+            self.create_log_entry(response)
+
+    def record_request_metrics(self, response, latency):
+        if self.authenticated_account_member is None:
+            api_account_id = None
+        else:
+            api_account_id = self.authenticated_account_member.api_account_id
+        get_metrics_accumulator().record(
+            self.get_endpoint_name(),
+            api_account_id,
+            self.get_logged_status_code(response),
+            latency,
+            self.get_request_bytes() + self.get_response_bytes(response))
+
+    def record_stream(self, content):
+        try:
+            for chunk in content:
+                self.stream_recorder.add(chunk)
+                yield chunk
+        except Exception as e:
+            # The status has already been sent, but the request failed.
+            self.stream_recorder.error = e
+            raise
+
     def serialize(self, validator, processing_artifact):
         serializer = self.get_serializer(validator, processing_artifact)
         return serializer.serialize()
 
+    def serialize_response(self, validator, processing_artifact):
+        if getattr(self.get_serializer_class(), 'streaming', False):
+            return self.generate_streaming_response(
+                self.get_serializer(validator, processing_artifact))
+        response_data = self.serialize(validator, processing_artifact)
+        return self.generate_response(response_data)
+
     def should_check_authentication(self):
         return self.require_authentication
 
+    def should_deduplicate_logged_payloads(self):
+        if self.deduplicate_logged_payloads is None:
+            return getattr(settings, 'API_LOG_DEDUPLICATE_PAYLOADS', False)
+        return self.deduplicate_logged_payloads
+
+    def should_log_header(self, lower_name):
+        if self.logged_headers is not None:
+            return lower_name in self.logged_headers
+        if lower_name in self.unlogged_headers:
+            return False
+        # CONTENT_TYPE and CONTENT_LENGTH are the only HTTP headers that
+        # don't get the HTTP_ prefix.
+        return (
+            lower_name.startswith('http_') or
+            lower_name in ('content_type', 'content_length'))
+
+    def should_record_metrics(self):
+        if self.record_metrics is None:
+            return getattr(settings, 'API_RECORD_METRICS', False)
+        return self.record_metrics
+
+    def should_use_stateless_authentication(self):
+        if not is_revocation_tracking_enabled():
+            # Without revocations, only the whitelist knows which tokens
+            # have been withdrawn.
+            return False
+        if self.stateless_authentication is None:
+            return getattr(settings, 'STATELESS_TOKEN_AUTHENTICATION', False)
+        return self.stateless_authentication
+
+    def start_request(self, request):
+        # Forget any response data from an earlier dispatch, so that a
+        # response built some other way isn't logged as that data.
+        self.response_data = None
+        self.rate_limit_retry_after = 0
+        self.method_handler = self.get_method_handlers().get(request.method)
+
+    def time_phase(self, phase, func, *args):
+        """Calls func, recording how long it took (in seconds) in
+        self.phase_durations under the given phase name."""
+        phase_started = monotonic()
+        try:
+            return func(*args)
+        finally:
+            self.phase_durations[phase] = monotonic() - phase_started
+
     def validate_request(self):
         request_data = self.get_raw_request_data()
         validator_kwargs = self.get_validator_kwargs()
@@ -0,0 +1,110 @@
+from asyncio import new_event_loop
+from inspect import isawaitable
+from threading import local
+from time import monotonic
+from weakref import finalize
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+
+from .api_view import ApiValidationError, ApiView
+
+
+class _ThreadLoop:
+    """An event loop for one thread, closed once the thread has exited
+    (and so dropped its thread-local state)."""
+
+    def __init__(self):
+        self.loop = new_event_loop()
+        finalize(self, self.loop.close)
+
+
+_thread_state = local()
+
+
+def run_in_event_loop(coroutine):
+    """Run coroutine to completion on this thread's event loop, which is
+    created the first time and reused for later requests, since creating
+    one costs more than a small request."""
+    thread_loop = getattr(_thread_state, 'thread_loop', None)
+    if thread_loop is None or thread_loop.loop.is_closed():
+        thread_loop = _thread_state.thread_loop = _ThreadLoop()
+    return thread_loop.loop.run_until_complete(coroutine)
+
+
+async def resolve(value):
+    """Await value if it is awaitable, so that sync and async hooks can be
+    called the same way."""
+    if isawaitable(value):
+        return await value
+    return value
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncApiView(ApiView):
+    """An ApiView whose request handling runs as a coroutine, so that
+    processors and serializers can overlap their I/O (for example, calls
+    to other internal services gathered with asyncio.gather).
+
+    Requests go through the same steps as in ApiView, but processors and
+    serializers may define process() and serialize() as either coroutines
+    or plain methods, so existing sync classes work unchanged.
+    Authentication and validation stay synchronous: the ORM is sync-only
+    in Django 2.2, so an async whitelist lookup could only move the same
+    blocking query to another thread, with nothing else in the request to
+    overlap it with.
+
+    Django 2.2 calls views synchronously, so dispatch runs the coroutine
+    to completion on the calling thread's event loop: I/O overlaps within a
+    request, while concurrent requests are still spread over the server's
+    threads or processes.  For log writes that don't wait on the
+    database, use a BatchedLogWriter for the endpoint (see
+    API_LOG_ENDPOINT_WRITERS)."""
+
+    def dispatch(self, request, *args, **kwargs):
+        return run_in_event_loop(
+            self.dispatch_async(request, *args, **kwargs))
+
+    async def dispatch_async(self, request, *args, **kwargs):
+        started = monotonic()
+        self.start_request(request)
+        validator, response = self.check_request()
+        if response is None:
+            try:
+                self.processing_artifact = await self.time_phase_async(
+                    'processing', self.process_async, validator)
+            except ApiValidationError as e:
+                response = self.create_validation_error_response(e)
+            else:
+                response = await self.time_phase_async(
+                    'serialization', self.serialize_response_async,
+                    validator, self.processing_artifact)
+        elif self.rate_limit_retry_after:
+            return response
+        return self.finish_request(response, started)
+
+    async def process_async(self, validator):
+        processor = self.get_processor(
+            validator, self.authenticated_account_member)
+        return await resolve(processor.process())
+
+    async def serialize_async(self, validator, processing_artifact):
+        serializer = self.get_serializer(validator, processing_artifact)
+        return await resolve(serializer.serialize())
+
+    async def serialize_response_async(self, validator, processing_artifact):
+        if getattr(self.get_serializer_class(), 'streaming', False):
+            return self.generate_streaming_response(
+                self.get_serializer(validator, processing_artifact))
+        response_data = await self.serialize_async(
+            validator, processing_artifact)
+        return self.generate_response(response_data)
+
+    async def time_phase_async(self, phase, coroutine_func, *args):
+        """Awaits coroutine_func, recording how long it took (in seconds)
+        in self.phase_durations under the given phase name."""
+        phase_started = monotonic()
+        try:
+            return await coroutine_func(*args)
+        finally:
+            self.phase_durations[phase] = monotonic() - phase_started
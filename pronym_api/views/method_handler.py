@@ -0,0 +1,64 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .processor import NullProcessor
+from .serializer import NullSerializer
+from .validator import NullValidator
+
+
+# The validator, processor and serializer classes that handle one request
+# method on an ApiView.
+MethodHandler = namedtuple(
+    'MethodHandler', ['validator', 'processor', 'serializer'])
+
+DEFAULT_HANDLER_CLASSES = {
+    'validator': NullValidator,
+    'processor': NullProcessor,
+    'serializer': NullSerializer
+}
+
+# Used for requests whose method has no handler, but which
+# check_method_allowed lets through anyway.
+NULL_METHOD_HANDLER = MethodHandler(**DEFAULT_HANDLER_CLASSES)
+
+
+def compile_method_handlers(view_cls, methods):
+    """Check the methods dictionary of view_cls (or one passed to its
+    as_view) and compile it into a read-only mapping of request method to
+    MethodHandler, raising ImproperlyConfigured if it names an unknown
+    request method or component, or something other than a class."""
+    if not isinstance(methods, dict):
+        raise ImproperlyConfigured(
+            '{0}.methods must be a dictionary.'.format(view_cls.__name__))
+    method_handlers = {}
+    for method, handler_classes in methods.items():
+        if not isinstance(method, str) or \
+                method.lower() not in view_cls.http_method_names or \
+                method != method.upper():
+            raise ImproperlyConfigured(
+                '{0}.methods has an invalid request method {1!r}; request '
+                'methods must be in upper case.'.format(
+                    view_cls.__name__, method))
+        if not isinstance(handler_classes, dict):
+            raise ImproperlyConfigured(
+                "{0}.methods['{1}'] must be a dictionary.".format(
+                    view_cls.__name__, method))
+        unknown_names = set(handler_classes) - set(DEFAULT_HANDLER_CLASSES)
+        if unknown_names:
+            raise ImproperlyConfigured(
+                "{0}.methods['{1}'] has unknown keys: {2}.".format(
+                    view_cls.__name__, method,
+                    ', '.join(sorted(map(str, unknown_names)))))
+        for name, handler_cls in handler_classes.items():
+            if not isinstance(handler_cls, type):
+                raise ImproperlyConfigured(
+                    "{0}.methods['{1}']['{2}'] must be a class, not "
+                    "{3!r}.".format(
+                        view_cls.__name__, method, name, handler_cls))
+        method_handlers[method] = MethodHandler(**{
+            name: handler_classes.get(name, default_cls)
+            for name, default_cls in DEFAULT_HANDLER_CLASSES.items()
+        })
+    return MappingProxyType(method_handlers)
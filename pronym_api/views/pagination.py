@@ -0,0 +1,186 @@
+from collections import namedtuple
+from datetime import date, datetime, time
+from decimal import Decimal
+from json import dumps, loads
+from uuid import UUID
+
+from django import forms
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.forms.models import model_to_dict
+
+from .api_view import ApiValidationError
+from .processor import Processor
+from .serializer import Serializer
+from .validator import FormValidator
+
+
+# One page of results: the items on it, whether there are more after it
+# and the cursor for the next page (None on the last page).
+Page = namedtuple('Page', ['items', 'has_more', 'next_cursor'])
+
+
+class CursorSerializer:
+    """Serializes cursor values for django.core.signing, keeping dates and
+    times at full precision (unlike DjangoJSONEncoder, which rounds to
+    milliseconds) so that no rows are skipped between pages."""
+
+    def dumps(self, obj):
+        return dumps(
+            obj, separators=(',', ':'), default=self.default
+        ).encode('latin-1')
+
+    def loads(self, data):
+        return loads(data.decode('latin-1'))
+
+    @staticmethod
+    def default(value):
+        if isinstance(value, (date, datetime, time)):
+            return value.isoformat()
+        if isinstance(value, (Decimal, UUID)):
+            return str(value)
+        raise TypeError(
+            'Cannot use {0!r} in a cursor.'.format(type(value).__name__))
+
+
+class PaginationValidator(FormValidator):
+    cursor = forms.CharField(required=False)
+    page_size = forms.IntegerField(required=False, min_value=1)
+
+
+class PaginatedQuerysetProcessor(Processor):
+    """Returns one Page of get_queryset(), using keyset pagination: each
+    page continues from the ordering key values of the last row of the
+    previous page, which are carried in a signed, opaque cursor.  Unlike
+    OFFSET pagination, every page costs the same single query, which
+    fetches one row more than the page size to find out whether there
+    are more pages (so there's no COUNT(*) either).
+
+    ordering lists the (local, non-null) fields to order by, with '-' for
+    descending order, like QuerySet.order_by.  It should match an index,
+    and is extended with the primary key if needed to make it unique.
+    The page size is read from the validator's page_size field (see
+    PaginationValidator), and capped at max_page_size, which defaults to
+    the API_MAX_PAGE_SIZE setting (100 if unset)."""
+
+    ordering = ('pk',)
+    default_page_size = 20
+    max_page_size = None
+
+    @staticmethod
+    def decode_cursor(cursor, salt, key_count):
+        try:
+            values = signing.loads(
+                cursor, salt=salt, serializer=CursorSerializer)
+        except signing.BadSignature:
+            values = None
+        if not isinstance(values, list) or len(values) != key_count:
+            raise ApiValidationError({'cursor': ['Invalid cursor.']})
+        return values
+
+    def get_cursor(self):
+        return self.validator.cleaned_data.get('cursor')
+
+    @staticmethod
+    def get_cursor_salt(endpoint_name, model, ordering):
+        # Cursors are only valid for the endpoint, model and ordering they
+        # were made for.
+        return 'pronym_api.pagination:{0}:{1}:{2}'.format(
+            endpoint_name, model._meta.label_lower, ','.join(ordering))
+
+    @staticmethod
+    def get_key_value(item, model, field_name):
+        field_name = field_name.lstrip('-')
+        if field_name == 'pk':
+            field = model._meta.pk
+        else:
+            field = model._meta.get_field(field_name)
+        if isinstance(item, dict):
+            # Rows from values() are keyed by the names they were asked
+            # for.
+            for key in (field_name, field.name, field.attname):
+                if key in item:
+                    return item[key]
+            raise KeyError(field_name)
+        return getattr(item, field.attname)
+
+    @staticmethod
+    def get_keyset_filter(ordering, values):
+        """A filter for the rows that come after values in ordering: for
+        ordering (a, b), rows where a is past values[0], or a equals it and
+        b is past values[1]."""
+        keyset_filter = Q()
+        equal_filter = Q()
+        for field_name, value in zip(ordering, values):
+            if field_name.startswith('-'):
+                lookup = '{0}__lt'.format(field_name[1:])
+                field_name = field_name[1:]
+            else:
+                lookup = '{0}__gt'.format(field_name)
+            keyset_filter |= equal_filter & Q(**{lookup: value})
+            equal_filter &= Q(**{field_name: value})
+        return keyset_filter
+
+    def get_max_page_size(self):
+        if self.max_page_size is None:
+            return getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+        return self.max_page_size
+
+    def get_ordering(self, model):
+        ordering = list(self.ordering)
+        pk_names = ('pk', model._meta.pk.name, model._meta.pk.attname)
+        if ordering[-1].lstrip('-') not in pk_names:
+            ordering.append('pk')
+        return ordering
+
+    def get_page_size(self):
+        page_size = self.validator.cleaned_data.get('page_size') or \
+            self.default_page_size
+        return min(page_size, self.get_max_page_size())
+
+    def get_queryset(self):
+        raise NotImplementedError(
+            'PaginatedQuerysetProcessor subclasses must define '
+            'get_queryset.')
+
+    def process(self):
+        queryset = self.get_queryset()
+        ordering = self.get_ordering(queryset.model)
+        salt = self.get_cursor_salt(
+            self.view.get_endpoint_name(), queryset.model, ordering)
+        cursor = self.get_cursor()
+        if cursor:
+            queryset = queryset.filter(self.get_keyset_filter(
+                ordering, self.decode_cursor(cursor, salt, len(ordering))))
+        page_size = self.get_page_size()
+        items = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(items) > page_size
+        if not has_more:
+            return Page(items, False, None)
+        items = items[:page_size]
+        last_values = [
+            self.get_key_value(items[-1], queryset.model, field_name)
+            for field_name in ordering]
+        return Page(items, True, signing.dumps(
+            last_values, salt=salt, serializer=CursorSerializer))
+
+
+class PaginatedSerializer(Serializer):
+    """Serializes a Page as its results, next_cursor and has_more.
+    Override serialize_item to control how each item is represented; by
+    default, model instances are converted with model_to_dict and
+    anything else is returned as it is."""
+
+    def serialize(self):
+        page = self.processing_artifact
+        return {
+            'results': [self.serialize_item(item) for item in page.items],
+            'next_cursor': page.next_cursor,
+            'has_more': page.has_more
+        }
+
+    def serialize_item(self, item):
+        if isinstance(item, dict):
+            return item
+        return model_to_dict(item)
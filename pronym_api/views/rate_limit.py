@@ -0,0 +1,100 @@
+from math import ceil
+from time import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class RateLimit:
+    """Allows `requests` requests in any span of `seconds` seconds, as a
+    sliding window: a request is allowed if the count of requests in the
+    current window, plus the previous window's count weighted by how much
+    of it still overlaps the last `seconds` seconds, stays within
+    `requests`.  Unlike fixed windows, this doesn't let a caller through
+    at twice the rate around the boundary between two windows.
+
+    Counts are kept in the Django cache named by the
+    RATE_LIMIT_CACHE_ALIAS setting ('default' if unset), so that they are
+    shared by every worker using that cache, and are updated with the
+    cache's atomic add, incr and decr, so concurrent requests can't
+    overdraw a counter."""
+
+    KEY = 'pronym_api:rate-limit:{0}:{1}'
+
+    def __init__(self, requests, seconds):
+        self.requests = requests
+        self.seconds = seconds
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'RATE_LIMIT_CACHE_ALIAS', 'default')]
+
+    def check(self, counter_name, current_time=None):
+        """Check whether a request would be allowed by the named counter,
+        without counting it.  Returns 0 if so, otherwise the number of
+        seconds until it would be."""
+        if current_time is None:
+            current_time = time()
+        window, fraction = self.get_window(current_time)
+        previous_key = self.KEY.format(counter_name, window - 1)
+        current_key = self.KEY.format(counter_name, window)
+        counts = self.cache.get_many([previous_key, current_key])
+        return self.get_retry_after(
+            counts.get(previous_key, 0), counts.get(current_key, 0),
+            fraction)
+
+    def consume(self, counter_name, current_time=None):
+        """Count a request against the named counter.  Returns 0 if the
+        request is allowed; otherwise the request isn't counted, and the
+        number of seconds until it would be allowed is returned."""
+        if current_time is None:
+            current_time = time()
+        window, fraction = self.get_window(current_time)
+        key = self.KEY.format(counter_name, window)
+        # A window's count matters until the end of the window after it.
+        timeout = ceil(self.seconds * 2) + 1
+        self.cache.add(key, 0, timeout)
+        try:
+            count = self.cache.incr(key)
+        except ValueError:
+            # Evicted between the add and the incr.
+            self.cache.add(key, 0, timeout)
+            count = self.cache.incr(key)
+        previous_count = self.cache.get(
+            self.KEY.format(counter_name, window - 1), 0)
+        retry_after = self.get_retry_after(previous_count, count - 1, fraction)
+        if retry_after:
+            self.refund(counter_name, current_time)
+        return retry_after
+
+    def get_retry_after(self, previous_count, current_count, fraction):
+        """The number of seconds until one more request is allowed, given
+        the counts of the previous and current windows and the fraction
+        of the current window that has passed; 0 if it is allowed now."""
+        estimated_count = previous_count * (1 - fraction) + current_count
+        if estimated_count + 1 <= self.requests:
+            return 0
+        if current_count < self.requests:
+            # Wait for enough of the previous window to slide out.
+            allowed_fraction = \
+                1 - (self.requests - 1 - current_count) / previous_count
+            return max(allowed_fraction - fraction, 0) * self.seconds
+        # Wait for the next window, and for enough of this one to slide
+        # out of that.
+        allowed_fraction = 1 - (self.requests - 1) / current_count
+        return (1 - fraction + allowed_fraction) * self.seconds
+
+    def get_window(self, current_time):
+        """Returns the index of the window that current_time falls in, and
+        the fraction of that window that has passed."""
+        window, fraction = divmod(current_time / self.seconds, 1)
+        return int(window), fraction
+
+    def refund(self, counter_name, current_time):
+        """Take back a request counted by consume at current_time."""
+        window, fraction = self.get_window(current_time)
+        try:
+            self.cache.decr(self.KEY.format(counter_name, window))
+        except ValueError:
+            # The count has been evicted, which forgets the request anyway.
+            pass
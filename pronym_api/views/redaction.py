@@ -0,0 +1,98 @@
+from functools import lru_cache
+
+
+WILDCARD = '*'
+
+
+class RedactionPlan:
+    """A set of redacted field paths, compiled into a tree that can be
+    applied to decoded JSON payloads.
+
+    Paths are dotted, and each component is either an object key, a list
+    index or `*`, which matches every key of an object or every item of a
+    list.  For example, `password` redacts a top-level field and
+    `items.*.card.number` redacts the card number of every item.
+
+    Applying the plan only walks the branches of the payload that paths
+    lead into, and only copies the objects and lists along the way that
+    actually contain a redacted value; everything else is shared with the
+    original payload, which is never modified."""
+
+    def __init__(self, paths, replacement):
+        self.replacement = replacement
+        self.tree = {}
+        for path in paths:
+            node = self.tree
+            components = path.split('.')
+            for component in components[:-1]:
+                child = node.setdefault(component, {})
+                if child is None:
+                    # A parent of this path is already redacted.
+                    break
+                node = child
+            else:
+                node[components[-1]] = None
+
+    def redact(self, payload):
+        if not self.tree:
+            return payload
+        return self._redact_value(self.tree, payload)
+
+    def _redact_child(self, children, value):
+        for child in children:
+            if child is None:
+                return self.replacement
+            value = self._redact_value(child, value)
+        return value
+
+    def _redact_value(self, node, value):
+        if isinstance(value, dict):
+            if WILDCARD in node:
+                keys = list(value)
+            else:
+                keys = [key for key in node if key in value]
+        elif isinstance(value, list):
+            if WILDCARD in node:
+                keys = range(len(value))
+            else:
+                keys = [
+                    int(key) for key in node
+                    if key.isdigit() and int(key) < len(value)]
+        else:
+            return value
+        if WILDCARD in node:
+            wildcard_children = (node[WILDCARD],)
+            # Only look up explicit keys if there are any alongside the
+            # wildcard.
+            has_explicit_keys = len(node) > 1
+        else:
+            wildcard_children = ()
+            has_explicit_keys = True
+        redacted = value
+        for key in keys:
+            child_value = value[key]
+            if has_explicit_keys and str(key) in node:
+                children = (node[str(key)],) + wildcard_children
+            else:
+                children = wildcard_children
+            new_child_value = self._redact_child(children, child_value)
+            if new_child_value is not child_value:
+                if redacted is value:
+                    redacted = value.copy()
+                redacted[key] = new_child_value
+        return redacted
+
+
+# Paths usually come from ApiView class attributes, so there are only a
+# few distinct sets, but views that build them per request (from request
+# data, say) shouldn't be able to grow the cache without bound.
+MAX_CACHED_PLANS = 256
+
+
+@lru_cache(maxsize=MAX_CACHED_PLANS)
+def get_redaction_plan(paths, replacement):
+    """Returns the compiled plan for a tuple of paths, so that each
+    distinct set of paths (usually, each ApiView subclass) is only
+    compiled once, while it remains among the MAX_CACHED_PLANS most
+    recently used."""
+    return RedactionPlan(paths, replacement)
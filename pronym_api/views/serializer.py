@@ -1,7 +1,11 @@
+from django.db.models import Model, QuerySet
 from django.forms.models import model_to_dict
 
 
 class Serializer:
+    # Does this serializer stream its output (see StreamingSerializer)?
+    streaming = False
+
     def __init__(self, view, validator, processing_artifact):
         self.view = view
         self.validator = validator
@@ -18,3 +22,71 @@ class NullSerializer(Serializer):
 class ModelSerializer(Serializer):
     def serialize(self):
         return model_to_dict(self.processing_artifact)
+
+
+class StreamingSerializer(Serializer):
+    """Streams the items of the processing artifact (usually a queryset)
+    as a JSON array, or as newline-delimited JSON, without holding the
+    whole result in memory.  Querysets are read with
+    .iterator(chunk_size), and encoded items are sent in chunks of about
+    buffer_bytes bytes.
+
+    Override serialize_item to control how each item is represented;
+    by default, model instances are converted with model_to_dict and
+    anything else (e.g. the dicts from a values() queryset) is encoded
+    as it is."""
+    streaming = True
+
+    JSON_ARRAY = 'json'
+    NDJSON = 'ndjson'
+    CONTENT_TYPES = {
+        JSON_ARRAY: 'application/json',
+        NDJSON: 'application/x-ndjson'
+    }
+
+    output_format = JSON_ARRAY
+    chunk_size = 2000
+    buffer_bytes = 64 * 1024
+
+    def __init__(self, view, validator, processing_artifact):
+        Serializer.__init__(self, view, validator, processing_artifact)
+        self.item_count = 0
+
+    def get_content_type(self):
+        return self.CONTENT_TYPES[self.output_format]
+
+    def get_items(self):
+        if isinstance(self.processing_artifact, QuerySet):
+            return self.processing_artifact.iterator(
+                chunk_size=self.chunk_size)
+        return iter(self.processing_artifact)
+
+    def serialize_item(self, item):
+        if isinstance(item, Model):
+            return model_to_dict(item)
+        return item
+
+    def stream(self):
+        encode = self.view.get_json_codec().encode
+        if self.output_format == self.NDJSON:
+            start, separator, end = b'', b'\n', b'\n'
+        else:
+            start, separator, end = b'[', b',', b']'
+        buffer = [start]
+        buffered_bytes = len(start)
+        for item in self.get_items():
+            encoded = encode(self.serialize_item(item))
+            if self.item_count:
+                buffer.append(separator)
+            buffer.append(encoded)
+            self.item_count += 1
+            buffered_bytes += len(encoded) + 1
+            if buffered_bytes >= self.buffer_bytes:
+                yield b''.join(buffer)
+                buffer = []
+                buffered_bytes = 0
+        if self.item_count or self.output_format == self.JSON_ARRAY:
+            buffer.append(end)
+        content = b''.join(buffer)
+        if content:
+            yield content
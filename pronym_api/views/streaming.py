@@ -0,0 +1,24 @@
+from hashlib import sha256
+
+
+class StreamRecorder:
+    """Keeps a bounded summary of a streamed response body as it is sent:
+    its length, SHA-256 digest and first prefix_bytes bytes, and the
+    exception that cut it short, if any."""
+
+    def __init__(self, prefix_bytes):
+        self.prefix_bytes = prefix_bytes
+        self.length = 0
+        self.prefix = b''
+        self.error = None
+        self._digest = sha256()
+
+    @property
+    def digest(self):
+        return self._digest.hexdigest()
+
+    def add(self, chunk):
+        if len(self.prefix) < self.prefix_bytes:
+            self.prefix += chunk[:self.prefix_bytes - len(self.prefix)]
+        self.length += len(chunk)
+        self._digest.update(chunk)
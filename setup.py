@@ -4,6 +4,8 @@ install_dependencies = ['django==2.2.4', 'PyJWT==1.7.1', 'factory_boy==2.12.0']
 test_dependencies = [
     'pytest-django==3.5.1', 'coverage==4.5.4',
     'pytest-cov==2.7.1']
+stats_dependencies = ['numpy']
+fast_json_dependencies = ['orjson']
 
 
 setup(
@@ -14,7 +16,9 @@ setup(
     packages=find_packages(),
     install_requires=install_dependencies,
     tests_require=test_dependencies,
-    extras_require={'test': test_dependencies},
+    extras_require={
+        'test': test_dependencies, 'stats': stats_dependencies,
+        'fast-json': fast_json_dependencies},
     version='1.0.8',
     license='MIT',
     description=(
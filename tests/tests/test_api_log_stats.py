@@ -0,0 +1,94 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import skipIf
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils.timezone import now
+
+from pronym_api.management.commands import api_log_stats
+from pronym_api.test_utils.factories import (
+    ApiAccountMemberFactory, LogEntryFactory)
+
+
+@skipIf(api_log_stats.numpy is None, 'numpy is not installed')
+class ApiLogStatsTestCase(TestCase):
+    def setUp(self):
+        self.account_member = ApiAccountMemberFactory()
+        for duration in range(1, 101):
+            LogEntryFactory(
+                authenticated_profile=self.account_member,
+                duration=duration / 1000,
+                status_code=500 if duration <= 5 else 200)
+        LogEntryFactory(
+            endpoint_name='other-endpoint',
+            authenticated_profile=self.account_member,
+            duration=None,
+            status_code=404,
+            sample_rate=0.25)
+        # Outside the default window.
+        LogEntryFactory(
+            authenticated_profile=self.account_member,
+            datetime_added=now() - timedelta(days=2),
+            duration=10,
+            status_code=500)
+
+    def get_rows(self, *args):
+        out = StringIO()
+        call_command('api_log_stats', *args, stdout=out)
+        lines = out.getvalue().splitlines()
+        return {line.split()[0]: line.split()[1:] for line in lines[1:]}
+
+    def test_per_endpoint(self):
+        rows = self.get_rows()
+        self.assertEqual(
+            rows['sample-endpoint'],
+            ['100', '50.5', '95.5', '99.5', '0.00', '5.00'])
+        # Sampled entries are scaled up; missing durations aren't counted.
+        self.assertEqual(
+            rows['other-endpoint'], ['4', '-', '-', '-', '100.00', '0.00'])
+
+    def test_percentiles_are_weighted(self):
+        # Ten sampled requests (each standing for ten) outweigh the rest.
+        for _ in range(10):
+            LogEntryFactory(
+                endpoint_name='sampled-endpoint', duration=0.5,
+                status_code=200, sample_rate=0.1)
+        for _ in range(10):
+            LogEntryFactory(
+                endpoint_name='sampled-endpoint', duration=0.001,
+                status_code=200)
+        rows = self.get_rows()
+        self.assertEqual(
+            rows['sampled-endpoint'],
+            ['110', '500.0', '500.0', '500.0', '0.00', '0.00'])
+
+    def test_per_account(self):
+        out = StringIO()
+        call_command(
+            'api_log_stats', '--group-by', 'endpoint-account', stdout=out)
+        self.assertIn(
+            'sample-endpoint / account {0}'.format(
+                self.account_member.api_account_id),
+            out.getvalue())
+
+    def test_window(self):
+        rows = self.get_rows('--hours', '72')
+        self.assertEqual(rows['sample-endpoint'][0], '101')
+        rows = self.get_rows(
+            '--since', (now() - timedelta(days=3)).isoformat(),
+            '--until', (now() - timedelta(days=1)).isoformat())
+        self.assertEqual(list(rows), ['sample-endpoint'])
+        self.assertEqual(rows['sample-endpoint'][0], '1')
+
+    def test_empty_window(self):
+        out = StringIO()
+        call_command(
+            'api_log_stats', '--since', '2000-01-01', '--until', '2000-01-02',
+            stdout=out)
+        self.assertEqual(out.getvalue(), 'No log entries in this window.\n')
+
+    def test_invalid_datetime(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                'api_log_stats', '--since', 'yesterday', stdout=StringIO())
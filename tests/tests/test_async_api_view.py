@@ -0,0 +1,126 @@
+from asyncio import gather, sleep
+from gc import collect
+from json import loads
+from threading import Thread
+from unittest.mock import patch
+
+from pronym_api.models import LogEntry
+from pronym_api.test_utils.api_testcase import PronymApiTestCase
+from pronym_api.views import AsyncApiView
+from pronym_api.views.async_api_view import _thread_state, run_in_event_loop
+from pronym_api.views.processor import Processor
+from pronym_api.views.serializer import Serializer
+
+from tests.test_views.authenticated_sample import (
+    AuthenticatedSampleApiView)
+
+
+class GatheringProcessor(Processor):
+    # How many service calls were in flight at once, at most.
+    max_in_flight = 0
+    in_flight = 0
+
+    async def process(self):
+        # Three 50ms calls to other services, made concurrently.
+        return await gather(*[self.call_service(index) for index in range(3)])
+
+    async def call_service(self, index):
+        cls = type(self)
+        cls.in_flight += 1
+        cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        await sleep(0.05)
+        cls.in_flight -= 1
+        return index
+
+
+class AsyncSerializer(Serializer):
+    async def serialize(self):
+        await sleep(0)
+        return {'results': self.processing_artifact}
+
+
+class GatheringApiView(AsyncApiView):
+    endpoint_name = 'gathering'
+    methods = {
+        'GET': {
+            'processor': GatheringProcessor,
+            'serializer': AsyncSerializer
+        }
+    }
+
+
+class AsyncSampleApiView(AsyncApiView):
+    endpoint_name = AuthenticatedSampleApiView.endpoint_name
+    methods = AuthenticatedSampleApiView.methods
+    redacted_response_payload_fields = ['chonus']
+
+
+class AsyncApiViewTest(PronymApiTestCase):
+    view_class = AsyncSampleApiView
+
+    valid_data = {
+        'name': 'Gregg',
+        'email': 'gregg@mail.com'
+    }
+
+    def test_async_hooks(self):
+        GatheringProcessor.max_in_flight = 0
+        response = self.get(view=GatheringApiView.as_view())
+        self.assertEqual(loads(response.content), {'results': [0, 1, 2]})
+        # The service calls overlapped.
+        self.assertEqual(GatheringProcessor.max_in_flight, 3)
+        entry = self.account_member.log_entries.get()
+        self.assertGreaterEqual(entry.processing_duration, 0.05)
+
+    def test_sync_hooks_match_the_sync_view(self):
+        response = self.post()
+        sync_response = self.post(
+            view=AuthenticatedSampleApiView.as_view())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, sync_response.content)
+        entries = self.account_member.log_entries.order_by('id')
+        self.assertEqual(
+            entries[0].response_payload, entries[1].response_payload)
+
+    def test_status_codes(self):
+        self.assertEqual(self.post(data={}).status_code, 400)
+        self.assertEqual(self.post(data='{qqqq').status_code, 400)
+        self.assertEqual(self.post(auth_token='bogus').status_code, 401)
+        response = self.put()
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, POST')
+
+    def test_event_loop_is_reused(self):
+        self.post()
+        loop = _thread_state.thread_loop.loop
+        self.post()
+        self.assertIs(_thread_state.thread_loop.loop, loop)
+        self.assertFalse(loop.is_running())
+
+    def test_event_loop_is_closed_with_its_thread(self):
+        loops = []
+
+        def run():
+            run_in_event_loop(sleep(0))
+            loops.append(_thread_state.thread_loop.loop)
+
+        thread = Thread(target=run)
+        thread.start()
+        thread.join()
+        collect()
+        self.assertTrue(loops[0].is_closed())
+
+    def test_authentication_is_timed(self):
+        self.assertEqual(self.post(auth_token='bogus').status_code, 401)
+        self.assertIsNotNone(
+            LogEntry.objects.get().authentication_duration)
+
+    def test_unexpected_errors_propagate(self):
+        with patch.object(
+                AsyncSampleApiView, 'validate_request',
+                side_effect=KeyError('boom')):
+            with self.assertRaises(KeyError):
+                self.post()
+
+    def test_csrf_exempt(self):
+        self.assertTrue(AsyncSampleApiView.as_view().csrf_exempt)
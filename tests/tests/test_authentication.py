@@ -57,3 +57,17 @@ class AuthenticationApiTest(PronymApiTestCase):
             new_token = self.make_new_token(**{field: '6'})
             response = self.post(auth_token=new_token)
             self.assertEqual(response.status_code, 401)
+
+    def test_inactive_account_should_401(self):
+        api_account = self.account_member.api_account
+        api_account.is_active = False
+        api_account.save()
+        response = self.post()
+        self.assertEqual(response.status_code, 401)
+
+    def test_authenticated_request_query_count(self):
+        # One query to authenticate (whitelist entry, member, user and
+        # account together) and one to write the log entry.
+        with self.assertNumQueries(2):
+            response = self.post()
+        self.assertEqual(response.status_code, 200)
@@ -1,5 +1,7 @@
 from json import loads
 
+from django.test import override_settings
+
 from pronym_api.api.get_token import GetTokenApiView
 from pronym_api.test_utils.api_testcase import PronymApiTestCase
 from tests.test_views.authenticated_sample import (
@@ -46,3 +48,11 @@ class GetTokenTest(PronymApiTestCase):
             auth_token=response_data['token'],
             use_authentication=True)
         self.assertEqual(response.status_code, 200)
+
+    @override_settings(TOKEN_REUSE_MINUTES_REMAINING=10)
+    def test_login_reuses_unexpired_token(self):
+        first_token = loads(self.post().content)['token']
+        second_token = loads(self.post().content)['token']
+        self.assertEqual(first_token, second_token)
+        self.assertEqual(
+            self.account_member.token_whitelist_entries.count(), 1)
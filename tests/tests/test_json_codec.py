@@ -0,0 +1,103 @@
+from datetime import datetime
+from decimal import Decimal
+from json import JSONDecodeError, loads
+from unittest import skipIf
+from uuid import UUID
+
+from django.test import SimpleTestCase, override_settings
+from django.utils.timezone import utc
+
+from pronym_api.test_utils.api_testcase import PronymApiTestCase
+from pronym_api.views import codec
+from pronym_api.views.codec import (
+    OrjsonJsonCodec, StdlibJsonCodec, get_json_codec)
+
+from tests.test_views.authenticated_sample import (
+    AuthenticatedSampleApiView)
+
+
+class StdlibCodecSampleApiView(AuthenticatedSampleApiView):
+    json_codec = 'stdlib'
+
+
+class JsonCodecTestCase(SimpleTestCase):
+    value = {
+        'when': datetime(2020, 1, 2, 3, 4, 5, 678901, tzinfo=utc),
+        'amount': Decimal('1.50'),
+        'id': UUID('12345678-1234-5678-1234-567812345678'),
+        'items': [1, 2.5, None, True, 'ünïcode'],
+        3: 'non-string key'
+    }
+    expected = {
+        'when': '2020-01-02T03:04:05.678Z',
+        'amount': '1.50',
+        'id': '12345678-1234-5678-1234-567812345678',
+        'items': [1, 2.5, None, True, 'ünïcode'],
+        '3': 'non-string key'
+    }
+
+    def check_codec(self, json_codec):
+        encoded = json_codec.encode(self.value)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(loads(encoded), self.expected)
+        self.assertEqual(json_codec.decode(encoded), self.expected)
+        self.assertEqual(
+            json_codec.decode(encoded.decode('utf-8')), self.expected)
+        with self.assertRaises(JSONDecodeError):
+            json_codec.decode(b'{qqqq')
+
+    def test_stdlib(self):
+        self.check_codec(StdlibJsonCodec())
+
+    @skipIf(codec.orjson is None, 'orjson is not installed')
+    def test_orjson(self):
+        self.check_codec(OrjsonJsonCodec())
+
+    @skipIf(codec.orjson is None, 'orjson is not installed')
+    def test_orjson_falls_back_to_stdlib(self):
+        value = {'big': 2 ** 70, 'deep': []}
+        for _ in range(300):
+            value['deep'] = [value['deep']]
+        self.assertEqual(
+            OrjsonJsonCodec().encode(value), StdlibJsonCodec().encode(value))
+
+    @skipIf(codec.orjson is None, 'orjson is not installed')
+    def test_orjson_encodes_non_finite_floats_as_null(self):
+        value = {'nan': float('nan'), 'inf': float('inf'), 'ninf': -1e400}
+        self.assertEqual(
+            loads(OrjsonJsonCodec().encode(value)),
+            {'nan': None, 'inf': None, 'ninf': None})
+        self.assertEqual(
+            StdlibJsonCodec().encode(value),
+            b'{"nan": NaN, "inf": Infinity, "ninf": -Infinity}')
+
+    def test_default_codec(self):
+        self.assertIsInstance(
+            get_json_codec(),
+            StdlibJsonCodec if codec.orjson is None else OrjsonJsonCodec)
+
+    @override_settings(API_JSON_CODEC='stdlib')
+    def test_setting(self):
+        self.assertIsInstance(get_json_codec(), StdlibJsonCodec)
+
+    def test_dotted_path(self):
+        self.assertIs(
+            get_json_codec('pronym_api.views.codec.StdlibJsonCodec'),
+            get_json_codec('stdlib'))
+
+
+class JsonCodecApiTest(PronymApiTestCase):
+    view_class = StdlibCodecSampleApiView
+
+    valid_data = {
+        'name': 'Gregg',
+        'email': 'gregg@mail.com'
+    }
+
+    def test_view_codec(self):
+        response = self.post()
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(
+            response.content,
+            StdlibJsonCodec().encode(
+                {'my_data': 'Gregg gregg@mail.com', 'chonus': 5}))
@@ -0,0 +1,72 @@
+from hashlib import sha256
+from json import dumps, loads
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from pronym_api.test_utils.api_testcase import PronymApiTestCase
+from pronym_api.views.codec import get_json_codec
+
+from tests.test_views.authenticated_sample import (
+    AuthenticatedSampleApiView)
+
+
+class CappedSampleApiView(AuthenticatedSampleApiView):
+    max_logged_request_bytes = 20
+    max_logged_response_bytes = 30
+
+
+class UnredactedCappedSampleApiView(CappedSampleApiView):
+    redacted_request_payload_fields = []
+    redacted_response_payload_fields = []
+
+
+class LogPayloadCapApiTest(PronymApiTestCase):
+    view_class = CappedSampleApiView
+
+    def setUp(self):
+        PronymApiTestCase.setUp(self)
+        self.data = {'name': 'Gregg', 'email': 'gregg@mail.com'}
+        self.body = dumps(self.data).encode('utf-8')
+
+    def test_large_payloads_are_summarized(self):
+        codec = get_json_codec()
+        with patch.object(codec, 'encode', wraps=codec.encode) as encode:
+            self.post(data=self.data)
+        entry = self.account_member.log_entries.get()
+        request_payload = loads(entry.request_payload)
+        self.assertEqual(request_payload, {
+            'truncated': True,
+            'length': len(self.body),
+            'sha256': sha256(self.body).hexdigest()
+        })
+        response_payload = loads(entry.response_payload)
+        self.assertTrue(response_payload['truncated'])
+        # Redacted fields can't be scrubbed from a prefix, so there isn't
+        # one.
+        self.assertNotIn('prefix', response_payload)
+        # Only the response, the summaries and the headers were encoded.
+        self.assertEqual(encode.call_count, 4)
+
+    def test_prefix_is_logged_without_redaction(self):
+        self.post(
+            data=self.data, view=UnredactedCappedSampleApiView.as_view())
+        entry = self.account_member.log_entries.get()
+        self.assertEqual(
+            loads(entry.request_payload)['prefix'],
+            self.body[:20].decode('utf-8'))
+        self.assertEqual(len(loads(entry.response_payload)['prefix']), 30)
+
+    @override_settings(API_LOG_MAX_PAYLOAD_BYTES=1000)
+    def test_small_payloads_are_logged_in_full(self):
+        self.post(
+            data=self.data, view=AuthenticatedSampleApiView.as_view())
+        entry = self.account_member.log_entries.get()
+        self.assertEqual(loads(entry.request_payload)['name'], 'Gregg')
+
+    @override_settings(API_LOG_MAX_PAYLOAD_BYTES=10)
+    def test_setting_applies_to_every_view(self):
+        self.post(
+            data=self.data, view=AuthenticatedSampleApiView.as_view())
+        entry = self.account_member.log_entries.get()
+        self.assertTrue(loads(entry.request_payload)['truncated'])
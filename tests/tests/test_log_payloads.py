@@ -0,0 +1,175 @@
+import os
+
+from datetime import timedelta
+from io import StringIO
+from json import loads
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db.models.functions import Length
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from pronym_api.models import LogEntry, LogPayload
+from pronym_api.payload_store import PayloadStore, get_payload_store
+from pronym_api.test_utils.api_testcase import PronymApiTestCase
+from pronym_api.test_utils.factories import LogEntryFactory
+
+from tests.test_views.authenticated_sample import (
+    AuthenticatedSampleApiView)
+
+
+class DeduplicatingSampleApiView(AuthenticatedSampleApiView):
+    deduplicate_logged_payloads = True
+
+
+class PayloadDeduplicationApiTest(PronymApiTestCase):
+    view_class = DeduplicatingSampleApiView
+
+    def setUp(self):
+        PronymApiTestCase.setUp(self)
+        get_payload_store().clear()
+        self.data = {'name': 'Gregg ' * 200, 'email': 'gregg@mail.com'}
+
+    def get_stored_length(self):
+        entry_lengths = LogEntry.objects.aggregate(
+            request=Sum(Length('request_payload')),
+            response=Sum(Length('response_payload')),
+            request_digest=Sum(Length('request_payload_digest')),
+            response_digest=Sum(Length('response_payload_digest')))
+        payload_length = LogPayload.objects.aggregate(
+            content=Sum(Length('content')))['content'] or 0
+        return sum(
+            length or 0 for length in entry_lengths.values()) + \
+            payload_length
+
+    def test_identical_payloads_are_stored_once(self):
+        for _ in range(20):
+            self.post(data=dict(self.data))
+        self.assertEqual(LogPayload.objects.count(), 2)
+        for entry in self.account_member.log_entries.all():
+            self.assertEqual(entry.request_payload, '')
+            self.assertEqual(loads(entry.get_request_payload()), self.data)
+            self.assertEqual(
+                loads(entry.get_response_payload())['chonus'], '******')
+        self.assertEqual(get_payload_store().get_stats()['misses'], 2)
+
+    def test_storage_shrinks(self):
+        for _ in range(50):
+            self.post(data=dict(self.data))
+        deduplicated_length = self.get_stored_length()
+        LogEntry.objects.all().delete()
+        LogPayload.objects.all().delete()
+        with patch.object(
+                DeduplicatingSampleApiView, 'deduplicate_logged_payloads',
+                False):
+            for _ in range(50):
+                self.post(data=dict(self.data))
+        self.assertEqual(LogPayload.objects.count(), 0)
+        self.assertLess(deduplicated_length * 10, self.get_stored_length())
+
+    def test_repeats_skip_the_insert(self):
+        self.post(data=dict(self.data))
+        with patch.object(LogPayload.objects, 'store') as store:
+            self.post(data=dict(self.data))
+        store.assert_not_called()
+
+    def test_short_payloads_are_stored_inline(self):
+        self.post(data={'name': 'Gregg'})
+        entry = self.account_member.log_entries.get()
+        self.assertIsNone(entry.request_payload_digest)
+        self.assertEqual(loads(entry.request_payload), {'name': 'Gregg'})
+        self.assertEqual(
+            entry.get_request_payload(), entry.request_payload)
+
+    @override_settings(API_LOG_DEDUPLICATE_PAYLOADS=True)
+    def test_setting(self):
+        self.view_class = AuthenticatedSampleApiView
+        self.post(data=dict(self.data))
+        self.assertIsNotNone(
+            self.account_member.log_entries.get().request_payload_digest)
+
+
+class PayloadStoreTestCase(TestCase):
+    def test_lru_eviction(self):
+        store = PayloadStore(2)
+        contents = [str(index) * 100 for index in range(3)]
+        for content in contents:
+            store.store(content)
+        self.assertEqual(len(store), 2)
+        store.store(contents[0])
+        self.assertEqual(store.get_stats()['misses'], 4)
+        store.store(contents[2])
+        self.assertEqual(store.get_stats()['hits'], 1)
+        self.assertEqual(LogPayload.objects.count(), 3)
+
+    def test_digests_expire(self):
+        store = PayloadStore(2, max_age=0)
+        store.store('a' * 100)
+        store.store('a' * 100)
+        self.assertEqual(store.get_stats()['hits'], 0)
+        self.assertEqual(LogPayload.objects.count(), 1)
+
+
+class PrunePayloadsTestCase(TestCase):
+    def setUp(self):
+        old = now() - timedelta(days=10)
+        self.old_digest = LogPayload.objects.store('old' * 30)
+        self.shared_digest = LogPayload.objects.store('shared' * 30)
+        LogPayload.objects.update(datetime_added=old)
+        LogEntryFactory(
+            datetime_added=old,
+            request_payload='',
+            request_payload_digest=self.old_digest)
+        LogEntryFactory(
+            datetime_added=old,
+            response_payload='',
+            response_payload_digest=self.shared_digest)
+        self.new_entry = LogEntryFactory(
+            request_payload='',
+            request_payload_digest=self.shared_digest)
+        # Not referenced yet, but too new to prune.
+        self.new_digest = LogPayload.objects.store('new' * 30)
+
+    def test_unreferenced_payloads_are_pruned(self):
+        out = StringIO()
+        call_command('prune_api_logs', '--days', '5', stdout=out)
+        self.assertIn('Removed 1 unreferenced payloads.', out.getvalue())
+        self.assertEqual(
+            set(LogPayload.objects.values_list('digest', flat=True)),
+            {self.shared_digest, self.new_digest})
+        self.assertEqual(
+            self.new_entry.get_request_payload(), 'shared' * 30)
+
+    def test_stored_again_payloads_are_kept(self):
+        LogPayload.objects.store('old' * 30)
+        LogEntry.objects.filter(request_payload_digest=self.old_digest)\
+            .delete()
+        call_command('prune_api_logs', '--days', '5', stdout=StringIO())
+        self.assertTrue(
+            LogPayload.objects.filter(digest=self.old_digest).exists())
+
+    def test_grace_window(self):
+        LogPayload.objects.filter(digest=self.new_digest).update(
+            datetime_added=now() - timedelta(hours=1))
+        LogPayload.objects.prune_unreferenced(now())
+        self.assertTrue(
+            LogPayload.objects.filter(digest=self.new_digest).exists())
+
+    def test_archive_includes_payloads(self):
+        with TemporaryDirectory() as directory:
+            archive_path = os.path.join(directory, 'archive.jsonl')
+            call_command(
+                'prune_api_logs', '--days', '5', '--archive', archive_path,
+                stdout=StringIO())
+            with open(archive_path) as archive_file:
+                rows = [loads(line) for line in archive_file]
+        self.assertEqual(
+            sorted(
+                row['request_payload'] + row['response_payload']
+                for row in rows),
+            sorted([
+                'old' * 30 + '{"response": 5}',
+                '{"data": 4}' + 'shared' * 30]))
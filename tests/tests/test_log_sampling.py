@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+from pronym_api.models import LogEntry
+from pronym_api.test_utils.api_testcase import PronymApiTestCase
+
+from tests.test_views.authenticated_sample import (
+    AuthenticatedSampleApiView)
+
+
+class SampledSampleApiView(AuthenticatedSampleApiView):
+    log_sample_rates = {'2xx': 0.25}
+
+
+class LogSamplingApiTest(PronymApiTestCase):
+    view_class = SampledSampleApiView
+
+    valid_data = {
+        'name': 'Gregg',
+        'email': 'gregg@mail.com'
+    }
+
+    @patch('pronym_api.views.api_view.random', return_value=0.5)
+    def test_skipped_request_is_not_logged(self, random_):
+        with patch.object(
+                SampledSampleApiView, 'get_redacted_header_str') as header_:
+            response = self.get()
+        self.assertEqual(response.status_code, 200)
+        header_.assert_not_called()
+        self.assertEqual(LogEntry.objects.count(), 0)
+
+    @patch('pronym_api.views.api_view.random', return_value=0.1)
+    def test_sampled_request_records_rate(self, random_):
+        self.get()
+        self.assertEqual(LogEntry.objects.get().sample_rate, 0.25)
+
+    @patch('pronym_api.views.api_view.random', return_value=0.99)
+    def test_unlisted_status_class_is_always_logged(self, random_):
+        self.get(data={})
+        entry = LogEntry.objects.get()
+        self.assertEqual(entry.status_code, 400)
+        self.assertEqual(entry.sample_rate, 1)
+
+    @patch('pronym_api.views.api_view.random', return_value=0.99)
+    def test_writes_are_always_logged(self, random_):
+        self.post()
+        self.assertEqual(LogEntry.objects.get().sample_rate, 1)
+
+    @patch('pronym_api.views.api_view.random', return_value=0.99)
+    def test_account_override(self, random_):
+        account_id = self.account_member.api_account_id
+        with patch.object(
+                SampledSampleApiView, 'account_log_sample_rates',
+                {account_id: {'2xx': 1}}):
+            self.get()
+        self.assertEqual(LogEntry.objects.count(), 1)
@@ -0,0 +1,174 @@
+import os
+
+from json import loads
+from tempfile import TemporaryDirectory
+from time import monotonic, sleep
+from unittest.mock import patch
+
+from django.core.checks import run_checks
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from pronym_api.log_writer import (
+    BatchedLogWriter, JsonLinesLogWriter, LoggingLogWriter, get_log_record,
+    get_log_writer)
+from pronym_api.models import LogEntry
+from pronym_api.test_utils.api_testcase import PronymApiTestCase
+from pronym_api.test_utils.factories import (
+    ApiAccountMemberFactory, LogEntryFactory)
+
+from tests.test_views.authenticated_sample import (
+    AuthenticatedSampleApiView)
+
+
+class JsonLinesLogWriterTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'requests.jsonl')
+        self.pid_path = os.path.join(
+            self.directory.name, 'requests-{pid}.jsonl')
+        self.member = ApiAccountMemberFactory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_entry(self):
+        return LogEntryFactory.build(authenticated_profile=self.member)
+
+    def read_lines(self, path=None):
+        with open(path or self.path) as log_file:
+            return [loads(line) for line in log_file]
+
+    def test_buffers_records(self):
+        writer = JsonLinesLogWriter(self.path, buffer_size=2)
+        writer.write(self.make_entry())
+        self.assertFalse(os.path.exists(self.path))
+        writer.write(self.make_entry())
+        records = self.read_lines()
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['endpoint_name'], 'sample-endpoint')
+        self.assertEqual(
+            records[0]['authenticated_profile_id'], self.member.id)
+        writer.stop()
+
+    def test_flush_interval(self):
+        writer = JsonLinesLogWriter(
+            self.path, buffer_size=100, flush_interval=0.01)
+        writer.start()
+        writer.write(self.make_entry())
+        # The background thread writes the record without another write.
+        deadline = monotonic() + 5
+        while not os.path.exists(self.path) and monotonic() < deadline:
+            sleep(0.01)
+        self.assertEqual(len(self.read_lines()), 1)
+        writer.stop(timeout=5)
+
+    def test_rotation_requires_per_process_path(self):
+        with self.assertRaises(ImproperlyConfigured):
+            JsonLinesLogWriter(self.path, max_bytes=1000)
+        writer = JsonLinesLogWriter(self.pid_path, buffer_size=1)
+        writer.write(self.make_entry())
+        writer.stop()
+        self.assertEqual(
+            os.listdir(self.directory.name),
+            ['requests-{0}.jsonl'.format(os.getpid())])
+
+    def test_reopens_moved_file(self):
+        writer = JsonLinesLogWriter(self.path, buffer_size=1)
+        writer.write(self.make_entry())
+        # Rotated by another process, or by logrotate.
+        os.rename(self.path, self.path + '.1')
+        writer.write(self.make_entry())
+        writer.stop()
+        self.assertEqual(len(self.read_lines()), 1)
+        self.assertEqual(len(self.read_lines(self.path + '.1')), 1)
+
+    def test_rotates_by_size(self):
+        writer = JsonLinesLogWriter(
+            self.pid_path, buffer_size=1, max_bytes=1)
+        for _ in range(3):
+            writer.write(self.make_entry())
+        writer.stop()
+        file_names = os.listdir(self.directory.name)
+        self.assertEqual(len(file_names), 3)
+        for file_name in file_names:
+            self.assertEqual(
+                len(self.read_lines(
+                    os.path.join(self.directory.name, file_name))),
+                1)
+
+    def test_rotates_by_age(self):
+        writer = JsonLinesLogWriter(
+            self.pid_path, buffer_size=1, max_age=0)
+        writer.write(self.make_entry())
+        writer.write(self.make_entry())
+        writer.stop()
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+
+    @patch('pronym_api.log_writer.os.fsync')
+    def test_fsync_policies(self, fsync_):
+        writer = JsonLinesLogWriter(self.path, buffer_size=2)
+        writer.write(self.make_entry())
+        writer.write(self.make_entry())
+        fsync_.assert_not_called()
+        writer = JsonLinesLogWriter(
+            self.path, fsync=JsonLinesLogWriter.FSYNC_ALWAYS)
+        writer.write(self.make_entry())
+        self.assertEqual(fsync_.call_count, 1)
+        writer.stop()
+
+
+class LoggingLogWriterTestCase(TestCase):
+    def test_write(self):
+        entry = LogEntryFactory.build(
+            authenticated_profile=ApiAccountMemberFactory())
+        with self.assertLogs('pronym_api.requests', 'INFO') as logs:
+            LoggingLogWriter().write(entry)
+        self.assertEqual(
+            loads(logs.records[0].getMessage())['status_code'], 200)
+        self.assertEqual(
+            logs.records[0].api_log_record, get_log_record(entry))
+
+
+class EndpointLogWriterApiTest(PronymApiTestCase):
+    view_class = AuthenticatedSampleApiView
+
+    valid_data = {
+        'name': 'Gregg',
+        'email': 'gregg@mail.com'
+    }
+
+    @override_settings(
+        API_LOG_WRITERS={
+            'default': {'BACKEND': 'pronym_api.log_writer.SyncLogWriter'},
+            'logger': {'BACKEND': 'pronym_api.log_writer.LoggingLogWriter'}
+        },
+        API_LOG_ENDPOINT_WRITERS={'sample-api': 'logger'})
+    def test_endpoint_writer_setting(self):
+        self.assertIsInstance(get_log_writer('sample-api'), LoggingLogWriter)
+        with self.assertLogs('pronym_api.requests', 'INFO') as logs:
+            self.post()
+        self.assertEqual(LogEntry.objects.count(), 0)
+        record = logs.records[0].api_log_record
+        self.assertEqual(record['endpoint_name'], 'sample-api')
+        self.assertEqual(
+            loads(record['request_payload'])['name'], 'Gregg')
+
+    @override_settings(API_LOG_ENDPOINT_WRITERS={'sample-api': 'missing'})
+    def test_unknown_endpoint_writer(self):
+        errors = [
+            error for error in run_checks()
+            if error.id == 'pronym_api.E001']
+        self.assertEqual(len(errors), 1)
+        self.assertIn("'missing'", errors[0].msg)
+        with self.assertRaises(ImproperlyConfigured):
+            get_log_writer('sample-api')
+
+    def test_replaced_writer_is_stopped(self):
+        with override_settings(API_LOG_WRITER='batched'):
+            writer = get_log_writer()
+        with patch.object(writer, 'stop') as stop_:
+            get_log_writer()
+        stop_.assert_called_once_with(5)
+        self.assertIsInstance(writer, BatchedLogWriter)
+        writer.stop()
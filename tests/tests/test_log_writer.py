@@ -0,0 +1,106 @@
+from time import monotonic, sleep
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from pronym_api.log_writer import (
+    BatchedLogWriter, SyncLogWriter, get_log_writer)
+from pronym_api.models import LogEntry
+from pronym_api.test_utils.factories import (
+    ApiAccountMemberFactory, LogEntryFactory)
+
+
+class LogWriterTestCase(TestCase):
+    def setUp(self):
+        self.member = ApiAccountMemberFactory()
+
+    def make_entries(self, count):
+        return [
+            LogEntryFactory.build(authenticated_profile=self.member)
+            for _ in range(count)]
+
+    def test_sync_by_default(self):
+        writer = get_log_writer()
+        self.assertIsInstance(writer, SyncLogWriter)
+        writer.write(self.make_entries(1)[0])
+        self.assertEqual(LogEntry.objects.count(), 1)
+
+    @override_settings(API_LOG_WRITER='batched')
+    @patch.object(BatchedLogWriter, 'start')
+    def test_batched_setting(self, start_):
+        self.assertIsInstance(get_log_writer(), BatchedLogWriter)
+        start_.assert_called_once_with()
+
+    def test_flush_uses_bulk_create(self):
+        writer = BatchedLogWriter(batch_size=2)
+        for entry in self.make_entries(3):
+            writer.write(entry)
+        self.assertEqual(writer.queue_depth, 3)
+        self.assertEqual(LogEntry.objects.count(), 0)
+        with patch.object(
+                LogEntry.objects, 'bulk_create',
+                wraps=LogEntry.objects.bulk_create) as bulk_create_:
+            writer.flush()
+        self.assertEqual(bulk_create_.call_count, 2)
+        self.assertEqual(LogEntry.objects.count(), 3)
+        self.assertEqual(
+            writer.get_stats(),
+            {'queue_depth': 0, 'written': 3, 'dropped': 0, 'failed': 0})
+
+    def test_overflow_drop(self):
+        writer = BatchedLogWriter(
+            max_queue_size=1, overflow=BatchedLogWriter.OVERFLOW_DROP)
+        for entry in self.make_entries(3):
+            writer.write(entry)
+        self.assertEqual(writer.queue_depth, 1)
+        self.assertEqual(writer.dropped, 2)
+        self.assertEqual(LogEntry.objects.count(), 0)
+
+    def test_overflow_sync(self):
+        writer = BatchedLogWriter(
+            max_queue_size=1, overflow=BatchedLogWriter.OVERFLOW_SYNC)
+        for entry in self.make_entries(3):
+            writer.write(entry)
+        self.assertEqual(writer.queue_depth, 1)
+        self.assertEqual(LogEntry.objects.count(), 2)
+
+    def test_failed_batch_is_counted(self):
+        writer = BatchedLogWriter()
+        for entry in self.make_entries(2):
+            writer.write(entry)
+        with patch.object(
+                LogEntry.objects, 'bulk_create', side_effect=Exception):
+            writer.flush()
+        self.assertEqual(writer.failed, 2)
+
+    def test_background_thread_drains_queue(self):
+        writer = BatchedLogWriter(batch_size=2, flush_interval=0.01)
+        batches = []
+        with patch.object(
+                BatchedLogWriter, '_save_batch',
+                lambda self, batch: batches.append(batch)):
+            for entry in self.make_entries(3):
+                writer.write(entry)
+            writer.start()
+            writer.stop(timeout=5)
+        self.assertEqual(sorted(len(batch) for batch in batches), [1, 2])
+        self.assertEqual(writer.queue_depth, 0)
+
+    def test_background_thread_closes_old_connections(self):
+        writer = BatchedLogWriter(batch_size=2, flush_interval=0.01)
+        results = iter([True, False])
+        with patch('pronym_api.log_writer.close_old_connections') as close_, \
+                patch.object(
+                    BatchedLogWriter, '_save_batch',
+                    lambda self, batch: next(results)):
+            for entry in self.make_entries(3):
+                writer.write(entry)
+            writer.start()
+            # Let the thread take both batches before stopping it.
+            deadline = monotonic() + 5
+            while writer.queue_depth and monotonic() < deadline:
+                sleep(0.01)
+            writer.stop(timeout=5)
+        # Before each of the two batches, after the failed one and on
+        # exit.
+        self.assertEqual(close_.call_count, 4)
@@ -1,11 +1,27 @@
-from json import loads
+from importlib import import_module
+from json import dumps, loads
+from unittest.mock import patch
+
+from django.apps import apps
+
+from pronym_api.models import LogEntry
 
 from pronym_api.test_utils.api_testcase import PronymApiTestCase
+from pronym_api.test_utils.factories import LogEntryFactory
+from pronym_api.views.codec import get_json_codec
 
 from tests.test_views.authenticated_sample import (
     AuthenticatedSampleApiView)
 
 
+class AllowlistedHeaderSampleApiView(AuthenticatedSampleApiView):
+    logged_headers = ['http_user_agent', 'http_authorization']
+
+
+class DenylistedHeaderSampleApiView(AuthenticatedSampleApiView):
+    unlogged_headers = ['http_user_agent']
+
+
 class LoggingApiTest(PronymApiTestCase):
     view_class = AuthenticatedSampleApiView
 
@@ -26,10 +42,8 @@ class LoggingApiTest(PronymApiTestCase):
         self.assertEqual(entry.port, 80)
         self.assertTrue(entry.is_authenticated)
         self.assertEqual(entry.request_method, 'POST')
-        print(entry.request_headers)
-        self.assertIn(
-            'HTTP_AUTHORIZATION=******',
-            entry.request_headers)
+        self.assertEqual(
+            loads(entry.request_headers)['HTTP_AUTHORIZATION'], '******')
         self.assertEqual(
             loads(entry.request_payload),
             {'name': 'Gregg', 'email': 'gregg@mail.com', 'color': '******'}
@@ -38,3 +52,108 @@ class LoggingApiTest(PronymApiTestCase):
             loads(entry.response_payload),
             {'my_data': 'Gregg gregg@mail.com', 'chonus': '******'}
         )
+
+    def test_response_is_not_decoded_for_logging(self):
+        with patch.object(get_json_codec(), 'decode') as decode:
+            self.get(color='red')
+        decode.assert_not_called()
+        entry = self.account_member.log_entries.get()
+        self.assertEqual(
+            loads(entry.response_payload),
+            {'my_data': 'Gregg gregg@mail.com', 'chonus': '******'}
+        )
+
+    def test_timings_and_sizes_are_logged(self):
+        response = self.post()
+        entry = self.account_member.log_entries.get()
+        self.assertGreater(entry.duration, 0)
+        for phase_duration in (
+                entry.authentication_duration, entry.validation_duration,
+                entry.processing_duration, entry.serialization_duration):
+            self.assertGreaterEqual(phase_duration, 0)
+            self.assertLessEqual(phase_duration, entry.duration)
+        self.assertEqual(
+            entry.request_bytes, len(dumps(self.valid_data).encode()))
+        self.assertEqual(entry.response_bytes, len(response.content))
+
+    def test_unreached_phases_are_not_timed(self):
+        self.post(data={})
+        entry = self.account_member.log_entries.get()
+        self.assertIsNotNone(entry.validation_duration)
+        self.assertIsNone(entry.processing_duration)
+        self.assertIsNone(entry.serialization_duration)
+
+    def test_should_log_validation_error_response(self):
+        self.post(data={})
+        entry = self.account_member.log_entries.get()
+        self.assertEqual(entry.status_code, 400)
+        self.assertIn('name', loads(entry.response_payload)['errors'])
+
+    def post_with_headers(self, view_class=None, **headers):
+        headers.update(self.get_authentication_headers())
+        request = self.request_factory.post(
+            '/', data=dict(self.valid_data), content_type='application/json',
+            **headers)
+        return (view_class or self.view_class).as_view()(request)
+
+    def test_only_http_headers_are_logged(self):
+        self.post_with_headers(HTTP_USER_AGENT='tester')
+        headers = loads(self.account_member.log_entries.get().request_headers)
+        self.assertEqual(headers['HTTP_USER_AGENT'], 'tester')
+        self.assertEqual(headers['CONTENT_TYPE'], 'application/json')
+        self.assertNotIn('wsgi.input', headers)
+        self.assertNotIn('SERVER_NAME', headers)
+
+    def test_header_allowlist(self):
+        self.post_with_headers(
+            AllowlistedHeaderSampleApiView,
+            HTTP_USER_AGENT='tester', HTTP_X_OTHER='other')
+        headers = loads(self.account_member.log_entries.get().request_headers)
+        self.assertEqual(
+            headers,
+            {'HTTP_USER_AGENT': 'tester', 'HTTP_AUTHORIZATION': '******'})
+
+    def test_header_denylist(self):
+        self.post_with_headers(
+            DenylistedHeaderSampleApiView,
+            HTTP_USER_AGENT='tester', HTTP_X_OTHER='other')
+        headers = loads(self.account_member.log_entries.get().request_headers)
+        self.assertNotIn('HTTP_USER_AGENT', headers)
+        self.assertEqual(headers['HTTP_X_OTHER'], 'other')
+
+    def test_header_storage_size(self):
+        self.post_with_headers(HTTP_USER_AGENT='tester')
+        entry = self.account_member.log_entries.get()
+        # This is how the same request's headers used to be stored.
+        request = self.request_factory.post(
+            '/', data=dict(self.valid_data), content_type='application/json',
+            HTTP_USER_AGENT='tester', HTTP_AUTHORIZATION='******')
+        legacy_headers = "\n".join(
+            "{0}={1}".format(name, value)
+            for name, value in request.META.items())
+        self.assertLess(
+            len(entry.request_headers) * 2, len(legacy_headers))
+        # Existing rows are converted by the migration.
+        legacy_entry = LogEntryFactory(request_headers=legacy_headers)
+        migration = import_module('pronym_api.migrations.0012_auto')
+        migration.convert_request_headers(apps, None)
+        legacy_entry.refresh_from_db()
+        self.assertEqual(
+            loads(legacy_entry.request_headers),
+            loads(entry.request_headers))
+        self.assertEqual(
+            LogEntry.objects.filter(request_headers__contains='wsgi').count(),
+            0)
+
+    def test_response_data_is_not_carried_over(self):
+        view_instance = self.view_class()
+
+        def view(request):
+            view_instance.setup(request)
+            return view_instance.dispatch(request)
+
+        self.post(view=view)
+        self.post(view=view, use_authentication=False)
+        entry = LogEntry.objects.latest('id')
+        self.assertEqual(entry.status_code, 401)
+        self.assertEqual(entry.response_payload, '')
@@ -0,0 +1,101 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, SimpleTestCase
+
+from pronym_api.views import ApiView
+from pronym_api.views.method_handler import MethodHandler
+from pronym_api.views.processor import NullProcessor
+from pronym_api.views.serializer import NullSerializer
+from pronym_api.views.validator import NullValidator
+
+from tests.test_views import authenticated_sample as sample
+from tests.test_views.authenticated_sample import (
+    AuthenticatedSampleApiView)
+
+
+class MethodHandlerTestCase(SimpleTestCase):
+    def test_methods_are_compiled(self):
+        self.assertEqual(
+            AuthenticatedSampleApiView.method_handlers['POST'],
+            MethodHandler(
+                sample.TestValidator, sample.TestProcessor,
+                sample.TestSerializer))
+        self.assertEqual(
+            AuthenticatedSampleApiView.allowed_methods_header, 'GET, POST')
+
+    def test_missing_classes_default_to_null(self):
+        class PartialApiView(ApiView):
+            methods = {'DELETE': {'processor': sample.TestProcessor}}
+
+        self.assertEqual(
+            PartialApiView.method_handlers['DELETE'],
+            MethodHandler(
+                NullValidator, sample.TestProcessor, NullSerializer))
+
+    def test_handlers_are_read_only(self):
+        with self.assertRaises(TypeError):
+            AuthenticatedSampleApiView.method_handlers['PUT'] = \
+                MethodHandler(NullValidator, NullProcessor, NullSerializer)
+
+    def test_invalid_request_method(self):
+        for method in ('post', 'FETCH', None):
+            with self.assertRaises(ImproperlyConfigured):
+                type('InvalidApiView', (ApiView,), {
+                    'methods': {method: {}}})
+
+    def test_unknown_component(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'procesor'):
+            class InvalidApiView(ApiView):
+                methods = {'GET': {'procesor': sample.TestProcessor}}
+
+    def test_component_must_be_a_class(self):
+        with self.assertRaises(ImproperlyConfigured):
+            class InvalidApiView(ApiView):
+                methods = {'GET': {'processor': 'TestProcessor'}}
+
+    def test_methods_must_be_a_dictionary(self):
+        with self.assertRaises(ImproperlyConfigured):
+            class InvalidApiView(ApiView):
+                methods = [('GET', {})]
+
+    def test_replaced_methods_are_recompiled(self):
+        class ReplacedApiView(ApiView):
+            methods = {'GET': {}}
+
+        ReplacedApiView.methods = {'PUT': {}}
+        self.assertEqual(
+            list(ReplacedApiView().get_method_handlers()), ['PUT'])
+        self.assertEqual(ReplacedApiView.allowed_methods_header, 'PUT')
+
+    def test_methods_passed_to_as_view(self):
+        class OpenApiView(ApiView):
+            require_authentication = False
+            log_requests = False
+            methods = {'POST': {}}
+
+        view = OpenApiView.as_view(methods={
+            'GET': {'serializer': sample.TestSerializer}})
+        request_factory = RequestFactory()
+        response = view(request_factory.get('/'))
+        self.assertEqual(response.status_code, 200)
+        response = view(request_factory.post('/'))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET')
+        # The class's own methods are unchanged.
+        self.assertEqual(list(OpenApiView.method_handlers), ['POST'])
+
+    def test_invalid_methods_passed_to_as_view(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ApiView.as_view(methods={'GET': {'procesor': NullProcessor}})
+
+    def test_unhandled_method_falls_back_to_null_classes(self):
+        class PermissiveApiView(ApiView):
+            methods = {'GET': {}}
+
+            def check_method_allowed(self):
+                return True
+
+        view = PermissiveApiView()
+        view.request = RequestFactory().put('/')
+        self.assertIs(view.get_processor_class(), NullProcessor)
+        self.assertIs(view.get_serializer_class(), NullSerializer)
+        self.assertIs(view.get_validator_class(), NullValidator)
@@ -0,0 +1,113 @@
+from datetime import datetime
+from threading import Event
+from unittest.mock import patch
+
+import pytz
+
+from django.db import DatabaseError, IntegrityError, transaction
+from django.test import TestCase
+
+from pronym_api.metrics import MetricsAccumulator, get_metrics_accumulator
+from pronym_api.models import EndpointMetric, LogEntry
+from pronym_api.test_utils.api_testcase import PronymApiTestCase
+from pronym_api.test_utils.factories import ApiAccountFactory
+
+from tests.test_views.authenticated_sample import (
+    AuthenticatedSampleApiView)
+
+
+def fake_now():
+    return pytz.UTC.localize(datetime(2019, 1, 1, 12, 30, 45))
+
+
+class MetricsOnlySampleApiView(AuthenticatedSampleApiView):
+    log_requests = False
+    record_metrics = True
+
+
+@patch('pronym_api.metrics.now', fake_now)
+class MetricsAccumulatorTestCase(TestCase):
+    def test_record_and_flush(self):
+        account = ApiAccountFactory()
+        accumulator = MetricsAccumulator(flush_interval=60)
+        accumulator.record('sample', account.id, 200, 0.5, 100)
+        accumulator.record('sample', account.id, 201, 0.25, 50)
+        accumulator.record('sample', account.id, 404, 0.1, 10)
+        self.assertEqual(EndpointMetric.objects.count(), 0)
+        accumulator.flush()
+        accumulator.record('sample', account.id, 200, 1, 1)
+        accumulator.flush()
+        metric = EndpointMetric.objects.get(status_class=2)
+        self.assertEqual(metric.api_account, account)
+        self.assertEqual(metric.minute, fake_now().replace(second=0))
+        self.assertEqual(metric.count, 3)
+        self.assertEqual(metric.total_latency, 1.75)
+        self.assertEqual(metric.total_bytes, 151)
+        self.assertEqual(
+            EndpointMetric.objects.get(status_class=4).count, 1)
+
+    def test_anonymous_rows_are_deduplicated(self):
+        accumulator = MetricsAccumulator(flush_interval=60)
+        for _ in range(2):
+            accumulator.record('sample', None, 200, 0.5, 100)
+            accumulator.flush()
+        self.assertEqual(EndpointMetric.objects.get().count, 2)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            EndpointMetric.objects.create(
+                endpoint_name='sample', status_class=2,
+                minute=fake_now().replace(second=0))
+
+    def test_failed_flush_keeps_counters(self):
+        accumulator = MetricsAccumulator(flush_interval=60)
+        accumulator.record('sample', None, 200, 0.5, 100)
+        accumulator.record('sample', None, 500, 0.5, 100)
+        with patch.object(
+                EndpointMetric.objects, 'increment',
+                side_effect=[None, DatabaseError]):
+            self.assertFalse(accumulator.flush())
+        self.assertEqual(accumulator.failed_flushes, 1)
+        accumulator.record('sample', None, 500, 0.5, 100)
+        self.assertTrue(accumulator.flush())
+        self.assertEqual(
+            EndpointMetric.objects.get(status_class=5).count, 2)
+
+    def test_record_does_not_write(self):
+        accumulator = MetricsAccumulator(flush_interval=0)
+        with self.assertNumQueries(0):
+            accumulator.record('sample', None, 200, 0.5, 100)
+
+    def test_background_thread_flushes(self):
+        accumulator = MetricsAccumulator(flush_interval=0)
+        flushed = Event()
+        with patch.object(
+                MetricsAccumulator, 'flush', side_effect=flushed.set):
+            accumulator.start()
+            self.assertTrue(flushed.wait(5))
+            accumulator.stop(timeout=5)
+
+
+class MetricsApiTest(PronymApiTestCase):
+    view_class = MetricsOnlySampleApiView
+
+    valid_data = {
+        'name': 'Gregg',
+        'email': 'gregg@mail.com'
+    }
+
+    def test_metrics_without_raw_log(self):
+        get_metrics_accumulator().flush()
+        self.post()
+        get_metrics_accumulator().flush()
+        self.assertEqual(LogEntry.objects.count(), 0)
+        metric = EndpointMetric.objects.get()
+        self.assertEqual(metric.endpoint_name, 'sample-api')
+        self.assertEqual(
+            metric.api_account_id, self.account_member.api_account_id)
+        self.assertEqual(metric.count, 1)
+        self.assertGreater(metric.total_bytes, 0)
+        self.assertGreater(metric.total_latency, 0)
+
+    def test_disabled_by_default(self):
+        self.post(view=AuthenticatedSampleApiView.as_view())
+        get_metrics_accumulator().flush()
+        self.assertEqual(EndpointMetric.objects.count(), 0)
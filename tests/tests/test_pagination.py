@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta
+from json import loads
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import utc
+
+from pronym_api.models import ApiAccount, LogEntry
+from pronym_api.test_utils.api_testcase import PronymApiTestCase
+from pronym_api.test_utils.factories import ApiAccountFactory, LogEntryFactory
+from pronym_api.views import ApiView, AsyncApiView
+from pronym_api.views.pagination import (
+    PaginatedQuerysetProcessor, PaginatedSerializer, PaginationValidator)
+
+
+class AccountPageProcessor(PaginatedQuerysetProcessor):
+    ordering = ('-is_active', 'name')
+    max_page_size = 10
+
+    def get_queryset(self):
+        return ApiAccount.objects.all()
+
+
+class LogEntryPageProcessor(PaginatedQuerysetProcessor):
+    ordering = ('-datetime_added',)
+
+    def get_queryset(self):
+        return LogEntry.objects.filter(endpoint_name='sample-endpoint')\
+            .values('id', 'datetime_added')
+
+
+class AccountPageSerializer(PaginatedSerializer):
+    def serialize_item(self, item):
+        return item.name
+
+
+class AccountPageApiView(ApiView):
+    endpoint_name = 'account-page'
+    log_requests = False
+    methods = {
+        'GET': {
+            'validator': PaginationValidator,
+            'processor': AccountPageProcessor,
+            'serializer': AccountPageSerializer
+        }
+    }
+
+
+class LogEntryPageApiView(AccountPageApiView):
+    methods = {
+        'GET': {
+            'validator': PaginationValidator,
+            'processor': LogEntryPageProcessor,
+            'serializer': PaginatedSerializer
+        }
+    }
+
+
+class AsyncAccountPageApiView(AsyncApiView):
+    endpoint_name = 'account-page'
+    log_requests = False
+    methods = AccountPageApiView.methods
+
+
+class OtherAccountPageApiView(AccountPageApiView):
+    endpoint_name = 'other-account-page'
+
+
+class PaginationApiTest(PronymApiTestCase):
+    view_class = AccountPageApiView
+
+    def setUp(self):
+        PronymApiTestCase.setUp(self)
+        for index in range(24):
+            ApiAccountFactory(
+                name='Account {0:02d}'.format(index),
+                is_active=index % 3 != 0)
+        self.expected = list(
+            ApiAccount.objects.order_by('-is_active', 'name')
+            .values_list('name', flat=True))
+
+    def get_page(self, view=None, **data):
+        response = self.send_request('get', data=data, view=view)
+        return response, loads(response.content)
+
+    def get_all_pages(self, view=None, **data):
+        results = []
+        pages = 0
+        while True:
+            response, page = self.get_page(view=view, **data)
+            self.assertEqual(response.status_code, 200)
+            results += page['results']
+            pages += 1
+            if not page['has_more']:
+                self.assertIsNone(page['next_cursor'])
+                return results, pages
+            data['cursor'] = page['next_cursor']
+
+    def test_pages(self):
+        results, pages = self.get_all_pages(page_size=4)
+        self.assertEqual(results, self.expected)
+        self.assertEqual(pages, 7)
+
+    def test_page_size_is_capped(self):
+        response, page = self.get_page(page_size=1000)
+        self.assertEqual(len(page['results']), 10)
+        response, page = self.get_page()
+        self.assertEqual(len(page['results']), 10)
+
+    @override_settings(API_MAX_PAGE_SIZE=3)
+    def test_page_size_setting(self):
+        response, page = self.get_page(
+            view=LogEntryPageApiView.as_view(), page_size=5)
+        self.assertEqual(page['results'], [])
+        LogEntryFactory.create_batch(4)
+        response, page = self.get_page(
+            view=LogEntryPageApiView.as_view(), page_size=5)
+        self.assertEqual(len(page['results']), 3)
+
+    def test_invalid_page_size(self):
+        response, page = self.get_page(page_size=0)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('page_size', page['errors'])
+
+    def test_tampered_cursor(self):
+        response, page = self.get_page(page_size=2)
+        cursor = page['next_cursor']
+        for bad_cursor in (cursor[:-1] + 'x', 'garbage'):
+            response, page = self.get_page(cursor=bad_cursor)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(page['errors'], {'cursor': ['Invalid cursor.']})
+
+    def test_async_view(self):
+        results, pages = self.get_all_pages(
+            view=AsyncAccountPageApiView.as_view(), page_size=5)
+        self.assertEqual(results, self.expected)
+        response, page = self.get_page(
+            view=AsyncAccountPageApiView.as_view(), cursor='garbage')
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_from_another_ordering(self):
+        LogEntryFactory.create_batch(3)
+        response, page = self.get_page(
+            view=LogEntryPageApiView.as_view(), page_size=1)
+        response, page = self.get_page(cursor=page['next_cursor'])
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_from_another_endpoint(self):
+        response, page = self.get_page(
+            view=OtherAccountPageApiView.as_view(), page_size=2)
+        self.assertEqual(response.status_code, 200)
+        response, page = self.get_page(cursor=page['next_cursor'])
+        self.assertEqual(response.status_code, 400)
+
+    def test_deep_pages_cost_the_same(self):
+        response, page = self.get_page(page_size=2)
+        with CaptureQueriesContext(connection) as first_page:
+            self.get_page(page_size=2)
+        data = {'page_size': 2}
+        for _ in range(10):
+            response, page = self.get_page(**data)
+            data['cursor'] = page['next_cursor']
+        with CaptureQueriesContext(connection) as deep_page:
+            self.get_page(**data)
+        self.assertEqual(len(first_page), len(deep_page))
+        page_query = deep_page.captured_queries[-1]['sql']
+        self.assertIn('LIMIT 3', page_query)
+        self.assertNotIn('OFFSET', page_query)
+        self.assertNotIn('COUNT', page_query)
+
+    def test_descending_datetimes_at_full_precision(self):
+        started = datetime(2020, 1, 1, tzinfo=utc)
+        for index in range(9):
+            # Several entries in each millisecond.
+            LogEntryFactory(
+                datetime_added=started + timedelta(microseconds=index * 300))
+        results, pages = self.get_all_pages(
+            view=LogEntryPageApiView.as_view(), page_size=2)
+        self.assertEqual(
+            [result['id'] for result in results],
+            list(LogEntry.objects.order_by('-datetime_added', '-pk')
+                 .values_list('id', flat=True)))
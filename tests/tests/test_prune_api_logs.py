@@ -0,0 +1,55 @@
+import os
+
+from datetime import timedelta
+from io import StringIO
+from json import loads
+from tempfile import TemporaryDirectory
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from pronym_api.models import LogEntry
+from pronym_api.test_utils.factories import LogEntryFactory
+
+
+class PruneApiLogsTestCase(TestCase):
+    def setUp(self):
+        current_time = now()
+        # Old entries spread over a few hours, with a long gap before the
+        # oldest.
+        self.old_entries = [
+            LogEntryFactory(
+                datetime_added=current_time - timedelta(days=10, hours=hours))
+            for hours in (0, 1, 2, 2, 200)]
+        self.new_entry = LogEntryFactory(datetime_added=current_time)
+
+    def test_prune(self):
+        removed_count = LogEntry.objects.prune(
+            now() - timedelta(days=5), batch_size=1)
+        self.assertEqual(removed_count, 5)
+        self.assertEqual(list(LogEntry.objects.all()), [self.new_entry])
+
+    @override_settings(API_LOG_RETENTION_DAYS=5)
+    def test_command_uses_retention_setting(self):
+        out = StringIO()
+        call_command('prune_api_logs', stdout=out)
+        self.assertIn('Removed 5 log entries', out.getvalue())
+        self.assertEqual(LogEntry.objects.count(), 1)
+
+    def test_command_requires_retention(self):
+        with self.assertRaises(CommandError):
+            call_command('prune_api_logs', stdout=StringIO())
+
+    def test_command_archives_before_deleting(self):
+        with TemporaryDirectory() as directory:
+            archive_path = os.path.join(directory, 'archive.jsonl')
+            call_command(
+                'prune_api_logs', '--days', '5', '--archive', archive_path,
+                stdout=StringIO())
+            with open(archive_path) as archive_file:
+                rows = [loads(line) for line in archive_file]
+        self.assertEqual(
+            sorted(row['id'] for row in rows),
+            sorted(entry.id for entry in self.old_entries))
+        self.assertEqual(rows[0]['endpoint_name'], 'sample-endpoint')
@@ -0,0 +1,51 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.timezone import now
+
+from pronym_api.models import TokenWhitelistEntry
+from pronym_api.test_utils.factories import TokenWhitelistEntryFactory
+
+
+class PruneTokensTestCase(TestCase):
+    def setUp(self):
+        expired_dt = now() - timedelta(
+            minutes=settings.TOKEN_EXPIRATION_MINUTES + 1)
+        self.expired = [
+            TokenWhitelistEntryFactory(datetime_added=expired_dt)
+            for _ in range(5)]
+        self.live = TokenWhitelistEntryFactory()
+
+    @patch('pronym_api.models.token_whitelist_entry.sleep')
+    def test_clear_expired_tokens_in_batches(self, sleep_):
+        removed_count = TokenWhitelistEntry.objects.clear_expired_tokens(
+            batch_size=2, pause=0.5)
+        self.assertEqual(removed_count, 5)
+        # Batches of 2, 2 and 1, with a pause after each full batch.
+        self.assertEqual(sleep_.call_count, 2)
+        sleep_.assert_called_with(0.5)
+        self.assertEqual(
+            list(TokenWhitelistEntry.objects.all()), [self.live])
+
+    def test_command(self):
+        out = StringIO()
+        call_command('prune_tokens', '--batch-size', '2', stdout=out)
+        self.assertIn('Removed 5 expired tokens', out.getvalue())
+        self.assertEqual(TokenWhitelistEntry.objects.count(), 1)
+
+    @patch('pronym_api.management.commands.prune_tokens.'
+           'close_old_connections')
+    @patch('pronym_api.management.commands.prune_tokens.sleep')
+    def test_command_loop(self, sleep_, close_old_connections_):
+        sleep_.side_effect = [None, KeyboardInterrupt]
+        out = StringIO()
+        with self.assertRaises(KeyboardInterrupt):
+            call_command(
+                'prune_tokens', '--loop', '--interval', '5', stdout=out)
+        sleep_.assert_called_with(5)
+        self.assertEqual(out.getvalue().count('Removed'), 2)
+        self.assertEqual(close_old_connections_.call_count, 2)
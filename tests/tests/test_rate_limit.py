@@ -0,0 +1,125 @@
+from threading import Thread
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import override_settings
+
+from pronym_api.models import LogEntry
+from pronym_api.test_utils.api_testcase import PronymApiTestCase
+from pronym_api.test_utils.factories import ApiAccountMemberFactory
+from pronym_api.views.rate_limit import RateLimit
+
+from tests.test_views.authenticated_sample import (
+    AuthenticatedSampleApiView)
+from tests.test_views.unauthenticated_sample import (
+    UnauthenticatedSampleApiView)
+
+
+class RateLimitedSampleApiView(AuthenticatedSampleApiView):
+    rate_limit = RateLimit(2, 60)
+
+
+class RateLimitedUnauthenticatedSampleApiView(UnauthenticatedSampleApiView):
+    rate_limit = RateLimit(1, 60)
+
+
+class RateLimitTestCase(PronymApiTestCase):
+    view_class = RateLimitedSampleApiView
+
+    valid_data = {
+        'name': 'Gregg',
+        'email': 'gregg@mail.com'
+    }
+
+    def setUp(self):
+        PronymApiTestCase.setUp(self)
+        cache.clear()
+
+    def test_endpoint_limit(self):
+        for _ in range(2):
+            self.assertEqual(self.post().status_code, 200)
+        with patch.object(
+                AuthenticatedSampleApiView, 'validate_request') as validate_:
+            response = self.post()
+        self.assertEqual(response.status_code, 429)
+        # Until enough of this window has slid out of the last minute.
+        self.assertIn(int(response['Retry-After']), range(1, 91))
+        validate_.assert_not_called()
+        # Throttled requests aren't logged.
+        self.assertEqual(LogEntry.objects.count(), 2)
+
+    def test_limits_are_per_account(self):
+        for _ in range(2):
+            self.post()
+        other_member = ApiAccountMemberFactory()
+        other_token = other_member.create_whitelist_entry().encode()
+        response = self.post(auth_token=other_token)
+        self.assertEqual(response.status_code, 200)
+
+    def test_unauthenticated_limit_by_source_ip(self):
+        view = RateLimitedUnauthenticatedSampleApiView.as_view()
+        response = self.get(use_authentication=False, view=view)
+        self.assertEqual(response.status_code, 200)
+        response = self.get(use_authentication=False, view=view)
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(API_ACCOUNT_RATE_LIMIT=(1, 10))
+    def test_account_limit_across_endpoints(self):
+        response = self.post(view=AuthenticatedSampleApiView.as_view())
+        self.assertEqual(response.status_code, 200)
+        response = self.post()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(int(response['Retry-After']), range(1, 21))
+
+    @override_settings(API_ACCOUNT_RATE_LIMIT=(1, 10))
+    def test_rejected_requests_are_not_counted(self):
+        self.assertEqual(self.post().status_code, 200)
+        self.assertEqual(self.post().status_code, 429)
+        # The second request was turned away by the account limit, so it
+        # didn't use up the endpoint's second request either.
+        with override_settings(API_ACCOUNT_RATE_LIMIT=None):
+            self.assertEqual(self.post().status_code, 200)
+
+    def test_window_slides(self):
+        rate_limit = RateLimit(2, 60)
+        with patch('pronym_api.views.rate_limit.time', return_value=1000):
+            self.assertEqual(rate_limit.consume('counter'), 0)
+            self.assertEqual(rate_limit.consume('counter'), 0)
+            # Halfway through the next window, which starts at 1020, only
+            # one of these two still counts.
+            self.assertAlmostEqual(rate_limit.consume('counter'), 50)
+        with patch('pronym_api.views.rate_limit.time', return_value=1050):
+            self.assertEqual(rate_limit.consume('counter'), 0)
+            self.assertAlmostEqual(rate_limit.consume('counter'), 30)
+        with patch('pronym_api.views.rate_limit.time', return_value=1080):
+            self.assertEqual(rate_limit.consume('counter'), 0)
+
+    def test_no_burst_at_window_boundary(self):
+        rate_limit = RateLimit(2, 60)
+        with patch('pronym_api.views.rate_limit.time', return_value=1019):
+            self.assertEqual(rate_limit.consume('counter'), 0)
+            self.assertEqual(rate_limit.consume('counter'), 0)
+        with patch('pronym_api.views.rate_limit.time', return_value=1021):
+            self.assertGreater(rate_limit.consume('counter'), 0)
+
+    def test_check_does_not_count(self):
+        rate_limit = RateLimit(1, 60)
+        with patch('pronym_api.views.rate_limit.time', return_value=1000):
+            for _ in range(2):
+                self.assertEqual(rate_limit.check('counter'), 0)
+            self.assertEqual(rate_limit.consume('counter'), 0)
+            self.assertGreater(rate_limit.check('counter'), 0)
+
+    def test_concurrent_requests_do_not_overdraw(self):
+        rate_limit = RateLimit(50, 60)
+        allowed = []
+        threads = [
+            Thread(target=lambda: allowed.append(
+                rate_limit.consume('counter') == 0))
+            for _ in range(100)]
+        with patch('pronym_api.views.rate_limit.time', return_value=1000):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(allowed.count(True), 50)
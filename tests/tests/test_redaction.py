@@ -0,0 +1,92 @@
+from json import loads
+
+from django.test import SimpleTestCase
+
+from pronym_api.test_utils.api_testcase import PronymApiTestCase
+from pronym_api.views.redaction import (
+    MAX_CACHED_PLANS, RedactionPlan, get_redaction_plan)
+
+from tests.test_views.authenticated_sample import (
+    AuthenticatedSampleApiView)
+
+
+class RedactionPlanTestCase(SimpleTestCase):
+    def setUp(self):
+        self.payload = {
+            'password': 'secret',
+            'profile': {'name': 'Gregg', 'token': 'abc'},
+            'items': [
+                {'card': {'number': '4111', 'brand': 'visa'}},
+                {'card': {'number': '5500', 'brand': 'mc'}},
+                {'note': 'no card'}
+            ],
+            'untouched': {'deep': [1, 2, 3]}
+        }
+
+    def test_top_level_field(self):
+        redacted = RedactionPlan(['password'], 'X').redact(self.payload)
+        self.assertEqual(redacted['password'], 'X')
+        self.assertEqual(self.payload['password'], 'secret')
+
+    def test_nested_and_wildcard_paths(self):
+        plan = RedactionPlan(['profile.token', 'items.*.card.number'], 'X')
+        redacted = plan.redact(self.payload)
+        self.assertEqual(redacted['profile'], {'name': 'Gregg', 'token': 'X'})
+        self.assertEqual(
+            [item.get('card', {}).get('number') for item in redacted['items']],
+            ['X', 'X', None])
+        self.assertEqual(redacted['items'][0]['card']['brand'], 'visa')
+        # The original is left alone.
+        self.assertEqual(self.payload['items'][0]['card']['number'], '4111')
+
+    def test_only_mutated_branches_are_copied(self):
+        plan = RedactionPlan(['items.0.card.number'], 'X')
+        redacted = plan.redact(self.payload)
+        self.assertIsNot(redacted['items'][0], self.payload['items'][0])
+        self.assertIs(redacted['items'][1], self.payload['items'][1])
+        self.assertIs(redacted['untouched'], self.payload['untouched'])
+        self.assertIs(redacted['profile'], self.payload['profile'])
+
+    def test_no_match_returns_original(self):
+        plan = RedactionPlan(['missing', 'items.*.missing'], 'X')
+        self.assertIs(plan.redact(self.payload), self.payload)
+
+    def test_wildcard_combines_with_explicit_key(self):
+        plan = RedactionPlan(['*.token', 'profile.name'], 'X')
+        redacted = plan.redact(self.payload)
+        self.assertEqual(redacted['profile'], {'name': 'X', 'token': 'X'})
+
+    def test_parent_path_wins(self):
+        plan = RedactionPlan(['profile.token', 'profile'], 'X')
+        self.assertEqual(plan.redact(self.payload)['profile'], 'X')
+        plan = RedactionPlan(['profile', 'profile.token'], 'X')
+        self.assertEqual(plan.redact(self.payload)['profile'], 'X')
+
+    def test_plans_are_compiled_once(self):
+        self.assertIs(
+            get_redaction_plan(('a.b',), 'X'),
+            get_redaction_plan(('a.b',), 'X'))
+
+    def test_plan_cache_is_bounded(self):
+        for index in range(MAX_CACHED_PLANS + 1):
+            get_redaction_plan(('field{0}'.format(index),), 'X')
+        self.assertEqual(
+            get_redaction_plan.cache_info().currsize, MAX_CACHED_PLANS)
+
+
+class NestedRedactionSampleApiView(AuthenticatedSampleApiView):
+    redacted_request_payload_fields = ['details.*.secret']
+
+
+class NestedRedactionApiTest(PronymApiTestCase):
+    view_class = NestedRedactionSampleApiView
+
+    def test_nested_request_fields_are_redacted(self):
+        self.post(data={
+            'name': 'Gregg',
+            'details': [{'secret': 1, 'public': 2}]
+        })
+        entry = self.account_member.log_entries.get()
+        self.assertEqual(
+            loads(entry.request_payload)['details'],
+            [{'secret': '******', 'public': 2}])
@@ -0,0 +1,75 @@
+from json import loads
+
+from django.test import override_settings
+
+from pronym_api.api.refresh_token import RefreshTokenApiView
+from pronym_api.models import TokenWhitelistEntry
+from pronym_api.test_utils.api_testcase import PronymApiTestCase
+from tests.test_views.authenticated_sample import (
+    AuthenticatedSampleApiView)
+
+
+class RevokingRefreshTokenApiView(RefreshTokenApiView):
+    delete_previous_token = True
+
+
+class RefreshTokenTest(PronymApiTestCase):
+    view_class = RefreshTokenApiView
+
+    def test_unauthenticated(self):
+        response = self.post(use_authentication=False)
+        self.assertEqual(response.status_code, 401)
+
+    def test_invalid_token(self):
+        response = self.post(auth_token='bogus')
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 200)
+        response_data = loads(response.content)
+        self.assertIn("expires", response_data)
+        self.assertNotEqual(response_data['token'], self.auth_token)
+        # Both the old and new tokens should still work.
+        for token in (self.auth_token, response_data['token']):
+            response = self.get(
+                data={'name': 'yo'},
+                view=AuthenticatedSampleApiView.as_view(),
+                auth_token=token)
+            self.assertEqual(response.status_code, 200)
+
+    def test_refresh_deleting_previous_token(self):
+        response = self.post(view=RevokingRefreshTokenApiView.as_view())
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            TokenWhitelistEntry.objects.filter(
+                id=self.whitelist_entry.id).exists())
+        self.assertIsNone(
+            TokenWhitelistEntry.objects.get_account_member_for_token(
+                self.auth_token))
+        new_token = loads(response.content)['token']
+        self.assertEqual(
+            TokenWhitelistEntry.objects.get_account_member_for_token(
+                new_token),
+            self.account_member)
+
+    @override_settings(TOKEN_MAX_ENTRIES_PER_MEMBER=1)
+    def test_refresh_respects_max_entries(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(TokenWhitelistEntry.objects.filter(
+                api_account_member=self.account_member)),
+            [TokenWhitelistEntry.objects.latest('id')])
+        self.assertIsNone(
+            TokenWhitelistEntry.objects.get_account_member_for_token(
+                self.auth_token))
+
+    @override_settings(TOKEN_REUSE_MINUTES_REMAINING=1)
+    def test_reused_token_is_not_deleted(self):
+        response = self.post(view=RevokingRefreshTokenApiView.as_view())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(loads(response.content)['token'], self.auth_token)
+        self.assertTrue(
+            TokenWhitelistEntry.objects.filter(
+                id=self.whitelist_entry.id).exists())
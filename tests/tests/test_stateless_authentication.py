@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from pronym_api.models import RevokedToken, TokenWhitelistEntry
+from pronym_api.test_utils.api_testcase import PronymApiTestCase
+from pronym_api.test_utils.factories import ApiAccountMemberFactory
+from pronym_api.token_revocation import get_revocation_set
+
+from tests.test_views.authenticated_sample import (
+    AuthenticatedSampleApiView)
+
+
+class StatelessSampleApiView(AuthenticatedSampleApiView):
+    stateless_authentication = True
+
+
+@override_settings(
+    TOKEN_REVOCATION_REFRESH_SECONDS=0, TOKEN_REVOCATION_TRACKING=True)
+class StatelessAuthenticationApiTest(PronymApiTestCase):
+    view_class = StatelessSampleApiView
+
+    valid_data = {
+        'name': 'Gregg',
+        'email': 'gregg@mail.com'
+    }
+
+    def setUp(self):
+        PronymApiTestCase.setUp(self)
+        self.revocation_set = get_revocation_set()
+        self.revocation_set.rebuild()
+
+    def test_authenticated_should_give_200(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 200)
+        entry = self.account_member.log_entries.get()
+        self.assertTrue(entry.is_authenticated)
+
+    def test_bad_credentials_should_give_401(self):
+        response = self.post(auth_token='bogus')
+        self.assertEqual(response.status_code, 401)
+
+    def test_whitelist_is_not_queried(self):
+        with override_settings(TOKEN_REVOCATION_REFRESH_SECONDS=60):
+            revocation_set = get_revocation_set()
+            revocation_set.rebuild()
+            # Only the log entry is written.
+            with self.assertNumQueries(1):
+                response = self.post()
+        self.assertEqual(response.status_code, 200)
+
+    def test_member_is_loaded_lazily(self):
+        member = TokenWhitelistEntry.objects\
+            .get_account_member_for_token_stateless(self.auth_token)
+        self.assertEqual(member, self.account_member)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                member.api_account_id, self.account_member.api_account_id)
+        self.assertEqual(member.user, self.account_member.user)
+
+    def test_revoked_token_should_give_401(self):
+        TokenWhitelistEntry.objects.clear_tokens_for_account_member(
+            self.account_member)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+        response = self.post()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(self.revocation_set), 1)
+
+    def test_deactivated_account_should_give_401(self):
+        api_account = self.account_member.api_account
+        api_account.is_active = False
+        api_account.save()
+        # Saving again shouldn't revoke the same entry twice.
+        api_account.save()
+        self.assertEqual(RevokedToken.objects.count(), 1)
+        response = self.post()
+        self.assertEqual(response.status_code, 401)
+
+    def test_expired_entries_are_not_recorded(self):
+        TokenWhitelistEntry.objects.clear_expired_tokens()
+        self.assertEqual(RevokedToken.objects.count(), 0)
+
+    @override_settings(STATELESS_TOKEN_AUTHENTICATION=True)
+    def test_enabled_by_setting(self):
+        view = AuthenticatedSampleApiView()
+        self.assertTrue(view.should_use_stateless_authentication())
+
+    def test_refresh_sees_revocations_committed_out_of_order(self):
+        self.revocation_set.refresh()
+        # A row added before the last refresh, but only committed after it.
+        RevokedToken.objects.create(
+            token_entropy=12345,
+            datetime_added=now() - timedelta(seconds=30),
+            datetime_expires=now() + timedelta(hours=1))
+        self.revocation_set.refresh()
+        self.assertTrue(self.revocation_set.is_revoked(12345))
+
+
+class UntrackedRevocationTest(TestCase):
+    def setUp(self):
+        self.account_member = ApiAccountMemberFactory()
+
+    def test_revocations_are_not_recorded(self):
+        TokenWhitelistEntry.objects.create_for_account_member(
+            self.account_member)
+        TokenWhitelistEntry.objects.clear_tokens_for_account_member(
+            self.account_member)
+        api_account = self.account_member.api_account
+        api_account.is_active = False
+        api_account.save()
+        self.assertEqual(RevokedToken.objects.count(), 0)
+
+    def test_active_account_save_does_not_query(self):
+        with self.assertNumQueries(1):
+            self.account_member.api_account.save()
+
+    def test_stateless_authentication_is_not_used(self):
+        self.assertFalse(StatelessSampleApiView()
+                         .should_use_stateless_authentication())
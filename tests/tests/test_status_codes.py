@@ -43,3 +43,4 @@ class StatusCodeApiTest(PronymApiTestCase):
     def test_unallowed_method_should_give_405(self):
         response = self.put()
         self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, POST')
@@ -0,0 +1,144 @@
+from json import loads
+from unittest.mock import patch
+
+from django.db.models.query import QuerySet
+from django.test import override_settings
+
+from pronym_api.models import ApiAccount, EndpointMetric
+from pronym_api.metrics import get_metrics_accumulator
+from pronym_api.test_utils.api_testcase import PronymApiTestCase
+from pronym_api.test_utils.factories import ApiAccountFactory
+from pronym_api.views import ApiView
+from pronym_api.views.processor import Processor
+from pronym_api.views.serializer import StreamingSerializer
+
+
+class AccountListProcessor(Processor):
+    def process(self):
+        return ApiAccount.objects.order_by('id')
+
+
+class AccountSerializer(StreamingSerializer):
+    chunk_size = 7
+    buffer_bytes = 100
+
+    def serialize_item(self, item):
+        return {'id': item.id, 'name': item.name}
+
+
+class NdjsonAccountSerializer(AccountSerializer):
+    output_format = StreamingSerializer.NDJSON
+
+
+class AccountListApiView(ApiView):
+    endpoint_name = 'account-list'
+    methods = {
+        'GET': {
+            'processor': AccountListProcessor,
+            'serializer': AccountSerializer
+        },
+        'POST': {
+            'processor': AccountListProcessor,
+            'serializer': NdjsonAccountSerializer
+        }
+    }
+
+
+class RedactedAccountListApiView(AccountListApiView):
+    redacted_response_payload_fields = ['*.name']
+
+
+class StreamingApiTest(PronymApiTestCase):
+    view_class = AccountListApiView
+
+    def setUp(self):
+        PronymApiTestCase.setUp(self)
+        ApiAccountFactory.create_batch(29)
+        self.expected = [
+            {'id': account.id, 'name': account.name}
+            for account in ApiAccount.objects.order_by('id')]
+
+    def test_json_array(self):
+        with patch.object(
+                QuerySet, 'iterator', autospec=True,
+                side_effect=QuerySet.iterator) as iterator:
+            response = self.get()
+            self.assertTrue(response.streaming)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            chunks = list(response.streaming_content)
+        self.assertEqual(iterator.call_args[1], {'chunk_size': 7})
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(loads(b''.join(chunks)), self.expected)
+
+    def test_ndjson(self):
+        response = self.post()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        content = b''.join(response.streaming_content)
+        self.assertTrue(content.endswith(b'\n'))
+        self.assertEqual(
+            [loads(line) for line in content.splitlines()], self.expected)
+
+    def test_empty(self):
+        view = AccountListApiView()
+        for serializer_cls, expected in (
+                (AccountSerializer, b'[]'), (NdjsonAccountSerializer, b'')):
+            serializer = serializer_cls(
+                view, None, ApiAccount.objects.none())
+            self.assertEqual(b''.join(serializer.stream()), expected)
+
+    def test_logged_once_closed(self):
+        response = self.get()
+        content = b''.join(response.streaming_content)
+        self.assertFalse(self.account_member.log_entries.exists())
+        response.close()
+        entry = self.account_member.log_entries.get()
+        self.assertEqual(entry.response_bytes, len(content))
+        self.assertGreaterEqual(entry.duration, 0)
+        summary = loads(entry.response_payload)
+        self.assertEqual(summary['items'], 30)
+        self.assertEqual(summary['length'], len(content))
+        self.assertEqual(summary['prefix'], content[:1024].decode('utf-8'))
+
+    def test_abandoned_stream_is_logged(self):
+        response = self.get()
+        next(iter(response.streaming_content))
+        response.close()
+        summary = loads(self.account_member.log_entries.get().response_payload)
+        self.assertLess(summary['items'], 30)
+
+    def test_unstarted_stream_is_logged(self):
+        # The client went away before any of the body was sent.
+        self.get().close()
+        entry = self.account_member.log_entries.get()
+        self.assertEqual(entry.status_code, 200)
+        self.assertEqual(loads(entry.response_payload)['length'], 0)
+
+    def test_failed_stream_is_logged_as_an_error(self):
+        with patch.object(
+                AccountSerializer, 'serialize_item',
+                side_effect=ValueError('bad item')):
+            response = self.get()
+            with self.assertRaises(ValueError):
+                b''.join(response.streaming_content)
+            response.close()
+        entry = self.account_member.log_entries.get()
+        self.assertEqual(entry.status_code, 500)
+        self.assertIn('bad item', loads(entry.response_payload)['error'])
+
+    def test_redacted_stream_has_no_prefix(self):
+        response = self.get(view=RedactedAccountListApiView.as_view())
+        b''.join(response.streaming_content)
+        response.close()
+        summary = loads(self.account_member.log_entries.get().response_payload)
+        self.assertNotIn('prefix', summary)
+
+    @override_settings(API_RECORD_METRICS=True)
+    def test_metrics(self):
+        response = self.get()
+        content = b''.join(response.streaming_content)
+        response.close()
+        get_metrics_accumulator().flush()
+        self.assertEqual(
+            EndpointMetric.objects.get(endpoint_name='account-list')
+            .total_bytes,
+            len(content))
@@ -0,0 +1,225 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from pronym_api.models import TokenWhitelistEntry
+from pronym_api.test_utils.factories import (
+    ApiAccountMemberFactory, TokenWhitelistEntryFactory)
+from pronym_api.token_cache import (
+    LocalTokenCache, SharedTokenCache, get_token_cache)
+
+
+@override_settings(TOKEN_CACHE_SIZE=2)
+class TokenCacheTestCase(TestCase):
+    def setUp(self):
+        self.token_cache = get_token_cache()
+        self.token_cache.clear()
+        self.token_cache.hits = 0
+        self.token_cache.misses = 0
+        self.entry = TokenWhitelistEntryFactory()
+        self.token = self.entry.encode()
+
+    def lookup(self, token=None):
+        return TokenWhitelistEntry.objects.get_account_member_for_token(
+            token or self.token)
+
+    def test_disabled_by_default(self):
+        with override_settings(TOKEN_CACHE_SIZE=0):
+            self.assertIsNone(get_token_cache())
+
+    def test_hit_skips_queries(self):
+        member = self.lookup()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.lookup(), member)
+        self.assertEqual(self.token_cache.hits, 1)
+        self.assertEqual(self.token_cache.misses, 1)
+
+    def test_lru_eviction(self):
+        other_tokens = [
+            TokenWhitelistEntryFactory().encode() for _ in range(2)]
+        self.lookup()
+        for token in other_tokens:
+            self.lookup(token)
+        self.assertEqual(len(self.token_cache), 2)
+        self.assertIsNone(
+            self.token_cache.get(self.entry.token_entropy))
+
+    def test_expired_token_is_not_served(self):
+        self.lookup()
+        expired_dt = now() + timedelta(
+            minutes=settings.TOKEN_EXPIRATION_MINUTES + 1)
+        with patch('pronym_api.models.token_whitelist_entry.now',
+                   return_value=expired_dt):
+            self.assertIsNone(
+                self.token_cache.get(self.entry.token_entropy))
+
+    def test_invalidated_by_clear_tokens_for_account(self):
+        self.lookup()
+        TokenWhitelistEntry.objects.clear_tokens_for_account(
+            self.entry.api_account_member.api_account)
+        self.assertEqual(len(self.token_cache), 0)
+        self.assertIsNone(self.lookup())
+
+    def test_invalidated_by_clear_tokens_for_account_member(self):
+        self.lookup()
+        TokenWhitelistEntry.objects.clear_tokens_for_account_member(
+            self.entry.api_account_member)
+        self.assertEqual(len(self.token_cache), 0)
+        self.assertIsNone(self.lookup())
+
+    def test_invalidated_by_clear_expired_tokens(self):
+        self.lookup()
+        expired_dt = now() + timedelta(
+            minutes=settings.TOKEN_EXPIRATION_MINUTES + 1)
+        with patch('pronym_api.models.token_whitelist_entry.now',
+                   return_value=expired_dt):
+            TokenWhitelistEntry.objects.clear_expired_tokens()
+        self.assertEqual(len(self.token_cache), 0)
+
+    def test_invalidated_by_entry_delete(self):
+        self.lookup()
+        self.entry.delete()
+        self.assertEqual(len(self.token_cache), 0)
+        self.assertIsNone(self.lookup())
+
+    def test_invalidated_by_account_member_delete(self):
+        self.lookup()
+        self.entry.api_account_member.delete()
+        self.assertEqual(len(self.token_cache), 0)
+
+    def test_invalidated_by_account_deactivation(self):
+        self.lookup()
+        api_account = self.entry.api_account_member.api_account
+        api_account.is_active = False
+        api_account.save()
+        self.assertEqual(len(self.token_cache), 0)
+        self.assertIsNone(self.lookup())
+
+    def test_entry_read_before_invalidation_is_not_cached(self):
+        account_id = self.entry.api_account_member.api_account_id
+        generation = self.token_cache.get_generation(account_id)
+        self.token_cache.invalidate_account(account_id)
+        self.token_cache.set(self.entry, generation)
+        self.assertEqual(len(self.token_cache), 0)
+
+    def test_get_stats(self):
+        local_cache = LocalTokenCache(5)
+        member = ApiAccountMemberFactory()
+        entry = member.create_whitelist_entry()
+        local_cache.get(-1)
+        local_cache.set(entry, local_cache.get_generation(
+            member.api_account_id))
+        local_cache.get(entry.token_entropy)
+        self.assertEqual(
+            local_cache.get_stats(),
+            {'hits': 1, 'misses': 1, 'size': 1, 'max_size': 5})
+
+
+@override_settings(TOKEN_CACHE_ALIAS='default')
+class SharedTokenCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.token_cache = get_token_cache()
+        self.entry = TokenWhitelistEntryFactory()
+        self.token = self.entry.encode()
+
+    def lookup(self, token=None):
+        return TokenWhitelistEntry.objects.get_account_member_for_token(
+            token or self.token)
+
+    def test_selected_by_alias(self):
+        self.assertIsInstance(self.token_cache, SharedTokenCache)
+
+    def test_hit_skips_queries(self):
+        member = self.lookup()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.lookup(), member)
+
+    def test_visible_to_other_workers(self):
+        self.lookup()
+        other_worker_cache = SharedTokenCache('default')
+        self.assertEqual(
+            other_worker_cache.get(self.entry.token_entropy),
+            self.entry)
+
+    def test_clear_tokens_for_account_bumps_generation(self):
+        other_entry = TokenWhitelistEntryFactory(
+            api_account_member__api_account=self.entry
+            .api_account_member.api_account)
+        self.lookup()
+        self.lookup(other_entry.encode())
+        account = self.entry.api_account_member.api_account
+        TokenWhitelistEntry.objects.clear_tokens_for_account(account)
+        self.assertEqual(self.token_cache.get_generation(account.id), 1)
+        self.assertIsNone(self.token_cache.get(self.entry.token_entropy))
+        self.assertIsNone(self.token_cache.get(other_entry.token_entropy))
+        self.assertIsNone(self.lookup())
+
+    def test_invalidated_by_entry_delete(self):
+        self.lookup()
+        self.entry.delete()
+        self.assertIsNone(self.token_cache.get(self.entry.token_entropy))
+        self.assertIsNone(self.lookup())
+
+    def test_invalidated_by_account_member_delete(self):
+        self.lookup()
+        self.entry.api_account_member.delete()
+        self.assertIsNone(self.token_cache.get(self.entry.token_entropy))
+
+    def test_entry_read_before_delete_is_not_cached(self):
+        account_id = self.entry.api_account_member.api_account_id
+        generation = self.token_cache.get_generation(account_id)
+        # The entry is read, then deleted (say, by a refresh), and only
+        # then is it cached.
+        TokenWhitelistEntry.objects.filter(id=self.entry.id).delete()
+        self.token_cache.set(self.entry, generation)
+        self.assertIsNone(self.token_cache.get(self.entry.token_entropy))
+        self.assertIsNone(self.lookup())
+
+    def test_entry_read_before_invalidation_is_not_cached(self):
+        account_id = self.entry.api_account_member.api_account_id
+        generation = self.token_cache.get_generation(account_id)
+        # The entry is read, then its account's tokens are revoked, and
+        # only then is the entry cached.
+        TokenWhitelistEntry.objects.clear_tokens_for_account(
+            self.entry.api_account_member.api_account)
+        self.token_cache.set(self.entry, generation)
+        self.assertIsNone(self.token_cache.get(self.entry.token_entropy))
+
+    def test_model_instances_are_not_stored(self):
+        self.lookup()
+        cached = cache.get(
+            SharedTokenCache.ENTRY_KEY.format(self.entry.token_entropy))
+        self.assertEqual(
+            cached[1:],
+            (
+                self.entry.id, self.entry.datetime_added,
+                self.entry.api_account_member_id,
+                self.entry.api_account_member.api_account_id,
+                self.entry.api_account_member.user_id
+            ))
+
+    def test_hit_loads_ids(self):
+        self.lookup()
+        with self.assertNumQueries(0):
+            entry = self.token_cache.get(self.entry.token_entropy)
+            self.assertEqual(entry.datetime_added, self.entry.datetime_added)
+            self.assertEqual(
+                entry.api_account_member.api_account_id,
+                self.entry.api_account_member.api_account_id)
+
+    def test_hit_builds_user_and_account(self):
+        self.lookup()
+        member = self.entry.api_account_member
+        with self.assertNumQueries(0):
+            cached_member = self.token_cache.get(
+                self.entry.token_entropy).api_account_member
+            self.assertEqual(cached_member.user, member.user)
+            self.assertEqual(cached_member.api_account, member.api_account)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                cached_member.user.username, member.user.username)
@@ -4,7 +4,10 @@ from datetime import datetime, timedelta
 from unittest.mock import patch
 
 from django.conf import settings
-from django.test import TestCase
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 import jwt
 
@@ -75,6 +78,97 @@ class TokenWhitelistEntryManagerTestCase(TestCase):
         self.assertEqual(member2.token_whitelist_entries.count(), 3)
         self.assertEqual(member3.token_whitelist_entries.count(), 3)
 
+    def test_create_for_account_member(self):
+        member = ApiAccountMemberFactory()
+        with CaptureQueriesContext(connection) as context:
+            entry = TokenWhitelistEntry.objects.create_for_account_member(
+                member)
+        # Issuing a token is a single INSERT, with no lookup beforehand.
+        statements = [
+            query['sql'] for query in context.captured_queries
+            if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('INSERT'))
+        self.assertGreater(entry.token_entropy, 0)
+        self.assertLess(entry.token_entropy, 2 ** 63)
+
+    def test_create_for_account_member_retries_on_collision(self):
+        existing = TokenWhitelistEntryFactory()
+        member = ApiAccountMemberFactory()
+        with patch.object(
+                TokenWhitelistEntry, 'generate_token_entropy',
+                side_effect=[existing.token_entropy, 12345]):
+            entry = TokenWhitelistEntry.objects.create_for_account_member(
+                member)
+        self.assertEqual(entry.token_entropy, 12345)
+        self.assertEqual(member.token_whitelist_entries.count(), 1)
+
+    def test_issue_for_account_member_defaults_to_new_entry(self):
+        member = ApiAccountMemberFactory()
+        entry1 = TokenWhitelistEntry.objects.issue_for_account_member(member)
+        entry2 = TokenWhitelistEntry.objects.issue_for_account_member(member)
+        self.assertNotEqual(entry1, entry2)
+        self.assertEqual(member.token_whitelist_entries.count(), 2)
+
+    @override_settings(TOKEN_REUSE_MINUTES_REMAINING=30)
+    def test_issue_for_account_member_reuses_fresh_entry(self):
+        member = ApiAccountMemberFactory()
+        entry = TokenWhitelistEntry.objects.issue_for_account_member(member)
+        self.assertEqual(
+            TokenWhitelistEntry.objects.issue_for_account_member(member),
+            entry)
+        # An entry with less than 30 minutes of life left is not reused.
+        entry.datetime_added = fake_now() - timedelta(
+            minutes=settings.TOKEN_EXPIRATION_MINUTES - 29)
+        entry.save()
+        self.assertNotEqual(
+            TokenWhitelistEntry.objects.issue_for_account_member(member),
+            entry)
+        self.assertEqual(member.token_whitelist_entries.count(), 2)
+
+    @override_settings(TOKEN_MAX_ENTRIES_PER_MEMBER=0)
+    def test_issue_for_account_member_rejects_no_entries(self):
+        member = ApiAccountMemberFactory()
+        with self.assertRaises(ImproperlyConfigured):
+            TokenWhitelistEntry.objects.issue_for_account_member(member)
+        self.assertFalse(member.token_whitelist_entries.exists())
+
+    @override_settings(TOKEN_MAX_ENTRIES_PER_MEMBER=1)
+    def test_issue_for_account_member_keeps_new_entry(self):
+        member = ApiAccountMemberFactory()
+        # Added later than the new entry, e.g. by a server whose clock
+        # runs ahead.
+        TokenWhitelistEntryFactory(
+            api_account_member=member,
+            datetime_added=fake_now() + timedelta(minutes=5))
+        entry = TokenWhitelistEntry.objects.issue_for_account_member(member)
+        self.assertEqual(list(member.token_whitelist_entries.all()), [entry])
+
+    @override_settings(TOKEN_MAX_ENTRIES_PER_MEMBER=2)
+    def test_issue_for_account_member_evicts_oldest(self):
+        member = ApiAccountMemberFactory()
+        oldest = TokenWhitelistEntryFactory(
+            api_account_member=member,
+            datetime_added=fake_now() - timedelta(minutes=10))
+        TokenWhitelistEntryFactory(
+            api_account_member=member,
+            datetime_added=fake_now() - timedelta(minutes=5))
+        entry = TokenWhitelistEntry.objects.issue_for_account_member(member)
+        self.assertEqual(member.token_whitelist_entries.count(), 2)
+        self.assertFalse(
+            member.token_whitelist_entries.filter(id=oldest.id).exists())
+        self.assertTrue(
+            member.token_whitelist_entries.filter(id=entry.id).exists())
+
+    def test_get_account_member_for_token_joins_related(self):
+        entry = TokenWhitelistEntryFactory()
+        with self.assertNumQueries(1):
+            found_member = TokenWhitelistEntry.objects\
+                .get_account_member_for_token(entry.encode())
+            self.assertEqual(
+                found_member.user, entry.api_account_member.user)
+            self.assertTrue(found_member.api_account.is_active)
+
     def test_get_account_member_for_token(self):
         member = ApiAccountMemberFactory()
         entry = TokenWhitelistEntryFactory(api_account_member=member)
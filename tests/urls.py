@@ -1,6 +1,7 @@
 from django.conf.urls import url
 
 from pronym_api.api.get_token import GetTokenApiView
+from pronym_api.api.refresh_token import RefreshTokenApiView
 
 from tests.test_views.authenticated_sample import (
     AuthenticatedSampleApiView)
@@ -10,6 +11,9 @@ from tests.test_views.unauthenticated_sample import (
 
 urlpatterns = [
     url(r'^get_token/$', GetTokenApiView.as_view(), name='get-token'),
+    url(r'^refresh_token/$',
+        RefreshTokenApiView.as_view(),
+        name='refresh-token'),
     url(r'^unauth_sample/$',
         UnauthenticatedSampleApiView.as_view(),
         name='unauth-sample'),